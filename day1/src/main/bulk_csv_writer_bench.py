@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Day 1: Benchmark — CSV write throughput by buffer size and compression
+Compares the original DictWriter-on-a-text-file path with BulkCsvWriter.
+
+Usage: python bulk_csv_writer_bench.py --rows 500000 --dir /mnt/share/tmp
+"""
+
+import argparse
+import csv
+import tempfile
+import time
+from pathlib import Path
+
+import os
+import sys
+main_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, main_path)  # noqa
+
+from bulk_csv_writer import write_csv
+from employee_store_bench import generate_records
+
+BUFFER_SIZES = [8 * 1024, 64 * 1024, 1024 * 1024, 8 * 1024 * 1024]
+
+def baseline_write(rows, file_path: Path) -> None:
+    with file_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
+        writer.writeheader()
+        writer.writerows(rows)
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CSV write throughput.")
+    parser.add_argument("--rows", type=int, default=500_000, help="Rows to write (default: 500000).")
+    parser.add_argument("--dir", type=Path, default=None, help="Target directory (default: a temp dir).")
+    args = parser.parse_args()
+
+    rows = list(generate_records(args.rows))
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        out = Path(tmp)
+        print(f"{'writer':<22} {'buffer':>8} {'seconds':>8} {'rows/s':>10} {'MB':>7}")
+
+        def report(name: str, buffer: str, seconds: float, path: Path) -> None:
+            size = path.stat().st_size / 1e6
+            print(f"{name:<22} {buffer:>8} {seconds:>8.2f} {args.rows / seconds:>10,.0f} {size:>7.1f}")
+
+        seconds = timed(lambda: baseline_write(rows, out / "baseline.csv"))
+        report("DictWriter (baseline)", "default", seconds, out / "baseline.csv")
+        for suffix in ("", ".gz", ".bz2", ".xz"):
+            for buffer_size in BUFFER_SIZES if not suffix else BUFFER_SIZES[-2:-1]:
+                path = out / f"bulk_{buffer_size}.csv{suffix}"
+                seconds = timed(lambda: write_csv(rows, path, buffer_size=buffer_size))
+                report(f"BulkCsvWriter{suffix or ''}", f"{buffer_size // 1024}K", seconds, path)
+
+if __name__ == "__main__":
+    main()
@@ -6,20 +6,193 @@ Author: Sundarapandiyan — Week 1 Transition Plan
 
 import json
 import csv
+import math
+import re
 import time
 import argparse
+import atexit
+import tracemalloc
 from pathlib import Path
-from typing import List, Dict, Callable
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Union
 from functools import wraps
 
+if __package__:
+    from .bulk_csv_writer import DEFAULT_BUFFER_SIZE, write_csv
+    from .employee_store import EmployeeStore
+    from .filter_expr import CompiledFilter, FilterSyntaxError, compile_filter
+    from .incremental_filter import IncrementalConfigError, incremental_filter
+    from .salary_index import SalaryIndex
+else:
+    from bulk_csv_writer import DEFAULT_BUFFER_SIZE, write_csv
+    from employee_store import EmployeeStore
+    from filter_expr import CompiledFilter, FilterSyntaxError, compile_filter
+    from incremental_filter import IncrementalConfigError, incremental_filter
+    from salary_index import SalaryIndex
+
+# --- Streaming Config ---
+STREAM_CHUNK_SIZE = 64 * 1024  # characters read per refill of the parse buffer
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# --- Profiling ---
+HISTOGRAM_GROWTH = 1.05  # latency bucket width: percentiles are within ~2.5%
+_LOG_GROWTH = math.log(HISTOGRAM_GROWTH)
+
+class FunctionStats:
+    """Call count, log-bucketed latency histogram and peak memory for one function."""
+
+    __slots__ = ("name", "calls", "sampled", "total_ns", "max_ns", "buckets", "peak_bytes")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.sampled = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets: Dict[int, int] = {}
+        self.peak_bytes = 0
+
+    def add(self, elapsed_ns: int) -> None:
+        self.sampled += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+        bucket = int(math.log(max(elapsed_ns, 1)) / _LOG_GROWTH)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile latency in ms (bucket midpoint)."""
+        if not self.sampled:
+            return 0.0
+        rank, seen = q / 100 * self.sampled, 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(HISTOGRAM_GROWTH ** (bucket + 0.5), self.max_ns) / 1e6
+        return self.max_ns / 1e6
+
+    def summary(self) -> Dict[str, Any]:
+        mean_ms = self.total_ns / self.sampled / 1e6 if self.sampled else 0.0
+        return {
+            "function": self.name,
+            "calls": self.calls,
+            "sampled": self.sampled,
+            "est_total_ms": round(mean_ms * self.calls, 3),
+            "mean_ms": round(mean_ms, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_ns / 1e6, 3),
+            "peak_mem_kb": round(self.peak_bytes / 1024, 1) if self.peak_bytes else None,
+        }
+
+class ExecutionProfiler:
+    """Aggregated instrumentation behind @log_execution.
+
+    Disabled by default, in which case the decorator adds a single flag check
+    per call. When enabled it counts every call, times one in `sample_every`
+    calls into a latency histogram, optionally tracks tracemalloc peaks, and
+    can dump a JSON/CSV summary at interpreter exit.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_calls = True  # print [LOG] start/finish lines on every call
+        self.sample_every = 1
+        self.trace_memory = False
+        self.output: Optional[Path] = None
+        self.stats: Dict[str, FunctionStats] = {}
+        self._memory_stack: List[int] = []
+        self._exit_hook = False
+
+    def configure(self, enabled: bool = True, sample_rate: float = 1.0,
+                  trace_memory: bool = False, output: Optional[Path] = None) -> None:
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        self.enabled = enabled
+        self.sample_every = max(1, round(1 / sample_rate))
+        self.trace_memory = enabled and trace_memory
+        self.output = output
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if enabled and not self._exit_hook:
+            atexit.register(self.report)
+            self._exit_hook = True
+
+    def reset(self) -> None:
+        self.stats.clear()
+
+    def call(self, name: str, func: Callable, args: tuple, kwargs: dict) -> Any:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = FunctionStats(name)
+        stats.calls += 1
+        if stats.calls % self.sample_every:
+            return func(*args, **kwargs)
+        if not self.trace_memory:
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.add(time.perf_counter_ns() - start)
+        # reset_peak() is process-wide: bank the enclosing call's peak so far
+        # before resetting, and hand this call's peak up the stack when done.
+        if self._memory_stack:
+            self._memory_stack[-1] = max(self._memory_stack[-1], tracemalloc.get_traced_memory()[1])
+        self._memory_stack.append(0)
+        tracemalloc.reset_peak()
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.add(time.perf_counter_ns() - start)
+            peak = max(tracemalloc.get_traced_memory()[1], self._memory_stack.pop())
+            stats.peak_bytes = max(stats.peak_bytes, peak)
+            if self._memory_stack:
+                self._memory_stack[-1] = max(self._memory_stack[-1], peak)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        return [s.summary() for s in self.stats.values()]
+
+    def dump(self, path: Path) -> None:
+        """Write the summary as CSV if the path ends in .csv, else as JSON."""
+        rows = self.summary()
+        if path.suffix.lower() == ".csv":
+            with path.open("w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=list(FunctionStats("").summary()))
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            path.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+    def report(self) -> None:
+        if not self.enabled or not self.stats:
+            return
+        for row in self.summary():
+            print(f"[PROFILE] {row['function']}: calls={row['calls']} p50={row['p50_ms']:.3f}ms "
+                  f"p95={row['p95_ms']:.3f}ms p99={row['p99_ms']:.3f}ms max={row['max_ms']:.3f}ms "
+                  f"peak_mem_kb={row['peak_mem_kb']}")
+        if self.output is not None:
+            self.dump(self.output)
+            print(f"[PROFILE] Summary written to {self.output}")
+
+PROFILER = ExecutionProfiler()
+
 # --- Decorator ---
 def log_execution(func: Callable) -> Callable:
-    """Decorator to log function start, end, and execution time."""
+    """Decorator to log function start, end, and execution time, and feed PROFILER."""
+    name = func.__qualname__
+
     @wraps(func)
     def wrapper(*args, **kwargs):
+        if not PROFILER.trace_calls:
+            if PROFILER.enabled:
+                return PROFILER.call(name, func, args, kwargs)
+            return func(*args, **kwargs)
         start_time = time.perf_counter()
         print(f"[LOG] Starting: {func.__name__}")
-        result = func(*args, **kwargs)
+        if PROFILER.enabled:
+            result = PROFILER.call(name, func, args, kwargs)
+        else:
+            result = func(*args, **kwargs)
         elapsed = (time.perf_counter() - start_time) * 1000
         print(f"[LOG] Finished: {func.__name__} in {elapsed:.2f} ms")
         return result
@@ -27,26 +200,153 @@ def log_execution(func: Callable) -> Callable:
 
 # --- Core Functions ---
 @log_execution
-def load_employees(file_path: Path) -> List[Dict]:
-    """Load employee data from a JSON file."""
+def load_employees(file_path: Path, columnar: bool = False) -> Union[List[Dict], EmployeeStore]:
+    """Load employee data from a JSON file.
+
+    With columnar=True the records are streamed into an EmployeeStore
+    instead of being kept as a list of dicts.
+    """
+    if columnar:
+        return EmployeeStore.from_records(iter_employees(file_path))
     with file_path.open("r", encoding="utf-8") as f:
         return json.load(f)
 
 @log_execution
-def filter_by_salary(employees: List[Dict], threshold: int) -> List[Dict]:
-    """Return employees with salary above the threshold."""
+def filter_by_salary(employees: Union[List[Dict], EmployeeStore], threshold: int,
+                     max_salary: Optional[int] = None) -> Union[List[Dict], EmployeeStore]:
+    """Return employees with salary above the threshold (and at most max_salary)."""
+    if isinstance(employees, EmployeeStore):
+        mask = employees.compare("salary", ">", threshold, missing=0)
+        if max_salary is not None:
+            mask &= employees.compare("salary", "<=", max_salary, missing=0)
+        return employees.filter(mask)
+    if max_salary is not None:
+        return [emp for emp in employees if threshold < emp.get("salary", 0) <= max_salary]
     return [emp for emp in employees if emp.get("salary", 0) > threshold]
 
 @log_execution
-def save_to_csv(employees: List[Dict], file_path: Path) -> None:
-    """Save employee data to a CSV file."""
+def filter_where(employees: Union[List[Dict], EmployeeStore],
+                 predicate: CompiledFilter) -> Union[List[Dict], EmployeeStore]:
+    """Return employees matching a compiled --where expression."""
+    if isinstance(employees, EmployeeStore):
+        return employees.filter(predicate.mask(employees))
+    return [emp for emp in employees if predicate(emp)]
+
+@log_execution
+def save_to_csv(employees: Union[List[Dict], EmployeeStore], file_path: Path,
+                buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+    """Save employee data to a CSV file (.gz/.bz2/.xz suffixes are compressed)."""
     if not employees:
         print("[WARN] No employees to save.")
         return
-    with file_path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=employees[0].keys())
-        writer.writeheader()
-        writer.writerows(employees)
+    write_csv(employees, file_path, buffer_size=buffer_size)
+
+# --- Streaming Functions (constant memory) ---
+def _iter_json_array(f: TextIO, buf: str, pos: int, chunk_size: int) -> Iterator[Any]:
+    """Yield the items of a JSON array whose opening '[' sits at buf[pos]."""
+    decoder = json.JSONDecoder()
+    pos += 1
+    expect_item = True
+    first = True
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        if pos == len(buf):
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise json.JSONDecodeError("Unterminated array", buf, pos)
+            buf, pos = chunk, 0
+            continue
+        if expect_item:
+            if first and buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                end = None
+            # An item that ends exactly at the buffer edge may continue in the
+            # next chunk (e.g. a bare number), so only trust it at EOF.
+            if end is None or end == len(buf):
+                chunk = f.read(chunk_size)
+                if chunk:
+                    buf, pos = buf[pos:] + chunk, 0
+                    continue
+                if end is None:
+                    decoder.raw_decode(buf, pos)  # re-raise with the real error
+            yield item
+            pos, expect_item, first = end, False, False
+        elif buf[pos] == ",":
+            pos, expect_item = pos + 1, True
+        elif buf[pos] == "]":
+            rest = buf[pos + 1:] + f.read()
+            if rest.strip():
+                raise json.JSONDecodeError("Extra data", rest, len(rest) - len(rest.lstrip()))
+            return
+        else:
+            raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+
+def iter_employees(file_path: Path, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Dict]:
+    """Yield employee records one at a time from a JSON array or NDJSON file."""
+    with file_path.open("r", encoding="utf-8") as f:
+        buf = f.read(chunk_size)
+        pos = _WHITESPACE.match(buf).end()
+        while pos == len(buf):
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            buf, pos = chunk, _WHITESPACE.match(chunk).end()
+        if buf[pos] == "[":
+            yield from _iter_json_array(f, buf, pos, chunk_size)
+            return
+        # NDJSON: one record per line, blank lines ignored.
+        f.seek(0)
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_filter_by_salary(employees: Iterable[Dict], threshold: int,
+                          max_salary: Optional[int] = None) -> Iterator[Dict]:
+    """Lazily yield employees with salary above the threshold (and at most max_salary)."""
+    if max_salary is not None:
+        return (emp for emp in employees if threshold < emp.get("salary", 0) <= max_salary)
+    return (emp for emp in employees if emp.get("salary", 0) > threshold)
+
+def query_salary_index(file_path: Path, threshold: int,
+                       max_salary: Optional[int] = None) -> Iterator[Dict]:
+    """Yield matching employees via the salary index sidecar, building it if stale."""
+    with SalaryIndex.open(file_path) as index:
+        yield from index.above(threshold, max_salary)
+
+@log_execution
+def stream_to_csv(employees: Iterable[Dict], file_path: Path,
+                  buffer_size: int = DEFAULT_BUFFER_SIZE) -> int:
+    """Write employee records to CSV as they arrive and return the row count."""
+    count = write_csv(employees, file_path, buffer_size=buffer_size)
+    if not count:
+        print("[WARN] No employees to save.")
+    return count
+
+@log_execution
+def incremental_to_csv(file_path: Path, output_path: Path, threshold: int,
+                       max_salary: Optional[int] = None, where: Optional[str] = None,
+                       id_field: str = "id", checkpoint_path: Optional[Path] = None,
+                       buffer_size: int = DEFAULT_BUFFER_SIZE) -> Dict[str, int]:
+    """Re-filter only inserted/updated records since the last run (see incremental_filter)."""
+    if where is not None:
+        predicate = compile_filter(where)
+        params = {"where": where}
+    else:
+        def predicate(emp: Dict) -> bool:
+            salary = emp.get("salary", 0)
+            return threshold < salary and (max_salary is None or salary <= max_salary)
+        params = {"threshold": threshold, "max_salary": max_salary}
+    stats = incremental_filter(file_path, output_path, predicate, params, id_field=id_field,
+                               checkpoint_path=checkpoint_path, buffer_size=buffer_size)
+    mode = "full rebuild" if stats["rebuilt"] else "incremental"
+    print(f"[INFO] {mode}: {stats['inserted']} inserted, {stats['updated']} updated, "
+          f"{stats['deleted']} deleted, {stats['unchanged']} unchanged")
+    if not stats["saved"]:
+        print("[WARN] No employees to save.")
+    return stats
 
 # --- CLI Entry Point ---
 @log_execution
@@ -66,13 +366,109 @@ def main():
         "-t", "--threshold", type=int, default=100_000,
         help="Salary threshold (default: 100000)."
     )
+    parser.add_argument(
+        "--max-salary", type=int, default=None,
+        help="Optional inclusive upper salary bound."
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Stream records (JSON array or NDJSON) with constant memory."
+    )
+    parser.add_argument(
+        "--columnar", action="store_true",
+        help="Load records into a compact columnar store and filter with vectorized masks."
+    )
+    parser.add_argument(
+        "--index", action="store_true",
+        help="Answer the query from a salary index sidecar (<input>.salidx), built on first use."
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only re-filter records added or changed since the last run, using a "
+             "checkpoint next to the output (<output>.ckpt)."
+    )
+    parser.add_argument(
+        "--id-field", type=str, default="id",
+        help="Stable record key used by --incremental (default: id)."
+    )
+    parser.add_argument(
+        "--checkpoint", type=Path, default=None,
+        help="Checkpoint path for --incremental (default: <output>.ckpt)."
+    )
+    parser.add_argument(
+        "-w", "--where", type=str, default=None,
+        help="Filter expression that replaces --threshold/--max-salary, e.g. "
+             "\"salary between 90000 and 150000 and role in ('Developer','QA')\"."
+    )
+    parser.add_argument(
+        "--buffer-size", type=int, default=DEFAULT_BUFFER_SIZE,
+        help=f"Output write buffer in bytes (default: {DEFAULT_BUFFER_SIZE}). "
+             "Outputs ending in .gz/.bz2/.xz are compressed."
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true",
+        help="Do not print [LOG] start/finish lines for every call."
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Aggregate per-function call counts and latency percentiles; summary printed at exit."
+    )
+    parser.add_argument(
+        "--profile-sample-rate", type=float, default=1.0,
+        help="Fraction of calls to time when profiling (default: 1.0)."
+    )
+    parser.add_argument(
+        "--profile-memory", action="store_true",
+        help="Also record tracemalloc peak memory per function (slower)."
+    )
+    parser.add_argument(
+        "--profile-output", type=Path, default=None,
+        help="Write the profile summary to this .json or .csv file at exit."
+    )
 
     args = parser.parse_args()
+    PROFILER.trace_calls = not args.quiet
+    if args.profile or args.profile_output:
+        PROFILER.configure(sample_rate=args.profile_sample_rate,
+                           trace_memory=args.profile_memory, output=args.profile_output)
+    predicate = None
+    if args.where is not None:
+        if args.index:
+            parser.error("--where cannot be combined with --index")
+        try:
+            predicate = compile_filter(args.where)
+        except FilterSyntaxError as exc:
+            parser.error(f"invalid --where expression: {exc}")
+    if args.incremental and (args.index or args.columnar):
+        parser.error("--incremental cannot be combined with --index or --columnar")
 
-    employees = load_employees(args.input)
-    high_salary_emps = filter_by_salary(employees, args.threshold)
-    save_to_csv(high_salary_emps, args.output)
-    print(f"[INFO] Saved {len(high_salary_emps)} employees to {args.output}")
+    if args.incremental:
+        try:
+            stats = incremental_to_csv(args.input, args.output, args.threshold, args.max_salary,
+                                       args.where, args.id_field, args.checkpoint,
+                                       args.buffer_size)
+        except IncrementalConfigError as exc:
+            parser.error(str(exc))
+        saved = stats["saved"]
+    elif args.index:
+        matches = query_salary_index(args.input, args.threshold, args.max_salary)
+        saved = stream_to_csv(matches, args.output, args.buffer_size)
+    elif args.stream:
+        employees = iter_employees(args.input)
+        if predicate is not None:
+            matches = filter(predicate, employees)
+        else:
+            matches = iter_filter_by_salary(employees, args.threshold, args.max_salary)
+        saved = stream_to_csv(matches, args.output, args.buffer_size)
+    else:
+        employees = load_employees(args.input, columnar=args.columnar)
+        if predicate is not None:
+            high_salary_emps = filter_where(employees, predicate)
+        else:
+            high_salary_emps = filter_by_salary(employees, args.threshold, args.max_salary)
+        save_to_csv(high_salary_emps, args.output, args.buffer_size)
+        saved = len(high_salary_emps)
+    print(f"[INFO] Saved {saved} employees to {args.output}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
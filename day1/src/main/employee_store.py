@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Day 1: Columnar employee store
+Typed NumPy columns with dictionary-encoded strings, plus a __slots__ row view
+so the CLI's load/filter/save functions keep working on it unchanged.
+"""
+
+import operator
+from array import array
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+_COMPARE: Dict[str, Callable] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# --- Column Builder ---
+class _ColumnBuilder:
+    """Accumulate one field's values, widening the storage kind as needed.
+
+    Kinds: "int" (int64), "float" (float64, with a mask remembering which
+    values were ints so they print back unchanged), "str" (dictionary codes)
+    and "object" (anything else, e.g. bools, nulls or nested lists). A "str"
+    column that turns out to be mostly unique (e.g. names) is stored as
+    "text": one UTF-8 buffer plus an int64 (start, end) span per row.
+    """
+
+    __slots__ = ("kind", "values", "present", "ints", "categories", "lookup")
+
+    def __init__(self, rows_before: int):
+        self.kind = "int"
+        self.values: Any = array("q", bytes(8 * rows_before))
+        self.present = array("b", bytes(rows_before))
+        self.ints = array("b")
+        self.categories: List[str] = []
+        self.lookup: Dict[str, int] = {}
+
+    def append(self, value: Any) -> None:
+        kind = self.kind
+        if kind == "int" and type(value) is int and -(1 << 63) <= value < (1 << 63):
+            self.values.append(value)
+        elif kind == "float" and (type(value) is float or
+                                  (type(value) is int and -(1 << 53) <= value <= (1 << 53))):
+            self.values.append(value)
+            self.ints.append(type(value) is int)
+        elif kind == "str" and type(value) is str:
+            code = self.lookup.get(value)
+            if code is None:
+                code = self.lookup[value] = len(self.categories)
+                self.categories.append(value)
+            self.values.append(code)
+        elif kind == "object":
+            self.values.append(value)
+        else:
+            self._widen(value)
+            self.append(value)
+            return
+        self.present.append(1)
+
+    def append_missing(self) -> None:
+        self.present.append(0)
+        if self.kind == "float":
+            self.ints.append(0)
+        self.values.append(None if self.kind == "object" else 0)
+
+    def _widen(self, value: Any) -> None:
+        seen_value = any(self.present)
+        if self.kind == "int" and type(value) is float and all(
+                -(1 << 53) <= v <= (1 << 53) for v in self.values):
+            self.kind, self.values = "float", array("d", self.values)
+            self.ints = array("b", self.present)
+            return
+        if not seen_value and self.kind == "int" and type(value) is str:
+            # Only placeholders so far: switch straight to dictionary codes.
+            self.kind, self.values = "str", array("i", self.values)
+            return
+        self.values = self._decoded()
+        self.kind = "object"
+        self.ints = array("b")
+        self.categories, self.lookup = [], {}
+
+    def _decoded(self) -> List[Any]:
+        """Current values as Python objects, with None for missing rows."""
+        if self.kind == "str":
+            values = [self.categories[c] if p else None
+                      for c, p in zip(self.values, self.present)]
+        elif self.kind == "float":
+            values = [int(v) if is_int else v for v, is_int in zip(self.values, self.ints)]
+        else:
+            values = list(self.values)
+        return [v if p else None for v, p in zip(values, self.present)]
+
+    def build(self) -> "Column":
+        present = np.frombuffer(self.present, dtype=np.int8).astype(bool)
+        ints = None
+        if self.kind == "object":
+            data = np.empty(len(self.values), dtype=object)
+            data[:] = self.values
+        elif self.kind == "str" and len(self.categories) > len(self.values) // 2:
+            encoded = [c.encode("utf-8") for c in self.categories]
+            codes = np.frombuffer(self.values, dtype=np.int32)
+            lengths = np.array([len(e) for e in encoded], dtype=np.int64)[codes]
+            spans = np.zeros((len(codes), 2), dtype=np.int64)
+            np.cumsum(lengths, out=spans[:, 1])
+            spans[:, 0] = spans[:, 1] - lengths
+            blob = np.frombuffer(b"".join(encoded[c] for c in self.values), dtype=np.uint8)
+            return Column("text", spans, None if present.all() else present,
+                          [], blob=blob)
+        else:
+            dtype = {"int": np.int64, "float": np.float64, "str": np.int32}[self.kind]
+            data = np.frombuffer(self.values, dtype=dtype).copy()
+            if self.kind == "float" and any(self.ints):
+                ints = np.frombuffer(self.ints, dtype=np.int8).astype(bool)
+        return Column(self.kind, data, None if present.all() else present,
+                      self.categories, ints)
+
+# --- Column ---
+class Column:
+    """One typed column; `present` is None when no row is missing the field."""
+
+    __slots__ = ("kind", "data", "present", "categories", "ints", "blob")
+
+    def __init__(self, kind: str, data: np.ndarray, present: Optional[np.ndarray],
+                 categories: List[str], ints: Optional[np.ndarray] = None,
+                 blob: Optional[np.ndarray] = None):
+        self.kind = kind
+        self.data = data  # for "text": (start, end) byte spans into blob
+        self.present = present
+        self.categories = categories
+        self.ints = ints
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def value(self, i: int) -> Any:
+        if self.kind == "str":
+            return self.categories[self.data[i]]
+        if self.kind == "text":
+            start, end = self.data[i]
+            return self.blob[start:end].tobytes().decode("utf-8")
+        if self.kind == "object":
+            return self.data[i]
+        if self.ints is not None and self.ints[i]:
+            return int(self.data[i])
+        return self.data[i].item()
+
+    def is_present(self, i: int) -> bool:
+        return self.present is None or bool(self.present[i])
+
+    def take(self, indices: np.ndarray) -> "Column":
+        present = None if self.present is None else self.present[indices]
+        ints = None if self.ints is None else self.ints[indices]
+        # Filtered text columns keep sharing the parent's buffer.
+        return Column(self.kind, self.data[indices], present, self.categories, ints, self.blob)
+
+    def decoded(self) -> Iterator[Any]:
+        """Every row's value as a Python object (placeholders for missing rows)."""
+        return (self.value(i) for i in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        size = self.data.nbytes + sum(len(c) for c in self.categories)
+        for extra in (self.present, self.ints, self.blob):
+            size += 0 if extra is None else extra.nbytes
+        return size
+
+# --- Row View ---
+class EmployeeRow(Mapping):
+    """Read-only dict-like view of one row; costs two slots, not a dict."""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "EmployeeStore", index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        column = self._store.columns.get(key)
+        if column is None or not column.is_present(self._index):
+            raise KeyError(key)
+        return column.value(self._index)
+
+    def __iter__(self) -> Iterator[str]:
+        i = self._index
+        return (name for name, col in self._store.columns.items() if col.is_present(i))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"EmployeeRow({dict(self)!r})"
+
+# --- Store ---
+class EmployeeStore:
+    """Array-backed employee records that behave like a list of dicts."""
+
+    __slots__ = ("columns", "_length")
+
+    def __init__(self, columns: Dict[str, Column], length: int):
+        self.columns = columns
+        self._length = length
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "EmployeeStore":
+        """Build a store from any iterable of dicts without keeping the dicts."""
+        builders: Dict[str, _ColumnBuilder] = {}
+        count = 0
+        for record in records:
+            for name, value in record.items():
+                builder = builders.get(name)
+                if builder is None:
+                    builder = builders[name] = _ColumnBuilder(count)
+                builder.append(value)
+            count += 1
+            for builder in builders.values():
+                if len(builder.present) < count:
+                    builder.append_missing()
+        return cls({name: b.build() for name, b in builders.items()}, count)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> EmployeeRow:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("EmployeeStore index out of range")
+        return EmployeeRow(self, index)
+
+    def __iter__(self) -> Iterator[EmployeeRow]:
+        return (EmployeeRow(self, i) for i in range(self._length))
+
+    def to_dicts(self) -> List[Dict]:
+        return [dict(row) for row in self]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col.nbytes for col in self.columns.values())
+
+    # --- Vectorized predicates ---
+    def compare(self, field: str, op: str, value: Any, missing: Any = None) -> np.ndarray:
+        """Boolean mask of rows where `field <op> value`; absent fields use `missing`.
+
+        With missing=None, rows lacking the field never match.
+        """
+        column = self.columns.get(field)
+        if column is None:
+            fill = missing is not None and _COMPARE[op](missing, value)
+            return np.full(self._length, fill, dtype=bool)
+        compare = _COMPARE[op]
+        if column.kind == "str":
+            if not isinstance(value, str):
+                mask = np.full(self._length, op == "!=", dtype=bool)
+            else:
+                # Compare the handful of categories once, then gather by code.
+                hits = np.array([compare(c, value) for c in column.categories], dtype=bool)
+                mask = hits[column.data] if len(hits) else np.zeros(self._length, dtype=bool)
+        elif column.kind in ("object", "text"):
+            mask = np.fromiter((_safe_compare(compare, v, value) for v in column.decoded()),
+                               dtype=bool, count=self._length)
+        elif not isinstance(value, (int, float)):
+            mask = np.full(self._length, op == "!=", dtype=bool)
+        else:
+            mask = compare(column.data, value)
+        if column.present is not None:
+            fill = missing is not None and compare(missing, value)
+            mask = np.where(column.present, mask, fill)
+        return mask
+
+    def isin(self, field: str, values: Iterable[Any]) -> np.ndarray:
+        """Boolean mask of rows whose `field` is one of `values`."""
+        column = self.columns.get(field)
+        if column is None:
+            return np.zeros(self._length, dtype=bool)
+        wanted = set(values)
+        if column.kind == "str":
+            hits = np.array([c in wanted for c in column.categories], dtype=bool)
+            mask = hits[column.data] if len(hits) else np.zeros(self._length, dtype=bool)
+        elif column.kind in ("object", "text"):
+            mask = np.fromiter((_safe_in(v, wanted) for v in column.decoded()),
+                               dtype=bool, count=self._length)
+        else:
+            numbers = [v for v in wanted if type(v) in (int, float)]
+            mask = np.isin(column.data, numbers)
+        if column.present is not None:
+            mask &= column.present
+        return mask
+
+    def isnull(self, field: str) -> np.ndarray:
+        """Boolean mask of rows where `field` is missing or JSON null."""
+        column = self.columns.get(field)
+        if column is None:
+            return np.ones(self._length, dtype=bool)
+        mask = np.zeros(self._length, dtype=bool) if column.present is None else ~column.present
+        if column.kind == "object":
+            mask |= np.fromiter((v is None for v in column.data), dtype=bool, count=self._length)
+        return mask
+
+    def filter(self, mask: np.ndarray) -> "EmployeeStore":
+        """Return a new store holding only the rows where mask is True."""
+        indices = np.flatnonzero(mask)
+        columns = {name: col.take(indices) for name, col in self.columns.items()}
+        return EmployeeStore(columns, len(indices))
+
+def _safe_compare(compare: Callable, left: Any, right: Any) -> bool:
+    try:
+        return bool(compare(left, right))
+    except TypeError:
+        return compare is operator.ne
+
+def _safe_in(value: Any, wanted: set) -> bool:
+    try:
+        return value in wanted
+    except TypeError:
+        return False
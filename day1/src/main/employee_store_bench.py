@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Day 1: Benchmark — list of dicts vs columnar EmployeeStore
+Reports memory and filter time per million rows for both representations.
+
+Usage: python employee_store_bench.py --rows 1000000 --threshold 100000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Dict, Iterator
+
+from pathlib import Path
+import os
+import sys
+main_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, main_path)  # noqa
+
+from employee_store import EmployeeStore
+
+ROLES = ["Developer", "QA", "Manager", "Data Scientist", "DevOps", "Designer"]
+LOCATIONS = ["New York", "London", "Bangalore", "Berlin", "Toronto", "Sydney"]
+
+def generate_records(num_rows: int, seed: int = 42) -> Iterator[Dict]:
+    rng = random.Random(seed)
+    for i in range(num_rows):
+        yield {
+            "name": f"Employee_{i+1}",
+            "role": rng.choice(ROLES),
+            "salary": rng.randint(50_000, 200_000),
+            "location": rng.choice(LOCATIONS),
+        }
+
+def measure(build, filter_fn):
+    # Memory and timings come from separate builds: tracemalloc itself slows
+    # down allocation-heavy code by a large factor.
+    tracemalloc.start()
+    data = build()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    start = time.perf_counter()
+    data = build()
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    matched = filter_fn(data)
+    filter_s = time.perf_counter() - start
+    return memory, build_s, filter_s, len(matched)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dict-list and columnar employee storage.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows to generate (default: 1000000).")
+    parser.add_argument("--threshold", type=int, default=100_000, help="Salary threshold (default: 100000).")
+    args = parser.parse_args()
+
+    scale = 1_000_000 / args.rows
+    results = {
+        "list[dict]": measure(
+            lambda: list(generate_records(args.rows)),
+            lambda emps: [e for e in emps if e.get("salary", 0) > args.threshold],
+        ),
+        "EmployeeStore": measure(
+            lambda: EmployeeStore.from_records(generate_records(args.rows)),
+            lambda store: store.filter(store.compare("salary", ">", args.threshold, missing=0)),
+        ),
+    }
+
+    print(f"{'layout':<14} {'MB/1M rows':>11} {'build s/1M':>11} {'filter ms/1M':>13} {'matched':>9}")
+    for name, (memory, build_s, filter_s, matched) in results.items():
+        print(f"{name:<14} {memory * scale / 1e6:>11.1f} {build_s * scale:>11.2f} "
+              f"{filter_s * scale * 1000:>13.2f} {matched:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Day 1: --where filter expressions
+Parses expressions such as
+
+    salary between 90000 and 150000 and role in ('Developer', 'QA')
+
+and compiles them once into a single fused Python predicate (plus a
+vectorized mask builder for EmployeeStore). Missing fields and nulls follow
+SQL: any comparison against them is false.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Tuple
+
+# --- Tokenizer ---
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|-?\.\d+(?:[eE][-+]?\d+)?)
+      | (?P<string>'(?:[^']|'')*'|"(?:[^"]|"")*")
+      | (?P<op><=|>=|<>|!=|==|=|<|>|\(|\)|,)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+
+KEYWORDS = {"and", "or", "not", "between", "in", "is", "null", "true", "false"}
+
+class FilterSyntaxError(ValueError):
+    """Raised when a --where expression cannot be parsed."""
+
+def tokenize(text: str) -> List[Tuple[str, Any]]:
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if m is None or m.end() == pos:
+            raise FilterSyntaxError(f"Unexpected character at {pos}: {text[pos:pos + 10]!r}")
+        pos = m.end()
+        if m.group("number") is not None:
+            raw = m.group("number")
+            tokens.append(("lit", float(raw) if any(c in raw for c in ".eE") else int(raw)))
+        elif m.group("string") is not None:
+            raw = m.group("string")
+            tokens.append(("lit", raw[1:-1].replace(raw[0] * 2, raw[0])))
+        elif m.group("op") is not None:
+            tokens.append(("op", m.group("op")))
+        else:
+            word = m.group("name")
+            lowered = word.lower()
+            if lowered in ("true", "false"):
+                tokens.append(("lit", lowered == "true"))
+            elif lowered in KEYWORDS:
+                tokens.append(("kw", lowered))
+            else:
+                tokens.append(("field", word))
+    tokens.append(("end", None))
+    return tokens
+
+# --- Parser ---
+# AST nodes are tuples:
+#   ("and", [nodes]) | ("or", [nodes]) | ("not", node)
+#   ("cmp", field, op, value) | ("between", field, low, high)
+#   ("in", field, values) | ("null", field)
+class _Parser:
+    def __init__(self, text: str):
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def peek(self) -> Tuple[str, Any]:
+        return self.tokens[self.pos]
+
+    def take(self, kind: str, value: Any = None) -> Any:
+        tok_kind, tok_value = self.tokens[self.pos]
+        if tok_kind != kind or (value is not None and tok_value != value):
+            expected = value or kind
+            raise FilterSyntaxError(f"Expected {expected!r} but found {tok_value!r}")
+        self.pos += 1
+        return tok_value
+
+    def accept(self, kind: str, value: Any) -> bool:
+        if self.peek() == (kind, value):
+            self.pos += 1
+            return True
+        return False
+
+    def parse(self) -> tuple:
+        node = self.parse_or()
+        self.take("end")
+        return node
+
+    def parse_or(self) -> tuple:
+        nodes = [self.parse_and()]
+        while self.accept("kw", "or"):
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def parse_and(self) -> tuple:
+        nodes = [self.parse_not()]
+        while self.accept("kw", "and"):
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def parse_not(self) -> tuple:
+        if self.accept("kw", "not"):
+            return ("not", self.parse_not())
+        if self.accept("op", "("):
+            node = self.parse_or()
+            self.take("op", ")")
+            return node
+        return self.parse_predicate()
+
+    def parse_predicate(self) -> tuple:
+        field = self.take("field")
+        if self.accept("kw", "is"):
+            negate = self.accept("kw", "not")
+            self.take("kw", "null")
+            return ("not", ("null", field)) if negate else ("null", field)
+        negate = self.accept("kw", "not")
+        if self.accept("kw", "between"):
+            low = self.literal()
+            self.take("kw", "and")
+            node = ("between", field, low, self.literal())
+        elif self.accept("kw", "in"):
+            self.take("op", "(")
+            values = [self.literal()]
+            while self.accept("op", ","):
+                values.append(self.literal())
+            self.take("op", ")")
+            node = ("in", field, tuple(values))
+        elif negate:
+            raise FilterSyntaxError("Expected 'between' or 'in' after 'not'")
+        else:
+            op = self.take("op")
+            if op not in ("=", "==", "!=", "<>", "<", "<=", ">", ">="):
+                raise FilterSyntaxError(f"Unknown comparison operator {op!r}")
+            op = {"=": "==", "<>": "!="}.get(op, op)
+            return ("cmp", field, op, self.literal())
+        return ("not", node) if negate else node
+
+    def literal(self) -> Any:
+        if self.accept("kw", "null"):
+            raise FilterSyntaxError("Use 'is null' / 'is not null' to test for nulls")
+        return self.take("lit")
+
+def parse(text: str) -> tuple:
+    """Parse a --where expression into its AST."""
+    return _Parser(text).parse()
+
+# --- Planning ---
+# Rough cost/selectivity rank used to order AND/OR operands: equality and
+# small IN lists are cheap and usually selective, so they run first and
+# short-circuit the rest; negations and nested groups run last.
+def _rank(node: tuple) -> int:
+    kind = node[0]
+    if kind == "cmp":
+        return {"==": 0, "!=": 5}.get(node[2], 3)
+    if kind == "in":
+        return 1 if len(node[2]) <= 8 else 4
+    if kind == "between":
+        return 2
+    if kind == "null":
+        return 1
+    return 6 + sum(_rank(child) for child in node[1]) if kind in ("and", "or") else 7
+
+def optimize(node: tuple) -> tuple:
+    """Flatten nested AND/OR groups and order operands cheapest-first."""
+    kind = node[0]
+    if kind == "not":
+        return ("not", optimize(node[1]))
+    if kind not in ("and", "or"):
+        return node
+    children = []
+    for child in map(optimize, node[1]):
+        children.extend(child[1] if child[0] == kind else [child])
+    return (kind, sorted(children, key=_rank))
+
+def fields_of(node: tuple) -> List[str]:
+    """Fields referenced by the expression, in first-use order."""
+    if node[0] in ("and", "or"):
+        seen: Dict[str, None] = {}
+        for child in node[1]:
+            seen.update(dict.fromkeys(fields_of(child)))
+        return list(seen)
+    if node[0] == "not":
+        return fields_of(node[1])
+    return [node[1]]
+
+# --- Code Generation ---
+_NUMBER_TYPES = frozenset((int, float, bool))
+
+class CompiledFilter:
+    """A --where expression compiled to one fused predicate over records."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.ast = optimize(parse(text))
+        self.fields = fields_of(self.ast)
+        self._constants: Dict[str, Any] = {"_NUM": _NUMBER_TYPES}
+        body = self._emit(self.ast)
+        # Each field is looked up once per record into a local, whatever the
+        # number of clauses that use it.
+        lookups = "".join(f"    {self._local(f)} = get({f!r})\n" for f in self.fields)
+        self.source = f"def predicate(record):\n    get = record.get\n{lookups}    return {body}\n"
+        namespace = dict(self._constants)
+        exec(compile(self.source, f"<where: {text}>", "exec"), namespace)
+        self._predicate: Callable[[Any], bool] = namespace["predicate"]
+
+    def __call__(self, record: Any) -> bool:
+        return self._predicate(record)
+
+    def __repr__(self) -> str:
+        return f"CompiledFilter({self.text!r})"
+
+    def _local(self, field: str) -> str:
+        return f"f{self.fields.index(field)}"
+
+    def _const(self, value: Any) -> str:
+        name = f"_c{len(self._constants)}"
+        self._constants[name] = value
+        return name
+
+    def _guard(self, var: str, value: Any) -> str:
+        """Type test that keeps ordering comparisons from raising on mixed data."""
+        if isinstance(value, str):
+            return f"type({var}) is str"
+        return f"type({var}) in _NUM"
+
+    def _emit(self, node: tuple) -> str:
+        kind = node[0]
+        if kind in ("and", "or"):
+            return "(" + f" {kind} ".join(self._emit(child) for child in node[1]) + ")"
+        if kind == "not":
+            return f"(not {self._emit(node[1])})"
+        var = self._local(node[1])
+        if kind == "null":
+            return f"({var} is None)"
+        if kind == "in":
+            values = node[2]
+            try:
+                return f"({var} in {self._const(frozenset(values))})"
+            except TypeError:  # unhashable literal mix; fall back to a tuple
+                return f"({var} in {self._const(tuple(values))})"
+        if kind == "between":
+            low, high = node[2], node[3]
+            return (f"({self._guard(var, low)} and "
+                    f"{self._const(low)} <= {var} <= {self._const(high)})")
+        op, value = node[2], node[3]
+        if op == "==":
+            return f"({var} == {self._const(value)})"
+        if op == "!=":
+            return f"({var} is not None and {var} != {self._const(value)})"
+        return f"({self._guard(var, value)} and {var} {op} {self._const(value)})"
+
+    # --- Vectorized evaluation ---
+    def mask(self, store: Any) -> Any:
+        """Evaluate the expression over an EmployeeStore as one boolean mask."""
+        return self._mask(self.ast, store)
+
+    def _mask(self, node: tuple, store: Any) -> Any:
+        kind = node[0]
+        if kind in ("and", "or"):
+            masks = [self._mask(child, store) for child in node[1]]
+            result = masks[0]
+            for m in masks[1:]:
+                result = (result & m) if kind == "and" else (result | m)
+            return result
+        if kind == "not":
+            return ~self._mask(node[1], store)
+        if kind == "null":
+            return store.isnull(node[1])
+        if kind == "in":
+            return store.isin(node[1], node[2])
+        if kind == "between":
+            return store.compare(node[1], ">=", node[2]) & store.compare(node[1], "<=", node[3])
+        op, value = node[2], node[3]
+        if op == "!=":
+            # SQL semantics: a null/missing value is not "different" either.
+            return store.compare(node[1], "!=", value) & ~store.isnull(node[1])
+        return store.compare(node[1], op, value)
+
+def compile_filter(text: str) -> CompiledFilter:
+    """Parse, plan and compile a --where expression."""
+    return CompiledFilter(text)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Day 1: Incremental re-filtering
+Keeps a checkpoint of per-record content fingerprints next to the output. On
+the next run only inserted or updated records are parsed, filtered and
+encoded; rows of unchanged records are copied byte-for-byte from the previous
+CSV, and a stable id field is used only to report what changed. A full
+rebuild happens when the checkpoint is missing, the filter parameters
+changed, or the previous output no longer matches the checkpoint.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import mmap
+import os
+import re
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+if __package__:
+    from .bulk_csv_writer import DEFAULT_BUFFER_SIZE, atomic_output, compression_for
+    from .salary_index import SCAN_CHUNK_SIZE, iter_record_spans
+else:
+    from bulk_csv_writer import DEFAULT_BUFFER_SIZE, atomic_output, compression_for
+    from salary_index import SCAN_CHUNK_SIZE, iter_record_spans
+
+CHECKPOINT_SUFFIX = ".ckpt"
+CHECKPOINT_MAGIC = b"FILTCKPT1\n"
+FINGERPRINT_SIZE = 8
+_ARRAY_START = re.compile(rb"[ \t\n\r]*\[")
+
+class IncrementalConfigError(ValueError):
+    """Raised when incremental mode cannot work with the requested output."""
+
+class _Rebuild(Exception):
+    """The previous output cannot be patched; start over from scratch."""
+
+class _NoMatches(Exception):
+    """Nothing passed the filter; abandon the temp output."""
+
+def default_checkpoint_path(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + CHECKPOINT_SUFFIX)
+
+def _stat_stamp(path: Path) -> Optional[Dict[str, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+# --- Checkpoint File ---
+# Same shape as the salary index: magic, one JSON header line, then packed
+# arrays (fingerprints, output row starts/ends, -1 when filtered out) and the
+# record ids as a JSON list. Reading it back is a handful of bulk copies.
+Records = Dict[bytes, Tuple[Any, int, int]]
+
+def _load_checkpoint(checkpoint_path: Path, params: Dict[str, Any],
+                     output_path: Path) -> Optional[Tuple[Dict[str, Any], Records]]:
+    """Return (header, records) if the checkpoint can be used to patch the output."""
+    try:
+        with checkpoint_path.open("rb") as f:
+            if f.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+                return None
+            header = json.loads(f.readline())
+            if header["params"] != params or header["output"] != _stat_stamp(output_path):
+                return None  # different filter, or output edited/replaced/deleted
+            count = header["count"]
+            fingerprints = f.read(count * FINGERPRINT_SIZE)
+            starts, ends = array("q"), array("q")
+            starts.fromfile(f, count)
+            ends.fromfile(f, count)
+            ids = json.loads(f.read())
+    except (OSError, ValueError, KeyError, EOFError):
+        return None
+    keys = [fingerprints[i:i + FINGERPRINT_SIZE]
+            for i in range(0, len(fingerprints), FINGERPRINT_SIZE)]
+    return header, dict(zip(keys, zip(ids, starts.tolist(), ends.tolist())))
+
+def _write_checkpoint(checkpoint_path: Path, header: Dict[str, Any], records: Records) -> None:
+    header = dict(header, count=len(records))
+    ids, starts, ends = zip(*records.values()) if records else ((), (), ())
+    tmp_path = checkpoint_path.with_name(checkpoint_path.name + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(CHECKPOINT_MAGIC + json.dumps(header).encode("utf-8") + b"\n")
+        f.write(b"".join(records))
+        array("q", starts).tofile(f)
+        array("q", ends).tofile(f)
+        f.write(json.dumps(ids).encode("utf-8"))
+    os.replace(tmp_path, checkpoint_path)
+
+class _RowEncoder:
+    """Encodes one CSV row at a time to bytes, so its output span is known."""
+
+    def __init__(self, fieldnames: List[str]):
+        self._text = io.StringIO(newline="")
+        self._writer = csv.DictWriter(self._text, fieldnames=fieldnames)
+
+    def _take(self) -> bytes:
+        data = self._text.getvalue().encode("utf-8")
+        self._text.seek(0)
+        self._text.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writeheader()
+        return self._take()
+
+    def row(self, record: Dict) -> bytes:
+        self._writer.writerow(record)
+        return self._take()
+
+def incremental_filter(input_path: Path, output_path: Path,
+                       predicate: Callable[[Dict], bool], params: Dict[str, Any],
+                       id_field: str = "id", checkpoint_path: Optional[Path] = None,
+                       buffer_size: int = DEFAULT_BUFFER_SIZE) -> Dict[str, int]:
+    """Filter input_path into output_path, patching the previous run's output.
+
+    `params` identifies the filter (threshold, expression, ...); any change
+    forces a full rebuild. Returns the number of saved rows, the inserted,
+    updated, deleted and unchanged record counts, and `rebuilt` (0 or 1).
+    No output file is left behind when nothing matches.
+    """
+    if compression_for(output_path):
+        raise IncrementalConfigError("Incremental mode needs an uncompressed output file")
+    checkpoint_path = checkpoint_path or default_checkpoint_path(output_path)
+    params = dict(params, id_field=id_field)
+    previous = _load_checkpoint(checkpoint_path, params, output_path)
+    if previous is not None:
+        try:
+            return _run(input_path, output_path, predicate, params, id_field,
+                        checkpoint_path, buffer_size, previous)
+        except _Rebuild:
+            pass
+    stats = _run(input_path, output_path, predicate, params, id_field,
+                 checkpoint_path, buffer_size, None)
+    stats["rebuilt"] = 1
+    return stats
+
+def _iter_raw_records(input_path: Path) -> Iterator[bytes]:
+    """Yield the exact bytes of each record, without parsing NDJSON at all."""
+    with input_path.open("rb") as f:
+        if _ARRAY_START.match(f.read(SCAN_CHUNK_SIZE)) is None:
+            f.seek(0)
+            for line in f:
+                raw = line.rstrip(b"\r\n")
+                if raw.strip():
+                    yield raw
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            for start, end, _ in iter_record_spans(input_path):
+                yield source[start:end]
+
+def _id_of(record: Dict, id_field: str) -> Any:
+    value = record.get(id_field)
+    return value if value is None or isinstance(value, (str, int, float)) else json.dumps(value)
+
+def _run(input_path: Path, output_path: Path, predicate: Callable[[Dict], bool],
+         params: Dict[str, Any], id_field: str, checkpoint_path: Path,
+         buffer_size: int, previous: Optional[Tuple[Dict[str, Any], Records]]) -> Dict[str, int]:
+    # Records are keyed by content: identical bytes always give the same row,
+    # so an unchanged record is never parsed. Ids only feed the change report.
+    old_header, old_records = previous if previous is not None else ({"fieldnames": None}, {})
+    old_fieldnames: Optional[List[str]] = old_header["fieldnames"]
+    records: Records = {}
+    changed_ids: List[Any] = []
+    saved = unchanged = 0
+    fieldnames: Optional[List[str]] = None
+    encoder: Optional[_RowEncoder] = None
+    blake2b = hashlib.blake2b
+
+    old_output = b""
+    if previous is not None and old_header["output"] is not None:
+        with output_path.open("rb") as f:
+            old_output = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        with atomic_output(output_path, buffer_size) as out:
+            position = 0
+            # Unchanged rows that were adjacent in the old output are copied
+            # as one slice: [copy_start, copy_end) is the pending old span.
+            copy_start = copy_end = 0
+            for raw in _iter_raw_records(input_path):
+                fingerprint = blake2b(raw, digest_size=FINGERPRINT_SIZE).digest()
+                old = old_records.get(fingerprint)
+                if old is not None and fingerprint not in records:
+                    unchanged += 1
+                    record_id, start, end = old
+                    if start < 0:  # still filtered out
+                        records[fingerprint] = old
+                        continue
+                    if fieldnames is not None:
+                        if start != copy_end:
+                            out.write(old_output[copy_start:copy_end])
+                            copy_start = start
+                        copy_end = end
+                        records[fingerprint] = (record_id, position, position + end - start)
+                        position += end - start
+                        saved += 1
+                        continue
+                    employee, row = None, old_output[start:end]
+                else:
+                    # New or edited record, or a repeat of one seen this run.
+                    employee = json.loads(raw)
+                    record_id = _id_of(employee, id_field)
+                    if old is None:
+                        changed_ids.append(record_id)
+                    else:
+                        unchanged += 1
+                    if not predicate(employee):
+                        records[fingerprint] = (record_id, -1, -1)
+                        continue
+                if fieldnames is None:
+                    # Like save_to_csv, the columns come from the first match;
+                    # copied rows are only valid under the same header.
+                    fieldnames = list(employee if employee is not None else json.loads(raw))
+                    if old_fieldnames is not None and fieldnames != old_fieldnames:
+                        raise _Rebuild()
+                    encoder = _RowEncoder(fieldnames)
+                    header = encoder.header()
+                    out.write(header)
+                    position = len(header)
+                if employee is not None:
+                    row = encoder.row(employee)
+                out.write(old_output[copy_start:copy_end])
+                copy_start = copy_end = 0
+                out.write(row)
+                records.setdefault(fingerprint, (record_id, position, position + len(row)))
+                position += len(row)
+                saved += 1
+            out.write(old_output[copy_start:copy_end])
+            if fieldnames is None:
+                raise _NoMatches()
+            if isinstance(old_output, mmap.mmap):
+                old_output.close()  # before the temp file is renamed over it
+    except _NoMatches:
+        output_path.unlink(missing_ok=True)
+    finally:
+        if isinstance(old_output, mmap.mmap):
+            old_output.close()
+
+    vanished = {entry[0] for fp, entry in old_records.items() if fp not in records}
+    updated = sum(1 for record_id in changed_ids if record_id in vanished)
+    _write_checkpoint(checkpoint_path, {
+        "params": params,
+        "fieldnames": fieldnames,
+        "output": _stat_stamp(output_path),
+    }, records)
+    return {"saved": saved, "inserted": len(changed_ids) - updated, "updated": updated,
+            "deleted": len(vanished - set(changed_ids)), "unchanged": unchanged, "rebuilt": 0}
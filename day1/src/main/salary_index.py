@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Day 1: Salary index sidecar
+A sorted salary column with byte offsets into the source JSON/NDJSON file,
+stored next to it as `<input>.salidx`. Threshold and range queries become a
+binary search plus a sequential read of just the matching records.
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import re
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+INDEX_SUFFIX = ".salidx"
+INDEX_MAGIC = b"SALIDX1\n"
+SCAN_CHUNK_SIZE = 1024 * 1024
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# --- Source Scanning ---
+def iter_record_spans(file_path: Path, chunk_size: int = SCAN_CHUNK_SIZE,
+                      digest: Optional[Any] = None) -> Iterator[Tuple[int, int, Any]]:
+    """Yield (start, end, record) byte spans for a JSON array or NDJSON file.
+
+    Bytes are decoded as latin-1 so that string positions equal file offsets;
+    JSON structure is pure ASCII, so only non-ASCII string contents come out
+    mangled, and callers re-read the exact bytes when they need the record.
+    """
+    with file_path.open("rb") as f:
+        head = f.read(chunk_size).decode("latin-1")
+        f.seek(0)
+        pos = _WHITESPACE.match(head).end()
+        if pos < len(head) and head[pos] == "[":
+            yield from _iter_array_spans(f, chunk_size, digest)
+            return
+        offset = 0
+        for line in f:
+            if digest is not None:
+                digest.update(line)
+            if line.strip():
+                yield offset, offset + len(line.rstrip(b"\r\n")), json.loads(line)
+            offset += len(line)
+
+def _iter_array_spans(f, chunk_size: int,
+                      digest: Optional[Any]) -> Iterator[Tuple[int, int, Any]]:
+    decoder = json.JSONDecoder()
+    text, base, pos = "", 0, 0  # base is the file offset of text[0]
+    expect_item, first = None, True  # None until the opening '[' is consumed
+
+    def refill(keep_from: int) -> bool:
+        nonlocal text, base, pos
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return False
+        if digest is not None:
+            digest.update(chunk)
+        base += keep_from
+        text, pos = text[keep_from:] + chunk.decode("latin-1"), pos - keep_from
+        return True
+
+    while True:
+        pos = _WHITESPACE.match(text, pos).end()
+        if pos == len(text):
+            if not refill(pos):
+                raise json.JSONDecodeError("Unterminated array", text, pos)
+            continue
+        if expect_item is None:
+            pos, expect_item = pos + 1, True  # the '[' found by the caller
+        elif expect_item:
+            if first and text[pos] == "]":
+                break
+            try:
+                item, end = decoder.raw_decode(text, pos)
+            except json.JSONDecodeError:
+                end = None
+            if end is None or end == len(text):
+                if refill(pos):
+                    continue
+                if end is None:
+                    decoder.raw_decode(text, pos)  # re-raise with the real error
+            yield base + pos, base + end, item
+            pos, expect_item, first = end, False, False
+        elif text[pos] == ",":
+            pos, expect_item = pos + 1, True
+        elif text[pos] == "]":
+            break
+        else:
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, pos)
+    while refill(len(text)):  # hash the trailing bytes too
+        pass
+
+def _hash_file(file_path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with file_path.open("rb") as f:
+        for chunk in iter(lambda: f.read(SCAN_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# --- Index ---
+class SalaryIndex:
+    """Memory-mapped salary index; use SalaryIndex.open() to build or reuse one."""
+
+    def __init__(self, source: Path, index_path: Path):
+        self.source = source
+        self.index_path = index_path
+        self.meta: Dict[str, Any] = _read_meta(index_path)
+        with index_path.open("rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        count = self.meta["count"]
+        self._body = memoryview(self._mmap)[self.meta["data_offset"]:]
+        self.salaries = self._body[:8 * count].cast("d")
+        self.starts = self._body[8 * count:16 * count].cast("q")
+        self.ends = self._body[16 * count:24 * count].cast("q")
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    def __enter__(self) -> "SalaryIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for view in (self.salaries, self.starts, self.ends, self._body):
+            view.release()
+        self._mmap.close()
+
+    @classmethod
+    def open(cls, source: Path, index_path: Optional[Path] = None) -> "SalaryIndex":
+        """Open the index for `source`, building or rebuilding it when stale."""
+        index_path = index_path or source.with_name(source.name + INDEX_SUFFIX)
+        stat = source.stat()
+        meta = _read_meta(index_path)
+        if meta is None or meta["source_size"] != stat.st_size:
+            build_index(source, index_path)
+        elif meta["source_mtime_ns"] != stat.st_mtime_ns:
+            # Same size but touched: only a content change forces a rebuild.
+            if meta["source_hash"] == _hash_file(source):
+                _restamp(index_path, meta, stat.st_mtime_ns)
+            else:
+                build_index(source, index_path)
+        return cls(source, index_path)
+
+    def above(self, threshold: float, at_most: Optional[float] = None) -> Iterator[Dict]:
+        """Yield records with threshold < salary (<= at_most), in source file order."""
+        lo = bisect.bisect_right(self.salaries, threshold)
+        hi = len(self) if at_most is None else bisect.bisect_right(self.salaries, at_most)
+        return self._read(lo, max(lo, hi))
+
+    def between(self, low: float, high: float) -> Iterator[Dict]:
+        """Yield records with low <= salary <= high, in source file order."""
+        lo = bisect.bisect_left(self.salaries, low)
+        return self._read(lo, max(lo, bisect.bisect_right(self.salaries, high)))
+
+    def _read(self, lo: int, hi: int) -> Iterator[Dict]:
+        # Matches come out in salary order; sort them back into file order so
+        # the source is read front to back and the output matches a full scan.
+        spans = sorted(zip(self.starts[lo:hi].tolist(), self.ends[lo:hi].tolist()))
+        decode = json.JSONDecoder().decode
+        buf, buf_start = b"", 0
+        with self.source.open("rb", buffering=0) as f:
+            for start, end in spans:
+                buf_end = buf_start + len(buf)
+                if end > buf_end:
+                    # Refill with one large read; small gaps between matches
+                    # are read through rather than seeked over.
+                    if start >= buf_end + SCAN_CHUNK_SIZE:
+                        buf, buf_start = b"", start
+                        f.seek(start)
+                    else:
+                        keep = min(start, buf_end)
+                        buf, buf_start = buf[keep - buf_start:], keep
+                    buf += f.read(max(SCAN_CHUNK_SIZE, end - buf_start - len(buf)))
+                yield decode(buf[start - buf_start:end - buf_start].decode("utf-8"))
+
+def _read_meta(index_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with index_path.open("rb") as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                return None
+            return json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+
+def _write_index(index_path: Path, meta: Dict[str, Any], payload: bytes = b"") -> None:
+    # The header records its own padded length, so iterate until it is stable;
+    # padding keeps the arrays that follow 8-byte aligned.
+    meta["data_offset"] = 0
+    while True:
+        header = INDEX_MAGIC + json.dumps(meta).encode("ascii")
+        size = len(header) + 1
+        size += -size % 8
+        if meta["data_offset"] == size:
+            break
+        meta["data_offset"] = size
+    header += b" " * (size - len(header) - 1) + b"\n"
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, index_path)
+
+def _restamp(index_path: Path, meta: Dict[str, Any], mtime_ns: int) -> None:
+    with index_path.open("rb") as f:
+        f.seek(meta["data_offset"])
+        payload = f.read()
+    meta["source_mtime_ns"] = mtime_ns
+    _write_index(index_path, meta, payload)
+
+def build_index(source: Path, index_path: Optional[Path] = None) -> Path:
+    """Scan `source` once and write its salary index; returns the index path."""
+    index_path = index_path or source.with_name(source.name + INDEX_SUFFIX)
+    stat = source.stat()
+    digest = hashlib.blake2b(digest_size=16)
+    salaries, starts, ends = array("d"), array("q"), array("q")
+    for start, end, record in iter_record_spans(source, digest=digest):
+        salary = record.get("salary", 0)
+        if not isinstance(salary, (int, float)):
+            raise TypeError(f"Non-numeric salary {salary!r} at byte {start} of {source}")
+        salaries.append(salary)
+        starts.append(start)
+        ends.append(end)
+    order = sorted(range(len(salaries)), key=salaries.__getitem__)
+    payload = b"".join(
+        array(code, (column[i] for i in order)).tobytes()
+        for code, column in (("d", salaries), ("q", starts), ("q", ends))
+    )
+    meta = {
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_hash": digest.hexdigest(),
+        "count": len(salaries),
+        "data_offset": 0,
+    }
+    _write_index(index_path, meta, payload)
+    return index_path
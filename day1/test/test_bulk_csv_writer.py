@@ -0,0 +1,55 @@
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import sys
+from pathlib import Path
+
+import pytest
+
+import os
+main_path = os.path.abspath(os.path.dirname(__file__))
+src_path = str(Path(main_path).parents[0])
+sys.path.insert(0, src_path)  # noqa
+
+from src.main.bulk_csv_writer import write_csv
+from src.main.employee_filter_cli import save_to_csv
+
+ROWS = [{"name": f"E{i}", "role": "Dev, Sr", "salary": 100_000 + i} for i in range(25)]
+
+def expected_bytes() -> bytes:
+    text = io.StringIO(newline="")
+    writer = csv.DictWriter(text, fieldnames=ROWS[0].keys())
+    writer.writeheader()
+    writer.writerows(ROWS)
+    return text.getvalue().encode("utf-8")
+
+def test_write_csv_small_batches_match_dictwriter(tmp_path: Path):
+    out = tmp_path / "out.csv"
+
+    count = write_csv(ROWS, out, buffer_size=16, batch_rows=3)
+
+    assert count == 25
+    assert out.read_bytes() == expected_bytes()
+
+@pytest.mark.parametrize("suffix, opener", [(".gz", gzip.open), (".bz2", bz2.open), (".xz", lzma.open)])
+def test_save_to_csv_compresses_by_suffix(suffix, opener, tmp_path: Path):
+    out = tmp_path / f"out.csv{suffix}"
+
+    save_to_csv(ROWS, out)
+
+    with opener(out, "rb") as f:
+        assert f.read() == expected_bytes()
+    assert out.read_bytes() != expected_bytes()
+
+def test_write_csv_failure_keeps_previous_file(tmp_path: Path):
+    out = tmp_path / "out.csv"
+    out.write_text("previous", encoding="utf-8")
+    bad_rows = ROWS[:2] + [{"name": "X", "unexpected": 1}]
+
+    with pytest.raises(ValueError):
+        write_csv(bad_rows, out, batch_rows=1)
+
+    assert out.read_text(encoding="utf-8") == "previous"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.csv"]
@@ -15,7 +15,13 @@ from src.main.employee_filter_cli import (
     filter_by_salary,
     save_to_csv,
     main,
+    iter_employees,
+    iter_filter_by_salary,
+    stream_to_csv,
+    log_execution,
+    PROFILER,
 )
+from src.main.salary_index import SalaryIndex
 
 def test_load_employees_success(tmp_path: Path):
     data = [
@@ -116,4 +122,162 @@ def test_load_employees_invalid_json_raises(tmp_path: Path):
     bad.write_text("{invalid_json:}", encoding="utf-8")
 
     with pytest.raises(json.JSONDecodeError):
-        load_employees(bad)
\ No newline at end of file
+        load_employees(bad)
+
+def test_iter_employees_json_array_small_chunks(tmp_path: Path):
+    data = [
+        {"name": "Alice", "role": "Dev", "salary": 120000},
+        {"name": "Bob", "role": "QA", "salary": 80000.5, "tags": ["a", "b"]},
+        {"name": "Zoë", "role": "Mgr", "salary": 150000},
+    ]
+    f = tmp_path / "employees.json"
+    f.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    # A tiny chunk size forces records to straddle buffer refills.
+    result = list(iter_employees(f, chunk_size=7))
+
+    assert result == data
+
+def test_iter_employees_ndjson(tmp_path: Path):
+    f = tmp_path / "employees.ndjson"
+    f.write_text(
+        '{"name": "Alice", "salary": 120000}\n\n{"name": "Bob", "salary": 80000}\n',
+        encoding="utf-8",
+    )
+
+    result = list(iter_employees(f))
+
+    assert [e["name"] for e in result] == ["Alice", "Bob"]
+
+def test_iter_employees_invalid_json_raises(tmp_path: Path):
+    bad = tmp_path / "bad.json"
+    bad.write_text('[{"name": "Alice"}, {invalid_json:}]', encoding="utf-8")
+
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_employees(bad, chunk_size=4))
+
+def test_stream_matches_in_memory_output(tmp_path: Path):
+    data = [{"name": f"E{i}", "role": "Dev", "salary": 90_000 + i * 1_000} for i in range(50)]
+    inp = tmp_path / "employees.json"
+    inp.write_text(json.dumps(data), encoding="utf-8")
+    full_out = tmp_path / "full.csv"
+    stream_out = tmp_path / "stream.csv"
+
+    save_to_csv(filter_by_salary(load_employees(inp), 100_000), full_out)
+    saved = stream_to_csv(iter_filter_by_salary(iter_employees(inp, chunk_size=64), 100_000), stream_out)
+
+    assert saved == 39
+    assert stream_out.read_bytes() == full_out.read_bytes()
+
+def test_stream_to_csv_empty_warns(tmp_path: Path, capsys: pytest.CaptureFixture):
+    out = tmp_path / "out.csv"
+
+    assert stream_to_csv(iter([]), out) == 0
+
+    assert "[WARN] No employees to save." in capsys.readouterr().out
+    assert not out.exists()
+
+def test_salary_index_matches_scan_and_rebuilds(tmp_path: Path):
+    data = [{"name": f"É{i}", "role": "Dev", "salary": (i * 7_919) % 200_000} for i in range(60)]
+    inp = tmp_path / "employees.json"
+    inp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    with SalaryIndex.open(inp) as index:
+        assert list(index.above(100_000)) == filter_by_salary(data, 100_000)
+        assert list(index.above(50_000, 150_000)) == filter_by_salary(data, 50_000, 150_000)
+        assert list(index.between(0, 7_919)) == [e for e in data if e["salary"] <= 7_919]
+    index_path = inp.with_name(inp.name + ".salidx")
+    assert index_path.exists()
+
+    # Changing the source invalidates the sidecar on the next open.
+    inp.write_text(json.dumps(data[:3]), encoding="utf-8")
+    with SalaryIndex.open(inp) as index:
+        assert len(index) == 3
+
+def test_cli_index_matches_default_output(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    data = [{"name": f"E{i}", "role": "Dev", "salary": 90_000 + (i % 7) * 5_000} for i in range(30)]
+    inp = tmp_path / "employees.ndjson"
+    inp.write_text("\n".join(json.dumps(e) for e in data), encoding="utf-8")
+    outputs = {}
+
+    for flag in ("--stream", "--index", "--index"):
+        out = tmp_path / f"out{len(outputs)}.csv"
+        monkeypatch.setattr(sys, "argv", [
+            "employee_filter_cli",
+            "--input", str(inp),
+            "--output", str(out),
+            "--threshold", "100000",
+            "--max-salary", "115000",
+            flag,
+        ])
+        main()
+        outputs[out] = out.read_bytes()
+
+    assert len(set(outputs.values())) == 1
+
+def test_profiler_aggregates_sampled_calls(tmp_path: Path):
+    PROFILER.reset()
+    PROFILER.configure(sample_rate=0.5, trace_memory=True)
+    PROFILER.trace_calls = False
+    try:
+        employees = [{"name": "A", "salary": 120000}] * 100
+        for _ in range(10):
+            filter_by_salary(employees, 100_000)
+        summary = {row["function"]: row for row in PROFILER.summary()}
+    finally:
+        PROFILER.configure(enabled=False)
+        PROFILER.trace_calls = True
+
+    row = summary["filter_by_salary"]
+    assert row["calls"] == 10
+    assert row["sampled"] == 5
+    assert 0 < row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"] <= row["max_ms"]
+    assert row["peak_mem_kb"] > 0
+
+    PROFILER.dump(tmp_path / "profile.csv")
+    with (tmp_path / "profile.csv").open("r", encoding="utf-8", newline="") as f:
+        assert next(csv.DictReader(f))["function"] == "filter_by_salary"
+    PROFILER.reset()
+
+def test_profiler_keeps_parent_peak_across_nested_calls():
+    @log_execution
+    def child():
+        return bytearray(1024)
+
+    @log_execution
+    def parent():
+        scratch = bytearray(8 * 1024 * 1024)
+        del scratch
+        return child()
+
+    PROFILER.reset()
+    PROFILER.configure(trace_memory=True)
+    PROFILER.trace_calls = False
+    try:
+        parent()
+        summary = {row["function"].rsplit(".", 1)[-1]: row for row in PROFILER.summary()}
+    finally:
+        PROFILER.configure(enabled=False)
+        PROFILER.trace_calls = True
+        PROFILER.reset()
+
+    assert summary["parent"]["peak_mem_kb"] >= 8 * 1024
+    assert summary["child"]["peak_mem_kb"] < 1024
+
+def test_quiet_disables_call_tracing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture):
+    inp = tmp_path / "employees.json"
+    inp.write_text(json.dumps([{"name": "Alice", "salary": 120000}]), encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", [
+        "employee_filter_cli",
+        "--input", str(inp),
+        "--output", str(tmp_path / "out.csv"),
+        "--quiet",
+    ])
+    try:
+        main()
+    finally:
+        PROFILER.trace_calls = True
+
+    out = capsys.readouterr().out
+    assert "[LOG] Starting: load_employees" not in out
+    assert "[INFO] Saved 1 employees" in out
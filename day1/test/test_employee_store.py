@@ -0,0 +1,91 @@
+import csv
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+import os
+main_path = os.path.abspath(os.path.dirname(__file__))
+src_path = str(Path(main_path).parents[0])
+sys.path.insert(0, src_path)  # noqa
+
+from src.main.employee_store import EmployeeStore
+from src.main.employee_filter_cli import (
+    load_employees,
+    filter_by_salary,
+    save_to_csv,
+    main,
+)
+
+RECORDS = [
+    {"name": "Alice", "role": "Dev", "salary": 120000, "location": "Berlin"},
+    {"name": "Bob", "role": "QA", "salary": 80000.5},
+    {"name": "Charlie", "role": "Dev", "salary": 150000, "location": "London", "remote": True},
+    {"name": "Diana", "role": None},
+]
+
+def test_store_round_trips_records():
+    store = EmployeeStore.from_records(RECORDS)
+
+    assert len(store) == 4
+    assert store.to_dicts() == RECORDS
+    assert type(store[0]["salary"]) is int
+    assert store[-1].get("salary", 0) == 0
+    assert store.columns["role"].kind == "object"
+    assert store.columns["location"].kind == "str"
+
+def test_store_masks_match_dict_semantics():
+    store = EmployeeStore.from_records(RECORDS)
+
+    salary_mask = store.compare("salary", ">", 100_000, missing=0)
+    role_mask = store.isin("role", ["Dev"])
+
+    assert salary_mask.tolist() == [True, False, True, False]
+    assert role_mask.tolist() == [True, False, True, False]
+    assert store.compare("location", "==", "Berlin").tolist() == [True, False, False, False]
+
+def test_filter_and_save_accept_store(tmp_path: Path):
+    rows = [{"name": f"E{i}", "role": "Dev", "salary": 90_000 + i * 1_000} for i in range(40)]
+    list_out = tmp_path / "list.csv"
+    store_out = tmp_path / "store.csv"
+
+    save_to_csv(filter_by_salary(rows, 100_000), list_out)
+    filtered = filter_by_salary(EmployeeStore.from_records(rows), 100_000)
+    save_to_csv(filtered, store_out)
+
+    assert isinstance(filtered, EmployeeStore)
+    assert store_out.read_bytes() == list_out.read_bytes()
+
+def test_save_to_csv_empty_store_warns(tmp_path: Path, capsys: pytest.CaptureFixture):
+    out = tmp_path / "out.csv"
+
+    save_to_csv(EmployeeStore.from_records([]), out)
+
+    assert "[WARN] No employees to save." in capsys.readouterr().out
+    assert not out.exists()
+
+def test_cli_columnar(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture):
+    inp = tmp_path / "employees.json"
+    data = [
+        {"name": "Alice", "role": "Dev", "salary": 120000},
+        {"name": "Bob", "role": "QA", "salary": 80000},
+        {"name": "Charlie", "role": "Mgr", "salary": 150000},
+    ]
+    inp.write_text(json.dumps(data), encoding="utf-8")
+    out = tmp_path / "high_salary.csv"
+
+    monkeypatch.setattr(sys, "argv", [
+        "employee_filter_cli",
+        "--input", str(inp),
+        "--output", str(out),
+        "--columnar",
+    ])
+
+    main()
+
+    assert "[INFO] Saved 2 employees" in capsys.readouterr().out
+    assert isinstance(load_employees(inp, columnar=True), EmployeeStore)
+    with out.open("r", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["name"] for r in rows] == ["Alice", "Charlie"]
@@ -0,0 +1,75 @@
+import csv
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+import os
+main_path = os.path.abspath(os.path.dirname(__file__))
+src_path = str(Path(main_path).parents[0])
+sys.path.insert(0, src_path)  # noqa
+
+from src.main.employee_store import EmployeeStore
+from src.main.filter_expr import FilterSyntaxError, compile_filter, parse
+from src.main.employee_filter_cli import main
+
+EMPLOYEES = [
+    {"name": "Alice", "role": "Developer", "salary": 120000, "location": "Berlin"},
+    {"name": "Bob", "role": "QA", "salary": 80000, "location": "London"},
+    {"name": "Charlie", "role": "Manager", "salary": 150000},
+    {"name": "Diana", "role": "QA", "salary": 95000.5, "location": None},
+    {"name": "Eve", "role": "Developer", "salary": "n/a", "location": "Berlin"},
+]
+
+@pytest.mark.parametrize("expr, expected", [
+    ("salary between 90000 and 150000 and role in ('Developer','QA')", ["Alice", "Diana"]),
+    ("salary > 100000 or location = 'London'", ["Alice", "Bob", "Charlie"]),
+    ("not (role = 'QA') and salary >= 120000", ["Alice", "Charlie"]),
+    ("role not in ('QA', 'Manager')", ["Alice", "Eve"]),
+    ("location is null", ["Charlie", "Diana"]),
+    ("location != 'Berlin'", ["Bob"]),
+    ("name = 'O''Brien' or salary < 81000", ["Bob"]),
+])
+def test_compiled_filter_rows_and_masks_agree(expr, expected):
+    predicate = compile_filter(expr)
+    store = EmployeeStore.from_records(EMPLOYEES)
+
+    assert [e["name"] for e in EMPLOYEES if predicate(e)] == expected
+    assert [r["name"] for r in store.filter(predicate.mask(store))] == expected
+
+def test_optimizer_runs_cheap_clauses_first():
+    predicate = compile_filter("salary > 1 and (location = 'X' or salary < 5) and role = 'QA'")
+
+    assert predicate.ast[1][0] == ("cmp", "role", "==", "QA")
+    assert predicate.fields == ["role", "salary", "location"]
+    assert predicate.source.count("get('salary')") == 1
+
+@pytest.mark.parametrize("expr", ["salary >", "role in ()", "salary = null", "salary ~ 3", "(role = 'QA'"])
+def test_invalid_expressions_raise(expr):
+    with pytest.raises(FilterSyntaxError):
+        compile_filter(expr)
+
+def test_parse_between_binds_tighter_than_and():
+    assert parse("salary between 1 and 2 and role = 'QA'") == (
+        "and", [("between", "salary", 1, 2), ("cmp", "role", "==", "QA")]
+    )
+
+@pytest.mark.parametrize("mode", [[], ["--stream"], ["--columnar"]])
+def test_cli_where(mode, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    inp = tmp_path / "employees.json"
+    inp.write_text(json.dumps(EMPLOYEES[:4]), encoding="utf-8")
+    out = tmp_path / "out.csv"
+
+    monkeypatch.setattr(sys, "argv", [
+        "employee_filter_cli",
+        "--input", str(inp),
+        "--output", str(out),
+        "--where", "salary between 90000 and 150000 and role in ('Developer','QA')",
+        *mode,
+    ])
+    main()
+
+    with out.open("r", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["name"] for r in rows] == ["Alice", "Diana"]
@@ -0,0 +1,135 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+import os
+main_path = os.path.abspath(os.path.dirname(__file__))
+src_path = str(Path(main_path).parents[0])
+sys.path.insert(0, src_path)  # noqa
+
+from src.main.employee_filter_cli import filter_by_salary, main, save_to_csv
+from src.main.incremental_filter import default_checkpoint_path, incremental_filter
+
+def above(threshold: int):
+    return lambda emp: emp.get("salary", 0) > threshold
+
+def make_data(n: int):
+    return [{"id": i, "name": f"É{i}", "role": "Dev", "salary": 90_000 + (i % 9) * 5_000}
+            for i in range(n)]
+
+def expected_csv(tmp_path: Path, data, threshold: int) -> bytes:
+    ref = tmp_path / "reference.csv"
+    save_to_csv(filter_by_salary(data, threshold), ref)
+    return ref.read_bytes()
+
+@pytest.mark.parametrize("ndjson", [False, True])
+def test_incremental_matches_full_filter_after_changes(tmp_path: Path, ndjson: bool):
+    inp = tmp_path / "employees.json"
+    out = tmp_path / "out.csv"
+
+    def write(data):
+        text = "\n".join(json.dumps(e, ensure_ascii=False) for e in data) if ndjson \
+            else json.dumps(data, ensure_ascii=False)
+        inp.write_text(text, encoding="utf-8")
+
+    data = make_data(40)
+    write(data)
+    stats = incremental_filter(inp, out, above(100_000), {"threshold": 100_000})
+    assert stats["rebuilt"] == 1 and stats["inserted"] == 40
+    assert out.read_bytes() == expected_csv(tmp_path, data, 100_000)
+
+    data[3]["salary"] = 150_000  # filtered out -> in
+    data[5]["salary"] = 10  # in -> filtered out
+    data[7]["role"] = "QA, Sr"  # stays in, row changes
+    del data[10]
+    data.append({"id": 99, "name": "New", "role": "Dev", "salary": 200_000})
+    write(data)
+    stats = incremental_filter(inp, out, above(100_000), {"threshold": 100_000})
+
+    assert stats == {"saved": len(filter_by_salary(data, 100_000)), "inserted": 1,
+                     "updated": 3, "deleted": 1, "unchanged": 36, "rebuilt": 0}
+    assert out.read_bytes() == expected_csv(tmp_path, data, 100_000)
+
+def test_incremental_rebuilds_when_params_or_output_change(tmp_path: Path):
+    inp = tmp_path / "employees.json"
+    out = tmp_path / "out.csv"
+    data = make_data(20)
+    inp.write_text(json.dumps(data), encoding="utf-8")
+
+    incremental_filter(inp, out, above(100_000), {"threshold": 100_000})
+    assert incremental_filter(inp, out, above(100_000), {"threshold": 100_000})["rebuilt"] == 0
+
+    stats = incremental_filter(inp, out, above(110_000), {"threshold": 110_000})
+    assert stats["rebuilt"] == 1
+    assert out.read_bytes() == expected_csv(tmp_path, data, 110_000)
+
+    out.write_text("tampered\n", encoding="utf-8")
+    stats = incremental_filter(inp, out, above(110_000), {"threshold": 110_000})
+    assert stats["rebuilt"] == 1
+    assert out.read_bytes() == expected_csv(tmp_path, data, 110_000)
+
+def test_incremental_rebuilds_when_first_match_columns_change(tmp_path: Path):
+    inp = tmp_path / "employees.json"
+    out = tmp_path / "out.csv"
+    data = make_data(20)
+    inp.write_text(json.dumps(data), encoding="utf-8")
+    incremental_filter(inp, out, above(100_000), {"threshold": 100_000})
+
+    first = next(i for i, e in enumerate(data) if e["salary"] > 100_000)
+    data[first] = {"id": data[first]["id"], "salary": data[first]["salary"], "name": "X", "role": "Dev"}
+    inp.write_text(json.dumps(data), encoding="utf-8")
+    stats = incremental_filter(inp, out, above(100_000), {"threshold": 100_000})
+
+    assert stats["rebuilt"] == 1
+    assert out.read_bytes() == expected_csv(tmp_path, data, 100_000)
+
+def test_incremental_handles_repeated_and_id_less_records(tmp_path: Path):
+    inp = tmp_path / "employees.ndjson"
+    out = tmp_path / "out.csv"
+    data = [{"salary": 150_000}, {"salary": 150_000}, {"salary": 10}, {"salary": 150_000}]
+    inp.write_text("\n".join(json.dumps(e) for e in data), encoding="utf-8")
+
+    for _ in range(2):
+        stats = incremental_filter(inp, out, above(100_000), {"threshold": 100_000})
+        assert stats["saved"] == 3
+        assert out.read_bytes() == expected_csv(tmp_path, data, 100_000)
+    assert stats["unchanged"] == 4
+
+def test_cli_incremental_with_where(tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                                    capsys: pytest.CaptureFixture):
+    inp = tmp_path / "employees.ndjson"
+    out = tmp_path / "out.csv"
+    data = make_data(30)
+    inp.write_text("\n".join(json.dumps(e) for e in data), encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", [
+        "employee_filter_cli", "-q",
+        "--input", str(inp),
+        "--output", str(out),
+        "--where", "salary > 100000",
+        "--incremental",
+    ])
+
+    main()
+    main()
+
+    captured = capsys.readouterr().out
+    assert "[INFO] full rebuild: 30 inserted" in captured
+    assert "[INFO] incremental: 0 inserted, 0 updated, 0 deleted, 30 unchanged" in captured
+    assert default_checkpoint_path(out).exists()
+    assert out.read_bytes() == expected_csv(tmp_path, data, 100_000)
+
+def test_cli_incremental_reports_bad_data_as_errors_not_usage(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    inp = tmp_path / "employees.ndjson"
+    inp.write_text('{"id": 1, "salary": 120000}\n{"id": 2, "salary": \n', encoding="utf-8")
+    argv = ["employee_filter_cli", "-q", "--input", str(inp), "--incremental", "--output"]
+
+    monkeypatch.setattr(sys, "argv", argv + [str(tmp_path / "out.csv.gz")])
+    with pytest.raises(SystemExit) as exc:
+        main()
+    assert exc.value.code == 2  # a usage error: incremental output must be uncompressed
+
+    monkeypatch.setattr(sys, "argv", argv + [str(tmp_path / "out.csv")])
+    with pytest.raises(json.JSONDecodeError):
+        main()
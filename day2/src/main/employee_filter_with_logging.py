@@ -6,11 +6,17 @@ Author: Sundarapandiyan — Week 1 Transition Plan
 
 import json
 import csv
+import io
+import math
+import re
 import time
 import argparse
+import atexit
 import logging
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Callable
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 from functools import wraps
 
 # --- Logging Config ---
@@ -21,16 +27,175 @@ logging.basicConfig(
 )
 logger = logging.getLogger("employee_filter")
 
+# --- Streaming Config ---
+STREAM_CHUNK_SIZE = 64 * 1024  # characters read per refill of the parse buffer
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# --- Parallel Config ---
+NDJSON_SPLIT_SIZE = 32 * 1024 * 1024  # target bytes per worker task
+
+# --- Profiling ---
+HISTOGRAM_GROWTH = 1.05  # latency bucket width: percentiles are within ~2.5%
+_LOG_GROWTH = math.log(HISTOGRAM_GROWTH)
+
+class FunctionStats:
+    """Call count, log-bucketed latency histogram and peak memory for one function."""
+
+    __slots__ = ("name", "calls", "sampled", "total_ns", "max_ns", "buckets", "peak_bytes")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.sampled = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets: Dict[int, int] = {}
+        self.peak_bytes = 0
+
+    def add(self, elapsed_ns: int) -> None:
+        self.sampled += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+        bucket = int(math.log(max(elapsed_ns, 1)) / _LOG_GROWTH)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile latency in ms (bucket midpoint)."""
+        if not self.sampled:
+            return 0.0
+        rank, seen = q / 100 * self.sampled, 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(HISTOGRAM_GROWTH ** (bucket + 0.5), self.max_ns) / 1e6
+        return self.max_ns / 1e6
+
+    def summary(self) -> Dict[str, Any]:
+        mean_ms = self.total_ns / self.sampled / 1e6 if self.sampled else 0.0
+        return {
+            "function": self.name,
+            "calls": self.calls,
+            "sampled": self.sampled,
+            "est_total_ms": round(mean_ms * self.calls, 3),
+            "mean_ms": round(mean_ms, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_ns / 1e6, 3),
+            "peak_mem_kb": round(self.peak_bytes / 1024, 1) if self.peak_bytes else None,
+        }
+
+class ExecutionProfiler:
+    """Aggregated instrumentation behind @log_execution.
+
+    Disabled by default, in which case the decorator adds a single flag check
+    per call. When enabled it counts every call, times one in `sample_every`
+    calls into a latency histogram, optionally tracks tracemalloc peaks, and
+    can dump a JSON/CSV summary at interpreter exit.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_every = 1
+        self.trace_memory = False
+        self.output: Optional[Path] = None
+        self.stats: Dict[str, FunctionStats] = {}
+        self._memory_stack: List[int] = []
+        self._exit_hook = False
+
+    def configure(self, enabled: bool = True, sample_rate: float = 1.0,
+                  trace_memory: bool = False, output: Optional[Path] = None) -> None:
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        self.enabled = enabled
+        self.sample_every = max(1, round(1 / sample_rate))
+        self.trace_memory = enabled and trace_memory
+        self.output = output
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if enabled and not self._exit_hook:
+            atexit.register(self.report)
+            self._exit_hook = True
+
+    def reset(self) -> None:
+        self.stats.clear()
+
+    def call(self, name: str, func: Callable, args: tuple, kwargs: dict) -> Any:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = FunctionStats(name)
+        stats.calls += 1
+        if stats.calls % self.sample_every:
+            return func(*args, **kwargs)
+        if not self.trace_memory:
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.add(time.perf_counter_ns() - start)
+        # reset_peak() is process-wide: bank the enclosing call's peak so far
+        # before resetting, and hand this call's peak up the stack when done.
+        if self._memory_stack:
+            self._memory_stack[-1] = max(self._memory_stack[-1], tracemalloc.get_traced_memory()[1])
+        self._memory_stack.append(0)
+        tracemalloc.reset_peak()
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.add(time.perf_counter_ns() - start)
+            peak = max(tracemalloc.get_traced_memory()[1], self._memory_stack.pop())
+            stats.peak_bytes = max(stats.peak_bytes, peak)
+            if self._memory_stack:
+                self._memory_stack[-1] = max(self._memory_stack[-1], peak)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        return [s.summary() for s in self.stats.values()]
+
+    def dump(self, path: Path) -> None:
+        """Write the summary as CSV if the path ends in .csv, else as JSON."""
+        rows = self.summary()
+        if path.suffix.lower() == ".csv":
+            with path.open("w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=list(FunctionStats("").summary()))
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            path.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+    def report(self) -> None:
+        if not self.enabled or not self.stats:
+            return
+        for row in self.summary():
+            logger.info(
+                "Profile %s: calls=%d p50=%.3fms p95=%.3fms p99=%.3fms max=%.3fms peak_mem_kb=%s",
+                row["function"], row["calls"], row["p50_ms"], row["p95_ms"],
+                row["p99_ms"], row["max_ms"], row["peak_mem_kb"],
+            )
+        if self.output is not None:
+            self.dump(self.output)
+            logger.info("Profile summary written to %s", self.output)
+
+PROFILER = ExecutionProfiler()
+
 # --- Decorator ---
 def log_execution(func: Callable) -> Callable:
-    """Decorator to log function start, end, and execution time."""
+    """Decorator to trace function start/end at DEBUG and feed PROFILER when enabled."""
+    name = func.__qualname__
+
     @wraps(func)
     def wrapper(*args, **kwargs):
+        if not logger.isEnabledFor(logging.DEBUG):
+            if PROFILER.enabled:
+                return PROFILER.call(name, func, args, kwargs)
+            return func(*args, **kwargs)
         start_time = time.perf_counter()
-        logger.debug(f"Starting: {func.__name__}")
-        result = func(*args, **kwargs)
-        elapsed = (time.perf_counter() - start_time) * 1000
-        logger.debug(f"Finished: {func.__name__} in {elapsed:.2f} ms")
+        logger.debug("Starting: %s", name)
+        if PROFILER.enabled:
+            result = PROFILER.call(name, func, args, kwargs)
+        else:
+            result = func(*args, **kwargs)
+        logger.debug("Finished: %s in %.2f ms", name, (time.perf_counter() - start_time) * 1000)
         return result
     return wrapper
 
@@ -57,6 +222,189 @@ def save_to_csv(employees: List[Dict], file_path: Path) -> None:
         writer.writeheader()
         writer.writerows(employees)
 
+# --- Streaming Functions (constant memory) ---
+def _iter_json_array(f: TextIO, buf: str, pos: int, chunk_size: int) -> Iterator[Any]:
+    """Yield the items of a JSON array whose opening '[' sits at buf[pos]."""
+    decoder = json.JSONDecoder()
+    pos += 1
+    expect_item = True
+    first = True
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        if pos == len(buf):
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise json.JSONDecodeError("Unterminated array", buf, pos)
+            buf, pos = chunk, 0
+            continue
+        if expect_item:
+            if first and buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                end = None
+            # An item that ends exactly at the buffer edge may continue in the
+            # next chunk (e.g. a bare number), so only trust it at EOF.
+            if end is None or end == len(buf):
+                chunk = f.read(chunk_size)
+                if chunk:
+                    buf, pos = buf[pos:] + chunk, 0
+                    continue
+                if end is None:
+                    decoder.raw_decode(buf, pos)  # re-raise with the real error
+            yield item
+            pos, expect_item, first = end, False, False
+        elif buf[pos] == ",":
+            pos, expect_item = pos + 1, True
+        elif buf[pos] == "]":
+            rest = buf[pos + 1:] + f.read()
+            if rest.strip():
+                raise json.JSONDecodeError("Extra data", rest, len(rest) - len(rest.lstrip()))
+            return
+        else:
+            raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+
+def iter_employees(file_path: Path, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Dict]:
+    """Yield employee records one at a time from a JSON array or NDJSON file."""
+    with file_path.open("r", encoding="utf-8") as f:
+        buf = f.read(chunk_size)
+        pos = _WHITESPACE.match(buf).end()
+        while pos == len(buf):
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            buf, pos = chunk, _WHITESPACE.match(chunk).end()
+        if buf[pos] == "[":
+            yield from _iter_json_array(f, buf, pos, chunk_size)
+            return
+        # NDJSON: one record per line, blank lines ignored.
+        f.seek(0)
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_filter_by_salary(employees: Iterable[Dict], threshold: int) -> Iterator[Dict]:
+    """Lazily yield employees with salary above the threshold."""
+    return (emp for emp in employees if emp.get("salary", 0) > threshold)
+
+@log_execution
+def stream_to_csv(employees: Iterable[Dict], file_path: Path) -> int:
+    """Write employee records to CSV as they arrive and return the row count."""
+    rows = iter(employees)
+    first = next(rows, None)
+    if first is None:
+        logger.warning("No employees to save.")
+        return 0
+    with file_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=first.keys())
+        writer.writeheader()
+        writer.writerow(first)
+        count = 1
+        for emp in rows:
+            writer.writerow(emp)
+            count += 1
+    return count
+
+# --- Parallel NDJSON Functions ---
+def is_ndjson(file_path: Path) -> bool:
+    """True unless the file's first non-blank character opens a JSON array."""
+    with file_path.open("rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            stripped = chunk.lstrip()
+            if stripped:
+                return not stripped.startswith(b"[")
+    return True
+
+def split_ndjson(file_path: Path, parts: int) -> List[Tuple[int, int]]:
+    """Split a file into about `parts` byte ranges that end on line boundaries."""
+    size = file_path.stat().st_size
+    bounds = [0]
+    with file_path.open("rb") as f:
+        for i in range(1, parts):
+            target = max(size * i // parts, bounds[-1])
+            f.seek(target)
+            if target > 0:
+                f.readline()  # finish the line that straddles the cut
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+def _filter_ndjson_range(file_path: str, start: int, end: int, threshold: int,
+                         fieldnames: Optional[List[str]] = None) -> Tuple[int, Optional[List[str]], Optional[str]]:
+    """Worker: parse, filter and CSV-encode the lines in [start, end).
+
+    Rows are encoded with fieldnames, or with the keys of the range's first
+    match when None. Returns (count, columns used, text); text is None when
+    a later row has a key outside those columns, so the caller can re-encode
+    the range with the real header.
+    """
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    out = io.StringIO(newline="")
+    header_given = fieldnames is not None
+    writer = None
+    count = 0
+    for line in data.splitlines():
+        if line.strip():
+            emp = json.loads(line)
+            if emp.get("salary", 0) > threshold:
+                if writer is None:
+                    fieldnames = fieldnames if fieldnames is not None else list(emp.keys())
+                    writer = csv.DictWriter(out, fieldnames=fieldnames)
+                try:
+                    writer.writerow(emp)
+                except ValueError:  # a key outside the columns
+                    if header_given:
+                        raise
+                    return count, fieldnames, None
+                count += 1
+    return count, fieldnames, out.getvalue()
+
+@log_execution
+def parallel_filter_ndjson(file_path: Path, output_path: Path, threshold: int,
+                           workers: int, split_size: int = NDJSON_SPLIT_SIZE) -> int:
+    """Filter an NDJSON file across a process pool and write CSV in input order.
+
+    Output is byte-identical to the streaming path: the header is the keys
+    of the first range's first match, and any later range that picked
+    different columns is encoded again with that header.
+    """
+    size = file_path.stat().st_size
+    ranges = split_ndjson(file_path, max(workers, math.ceil(size / split_size)))
+    logger.debug("Processing %d ranges of %s with %d workers", len(ranges), file_path, workers)
+    saved = 0
+    fieldnames = None
+    out = None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(
+                _filter_ndjson_range,
+                [str(file_path)] * len(ranges),
+                [a for a, _ in ranges],
+                [b for _, b in ranges],
+                [threshold] * len(ranges),
+            )
+            for (start, end), (count, columns, text) in zip(ranges, results):
+                if not count:
+                    continue
+                if fieldnames is None:
+                    fieldnames = columns
+                    out = output_path.open("w", newline="", encoding="utf-8")
+                    csv.DictWriter(out, fieldnames=fieldnames).writeheader()
+                if text is None or columns != fieldnames:
+                    count, _, text = pool.submit(_filter_ndjson_range, str(file_path), start, end,
+                                                 threshold, fieldnames).result()
+                out.write(text)
+                saved += count
+    finally:
+        if out is not None:
+            out.close()
+    if fieldnames is None:
+        logger.warning("No employees to save.")
+    return saved
+
 # --- CLI Entry Point ---
 @log_execution
 def main():
@@ -75,13 +423,49 @@ def main():
         "-t", "--threshold", type=int, default=100_000,
         help="Salary threshold (default: 100000)."
     )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Stream records (JSON array or NDJSON) with constant memory."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Process NDJSON input in parallel with N worker processes (default: 1)."
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Aggregate per-function call counts and latency percentiles; summary logged at exit."
+    )
+    parser.add_argument(
+        "--profile-sample-rate", type=float, default=1.0,
+        help="Fraction of calls to time when profiling (default: 1.0)."
+    )
+    parser.add_argument(
+        "--profile-memory", action="store_true",
+        help="Also record tracemalloc peak memory per function (slower)."
+    )
+    parser.add_argument(
+        "--profile-output", type=Path, default=None,
+        help="Write the profile summary to this .json or .csv file at exit."
+    )
 
     args = parser.parse_args()
+    if args.profile or args.profile_output:
+        PROFILER.configure(sample_rate=args.profile_sample_rate,
+                           trace_memory=args.profile_memory, output=args.profile_output)
 
-    employees = load_employees(args.input)
-    high_salary_emps = filter_by_salary(employees, args.threshold)
-    save_to_csv(high_salary_emps, args.output)
-    logger.info(f"Saved {len(high_salary_emps)} employees to {args.output}")
+    if args.workers > 1 and is_ndjson(args.input):
+        saved = parallel_filter_ndjson(args.input, args.output, args.threshold, args.workers)
+    elif args.stream or args.workers > 1:
+        if args.workers > 1:
+            logger.warning("--workers needs NDJSON input; streaming the JSON array instead.")
+        employees = iter_employees(args.input)
+        saved = stream_to_csv(iter_filter_by_salary(employees, args.threshold), args.output)
+    else:
+        employees = load_employees(args.input)
+        high_salary_emps = filter_by_salary(employees, args.threshold)
+        save_to_csv(high_salary_emps, args.output)
+        saved = len(high_salary_emps)
+    logger.info(f"Saved {saved} employees to {args.output}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
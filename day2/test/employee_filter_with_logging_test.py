@@ -14,6 +14,13 @@ from src.main.employee_filter_with_logging import (
     filter_by_salary,
     save_to_csv,
     main,
+    iter_employees,
+    iter_filter_by_salary,
+    stream_to_csv,
+    split_ndjson,
+    parallel_filter_ndjson,
+    log_execution,
+    PROFILER,
 )
 
 def test_save_to_csv_empty_list_logs_warning(tmp_path: Path, caplog: pytest.LogCaptureFixture):
@@ -47,4 +54,148 @@ def test_cli_end_to_end_logs_info(tmp_path: Path, monkeypatch: pytest.MonkeyPatc
     assert out.exists()
     with out.open("r", encoding="utf-8", newline="") as f:
         rows = list(csv.DictReader(f))
-    assert [r["name"] for r in rows] == ["Alice", "Charlie"]
\ No newline at end of file
+    assert [r["name"] for r in rows] == ["Alice", "Charlie"]
+
+def test_cli_stream_ndjson(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture):
+    inp = tmp_path / "employees.ndjson"
+    inp.write_text(
+        "\n".join(json.dumps(e) for e in [
+            {"name": "Alice", "role": "Dev", "salary": 120000},
+            {"name": "Bob", "role": "QA", "salary": 80000},
+            {"name": "Charlie", "role": "Mgr", "salary": 150000},
+        ]),
+        encoding="utf-8",
+    )
+    out = tmp_path / "high_salary.csv"
+
+    monkeypatch.setattr(sys, "argv", [
+        "employee_filter_logging",
+        "--input", str(inp),
+        "--output", str(out),
+        "--stream",
+    ])
+
+    caplog.set_level("INFO")
+    main()
+
+    assert "Saved 2 employees" in caplog.text
+    with out.open("r", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["name"] for r in rows] == ["Alice", "Charlie"]
+
+
+def test_split_ndjson_ranges_end_on_line_boundaries(tmp_path: Path):
+    inp = tmp_path / "employees.ndjson"
+    inp.write_text("".join(json.dumps({"name": f"E{i}", "salary": i}) + "\n" for i in range(100)),
+                   encoding="utf-8")
+    data = inp.read_bytes()
+
+    ranges = split_ndjson(inp, 7)
+
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(a_end == b_start for (_, a_end), (b_start, _) in zip(ranges, ranges[1:]))
+    assert all(data[end - 1:end] == b"\n" for _, end in ranges)
+
+def test_parallel_matches_stream_output(tmp_path: Path):
+    inp = tmp_path / "employees.ndjson"
+    inp.write_text(
+        "".join(json.dumps({"name": f"E{i}", "role": "Dev", "salary": 90_000 + (i * 37) % 30_000}) + "\n"
+                for i in range(500)),
+        encoding="utf-8",
+    )
+    stream_out = tmp_path / "stream.csv"
+    parallel_out = tmp_path / "parallel.csv"
+
+    expected = stream_to_csv(iter_filter_by_salary(iter_employees(inp), 100_000), stream_out)
+    saved = parallel_filter_ndjson(inp, parallel_out, 100_000, workers=2, split_size=1_000)
+
+    assert saved == expected
+    assert parallel_out.read_bytes() == stream_out.read_bytes()
+
+def test_parallel_reencodes_ranges_with_other_columns(tmp_path: Path):
+    inp = tmp_path / "employees.ndjson"
+    lines = [{"name": f"E{i}", "role": "Dev", "salary": 90_000 + (i * 37) % 30_000} for i in range(200)]
+    lines += [{"salary": 120_000 + i, "role": "QA", "name": f"Q{i}"} for i in range(200)]  # same keys, new order
+    inp.write_text("".join(json.dumps(e) + "\n" for e in lines), encoding="utf-8")
+    stream_out = tmp_path / "stream.csv"
+    parallel_out = tmp_path / "parallel.csv"
+
+    expected = stream_to_csv(iter_filter_by_salary(iter_employees(inp), 100_000), stream_out)
+    saved = parallel_filter_ndjson(inp, parallel_out, 100_000, workers=2, split_size=1_000)
+
+    assert saved == expected
+    assert parallel_out.read_bytes() == stream_out.read_bytes()
+
+def test_parallel_without_matches_writes_nothing(tmp_path: Path, caplog: pytest.LogCaptureFixture):
+    inp = tmp_path / "employees.ndjson"
+    inp.write_text("".join(json.dumps({"name": f"E{i}", "salary": i}) + "\n" for i in range(100)),
+                   encoding="utf-8")
+    out = tmp_path / "out.csv"
+    caplog.set_level("WARNING")
+
+    assert parallel_filter_ndjson(inp, out, 100_000, workers=2, split_size=200) == 0
+    assert "No employees to save." in caplog.text
+    assert not out.exists()
+
+def test_cli_workers_falls_back_for_json_array(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture):
+    inp = tmp_path / "employees.json"
+    inp.write_text(json.dumps([{"name": "Alice", "salary": 120000}]), encoding="utf-8")
+    out = tmp_path / "out.csv"
+
+    monkeypatch.setattr(sys, "argv", [
+        "employee_filter_logging",
+        "--input", str(inp),
+        "--output", str(out),
+        "--workers", "2",
+    ])
+    caplog.set_level("INFO")
+    main()
+
+    assert "--workers needs NDJSON input" in caplog.text
+    assert "Saved 1 employees" in caplog.text
+
+
+def test_cli_profile_output_json(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    inp = tmp_path / "employees.json"
+    inp.write_text(json.dumps([{"name": "Alice", "salary": 120000}]), encoding="utf-8")
+    profile = tmp_path / "profile.json"
+    monkeypatch.setattr(sys, "argv", [
+        "employee_filter_logging",
+        "--input", str(inp),
+        "--output", str(tmp_path / "out.csv"),
+        "--profile-output", str(profile),
+    ])
+    PROFILER.reset()
+    try:
+        main()
+        PROFILER.report()
+    finally:
+        PROFILER.configure(enabled=False)
+        PROFILER.reset()
+
+    rows = {row["function"]: row for row in json.loads(profile.read_text(encoding="utf-8"))}
+    assert set(rows) == {"load_employees", "filter_by_salary", "save_to_csv"}
+    assert rows["save_to_csv"]["calls"] == 1
+
+def test_profiler_keeps_parent_peak_across_nested_calls():
+    @log_execution
+    def child():
+        return bytearray(1024)
+
+    @log_execution
+    def parent():
+        scratch = bytearray(8 * 1024 * 1024)
+        del scratch
+        return child()
+
+    PROFILER.reset()
+    PROFILER.configure(trace_memory=True)
+    try:
+        parent()
+        summary = {row["function"].rsplit(".", 1)[-1]: row for row in PROFILER.summary()}
+    finally:
+        PROFILER.configure(enabled=False)
+        PROFILER.reset()
+
+    assert summary["parent"]["peak_mem_kb"] >= 8 * 1024
+    assert summary["child"]["peak_mem_kb"] < 1024
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Day 3: Content-addressed columnar cache for ETL inputs
+The first run converts a CSV to an uncompressed Arrow IPC file named by the
+hash of the CSV's bytes; later runs (any engine, any path holding the same
+bytes) memory-map that file instead of parsing text again. The cache
+directory is kept under a size budget by evicting least recently used files;
+an input whose entry alone would exceed the budget is never cached. Sources
+may also be CSV bytes already in memory (uploads). The cache is opt-in:
+callers enable it explicitly, or by setting $ETL_CACHE_DIR. etl_ai_cli and
+etl_ai_service import this module rather than keeping their own copies.
+pandas, Polars and PyArrow are imported on first use, not at import time.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import polars as pl
+
+logger = logging.getLogger("columnar_cache")
+
+CACHE_BY_DEFAULT = "ETL_CACHE_DIR" in os.environ  # otherwise only an explicit --cache turns it on
+DEFAULT_CACHE_DIR = Path(os.environ.get("ETL_CACHE_DIR", Path.home() / ".cache" / "pyworks_etl"))
+DEFAULT_CACHE_BYTES = 2 * 1024 ** 3
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+CACHE_SUFFIX = ".arrow"
+MAX_REMEMBERED_HASHES = 1024
+CsvSource = Union[Path, bytes]  # a CSV file, or CSV content already in memory (an upload)
+
+def csv_reader_input(source: CsvSource):
+    """What pd.read_csv accepts for source; Polars takes bytes directly."""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+def source_size(source: CsvSource) -> int:
+    return len(source) if isinstance(source, bytes) else source.stat().st_size
+
+def describe(source: CsvSource) -> str:
+    return f"upload ({len(source)} bytes)" if isinstance(source, bytes) else str(source)
+
+class ColumnarCache:
+    """CSV -> Arrow IPC cache keyed by content hash, with LRU size-bounded eviction."""
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._hashes_path = self.cache_dir / "hashes.json"
+
+    # --- Keys ---
+    def key(self, csv_path: CsvSource) -> str:
+        """Content hash of csv_path; remembered per (path, size, mtime) to skip rehashing."""
+        if isinstance(csv_path, bytes):
+            return hashlib.blake2b(csv_path, digest_size=16).hexdigest()
+        stat = csv_path.stat()
+        stamp = f"{csv_path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+        hashes = self._load_hashes()
+        if stamp in hashes:
+            return hashes[stamp]
+        digest = hashlib.blake2b(digest_size=16)
+        with csv_path.open("rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        key = hashes[stamp] = digest.hexdigest()
+        self._save_hashes(dict(list(hashes.items())[-MAX_REMEMBERED_HASHES:]))
+        return key
+
+    def _load_hashes(self) -> dict:
+        try:
+            return json.loads(self._hashes_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_hashes(self, hashes: dict) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._hashes_path.with_name(f"hashes.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(hashes), encoding="utf-8")
+        os.replace(tmp_path, self._hashes_path)
+
+    # --- Entries ---
+    def columnar_path(self, csv_path: CsvSource) -> Optional[Path]:
+        """Arrow IPC file holding csv_path's data, converting it on a miss.
+
+        Returns None (callers then parse the CSV) if the conversion fails or
+        the entry would not fit in max_bytes on its own.
+        """
+        if source_size(csv_path) > self.max_bytes:  # Arrow IPC is rarely smaller than the CSV text
+            logger.debug(f"Columnar cache skips {describe(csv_path)}: larger than {self.max_bytes} bytes")
+            return None
+        path = self.cache_dir / f"{self.key(csv_path)}{CACHE_SUFFIX}"
+        if path.exists():
+            logger.debug(f"Columnar cache hit for {describe(csv_path)}: {path.name}")
+            os.utime(path)  # mtime doubles as the LRU timestamp
+            return path
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        import polars as pl
+        try:
+            if isinstance(csv_path, bytes):
+                pl.read_csv(csv_path, infer_schema_length=10_000).write_ipc(tmp_path)
+            else:
+                # Streaming sink: the CSV never has to fit in memory at once.
+                pl.scan_csv(csv_path, infer_schema_length=10_000).sink_ipc(tmp_path)
+        except (pl.exceptions.PolarsError, OSError) as exc:
+            tmp_path.unlink(missing_ok=True)
+            logger.warning(f"Columnar cache disabled for {describe(csv_path)}: {exc}")
+            return None
+        if tmp_path.stat().st_size > self.max_bytes:
+            tmp_path.unlink(missing_ok=True)
+            logger.debug(f"Columnar cache skips {describe(csv_path)}: entry larger than {self.max_bytes} bytes")
+            return None
+        os.replace(tmp_path, path)
+        logger.debug(f"Columnar cache miss for {describe(csv_path)}: wrote {path.name}")
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: Optional[Path] = None) -> List[Path]:
+        """Drop least recently used entries (never keep, which fits alone) until the cache fits max_bytes."""
+        entries = sorted(self.cache_dir.glob(f"*{CACHE_SUFFIX}"), key=lambda p: p.stat().st_mtime_ns)
+        total = sum(p.stat().st_size for p in entries)
+        evicted = []
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            evicted.append(path)
+        if evicted:
+            logger.info(f"Columnar cache evicted {len(evicted)} file(s) to stay under {self.max_bytes} bytes")
+        return evicted
+
+    # --- Readers ---
+    def read_pandas(self, csv_path: CsvSource, columns: Optional[List[str]] = None,
+                    dtype: Optional[dict] = None) -> "pd.DataFrame":
+        """csv_path as pandas; dtype (as for pd.read_csv) applies on both the cached and the CSV path."""
+        import pandas as pd
+        import pyarrow as pa
+        path = self.columnar_path(csv_path)
+        if path is None:
+            return pd.read_csv(csv_reader_input(csv_path), usecols=columns, dtype=dtype)
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        df = (table.select(columns) if columns else table).to_pandas()
+        return df.astype(dtype) if dtype else df
+
+    def iter_pandas(self, csv_path: CsvSource, chunk_rows: int,
+                    columns: Optional[List[str]] = None) -> Iterator["pd.DataFrame"]:
+        import pandas as pd
+        import pyarrow as pa
+        path = self.columnar_path(csv_path)
+        if path is None:
+            with pd.read_csv(csv_reader_input(csv_path), usecols=columns, chunksize=chunk_rows) as reader:
+                yield from reader
+            return
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()  # zero-copy over the mapping
+            if columns:
+                table = table.select(columns)
+            for batch in table.to_batches(max_chunksize=chunk_rows):
+                yield batch.to_pandas()
+
+    def read_polars(self, csv_path: CsvSource, columns: Optional[List[str]] = None,
+                    schema_overrides: Optional[dict] = None) -> "pl.DataFrame":
+        """csv_path as Polars; schema_overrides applies on both the cached and the CSV path."""
+        import polars as pl
+        path = self.columnar_path(csv_path)
+        if path is None:
+            return pl.read_csv(csv_path, columns=columns, schema_overrides=schema_overrides)
+        df = pl.read_ipc(path, columns=columns)
+        return df.cast(schema_overrides) if schema_overrides else df
+
+    def scan_polars(self, csv_path: Path) -> "pl.LazyFrame":
+        import polars as pl
+        path = self.columnar_path(csv_path)
+        return pl.scan_csv(csv_path) if path is None else pl.scan_ipc(path)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Day 3: `--engine auto` for etl_cli
+Picks an engine and mode from the input size, the cores and memory available,
+and a calibration profile measured once per host: for each engine, its import
+cost, fixed per-run cost, seconds per MB and peak memory per MB, fitted from
+two generated datasets run in fresh spawned processes. The profile is cached
+as JSON and re-measured when the host signature (cores, Python, library
+versions) changes. Inputs too big for memory go to an out-of-core mode.
+"""
+
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from importlib.metadata import PackageNotFoundError, version
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+if __package__:
+    from . import etl_bench
+    from .columnar_cache import DEFAULT_CACHE_DIR
+else:
+    import etl_bench
+    from columnar_cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger("engine_auto")
+
+PROFILE_VERSION = 1
+DEFAULT_PROFILE_PATH = Path(os.environ.get("ETL_ENGINE_PROFILE", DEFAULT_CACHE_DIR / "engine_profile.json"))
+CALIBRATION_ROWS = (20_000, 400_000)
+CANDIDATES = ["pandas", "polars", "polars-lazy", "numpy", "duckdb"]
+ENGINE_IMPORTS = {"pandas": "pandas", "polars": "polars", "polars-lazy": "polars", "duckdb": "duckdb"}
+OUT_OF_CORE = ["polars-lazy", "duckdb", "pandas-chunked"]  # preference order when RAM is short
+MEMORY_HEADROOM = 0.5  # in-memory engines may use at most this share of available RAM
+
+@dataclass
+class Decision:
+    engine: str
+    streaming: bool = False
+    workers: Optional[int] = None
+    reason: str = ""
+    estimates: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def mode(self) -> str:
+        if self.streaming:
+            return "streaming"
+        return "chunked" if self.engine == "pandas-chunked" else "in-memory"
+
+# --- Host ---
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        return os.cpu_count() or 1
+
+def available_memory_mb() -> Optional[float]:
+    """MemAvailable from /proc/meminfo, else free physical pages; None if unknown."""
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def host_signature() -> Dict:
+    versions = {}
+    for lib in ("numpy", "pandas", "polars", "duckdb"):
+        try:
+            versions[lib] = version(lib)
+        except PackageNotFoundError:
+            versions[lib] = None
+    return {"cpu_count": available_cores(), "python": platform.python_version(),
+            "machine": platform.machine(), "versions": versions}
+
+# --- Calibration ---
+def _calibrate_engine(engine: str, small_csv: Path, large_csv: Path, threshold: int) -> Dict:
+    """Runs in a fresh spawned process so import cost and peak memory are this engine's alone."""
+    logging.getLogger().setLevel(logging.WARNING)
+    start = time.perf_counter()
+    if engine in ENGINE_IMPORTS:
+        importlib.import_module(ENGINE_IMPORTS[engine])
+    import_s = time.perf_counter() - start
+    base_rss = etl_bench._peak_rss_mb()
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        output_csv = Path(tmp) / "out.csv"
+        etl_bench._run_engine(engine, small_csv, output_csv, threshold, etl_bench.etl_cli.DEFAULT_CHUNK_ROWS)
+        for name, path in (("small", small_csv), ("large", large_csv)):
+            runs = []
+            for _ in range(2):
+                start = time.perf_counter()
+                etl_bench._run_engine(engine, path, output_csv, threshold, etl_bench.etl_cli.DEFAULT_CHUNK_ROWS)
+                runs.append(time.perf_counter() - start)
+            timings[name] = min(runs)
+    peak_rss = etl_bench._peak_rss_mb()
+    small_mb, large_mb = small_csv.stat().st_size / 1024 ** 2, large_csv.stat().st_size / 1024 ** 2
+    s_per_mb = max(0.0, (timings["large"] - timings["small"]) / (large_mb - small_mb))
+    return {
+        "import_s": import_s,
+        "fixed_s": max(0.0, timings["small"] - s_per_mb * small_mb),
+        "s_per_mb": s_per_mb,
+        "mem_per_mb": max(0.0, (peak_rss or 0) - (base_rss or 0)) / large_mb,
+    }
+
+def calibrate(engines: Sequence[str] = CANDIDATES, rows: Sequence[int] = CALIBRATION_ROWS,
+              data_dir: Path = etl_bench.DEFAULT_DATA_DIR, threshold: int = 100_000) -> Dict:
+    """Measure every importable engine on two generated sizes; returns a profile dict."""
+    small_csv, large_csv = (etl_bench.dataset_path(data_dir, n, seed=0) for n in rows)
+    measured = {}
+    for engine in engines:
+        if engine in ENGINE_IMPORTS and importlib.util.find_spec(ENGINE_IMPORTS[engine]) is None:
+            logger.info(f"Calibration skips {engine}: {ENGINE_IMPORTS[engine]} is not installed")
+            continue
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            measured[engine] = pool.submit(_calibrate_engine, engine, small_csv, large_csv,
+                                           threshold).result()
+        logger.info(f"Calibrated {engine}: {measured[engine]}")
+    return {"version": PROFILE_VERSION, "host": host_signature(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "rows": list(rows), "engines": measured}
+
+def load_profile(path: Path = DEFAULT_PROFILE_PATH, recalibrate: bool = False, **calibrate_kwargs) -> Dict:
+    """Cached profile for this host, calibrating (once) when missing, stale or forced."""
+    if not recalibrate:
+        try:
+            profile = json.loads(Path(path).read_text(encoding="utf-8"))
+            if profile.get("version") == PROFILE_VERSION and profile.get("host") == host_signature():
+                return profile
+            logger.info(f"Engine profile {path} was measured on a different host setup; recalibrating")
+        except (OSError, ValueError):
+            logger.info(f"No engine profile at {path}; calibrating once (a few seconds)")
+    profile = calibrate(**calibrate_kwargs)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(profile, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+    return profile
+
+# --- Decision ---
+def choose_engine(inputs: Sequence[Path], profile: Dict, cores: Optional[int] = None,
+                  memory_mb: Optional[float] = None) -> Decision:
+    """Cheapest predicted in-memory engine if the data fits, otherwise an out-of-core mode."""
+    cores = cores or available_cores()
+    sizes_mb = [Path(p).stat().st_size / 1024 ** 2 for p in inputs]
+    total_mb = sum(sizes_mb)
+    workers = min(cores, len(inputs)) if len(inputs) > 1 else None
+    # Multi-file runs hold one partition per worker at a time.
+    resident_mb = max(sizes_mb) * (workers or 1) if sizes_mb else 0.0
+    engines = profile["engines"]
+    host = (f"{total_mb:.1f} MB in {len(inputs)} file(s), {cores} core(s), "
+            + (f"{memory_mb:.0f} MB available" if memory_mb is not None else "memory unknown"))
+
+    estimates = {name: p["import_s"] + p["fixed_s"] + p["s_per_mb"] * total_mb / (workers or 1)
+                 for name, p in engines.items()}
+    budget = memory_mb * MEMORY_HEADROOM if memory_mb is not None else float("inf")
+    fitting = {name: t for name, t in estimates.items() if engines[name]["mem_per_mb"] * resident_mb <= budget}
+    if fitting:
+        engine = min(fitting, key=fitting.get)
+        others = ", ".join(f"{name} {t:.2f} s" for name, t in sorted(estimates.items(), key=lambda kv: kv[1])
+                           if name != engine)
+        reason = f"{host}: {engine} predicted fastest at {estimates[engine]:.2f} s ({others})"
+        return Decision(engine, workers=workers, reason=reason, estimates=estimates)
+
+    for engine in OUT_OF_CORE:
+        if engine == "pandas-chunked" or engine in engines:
+            break
+    needed = {name: engines[name]["mem_per_mb"] * resident_mb for name in engines}
+    reason = (f"{host}: no in-memory engine fits in {budget:.0f} MB "
+              f"(smallest needs {min(needed.values(), default=0):.0f} MB); using out-of-core {engine}")
+    return Decision(engine, streaming=engine == "polars-lazy", workers=workers, reason=reason,
+                    estimates=estimates)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Day 3: Salary aggregations for the ETL engines
+Names the per-role metrics an ETL run can produce (mean, median, p90, p99,
+min, max, count, or any pNN percentile) and how each engine computes them in
+one pass. In-memory engines compute exact values; chunked and multi-file runs
+keep a mergeable SalaryStats per role, whose percentiles come from a KLL sketch.
+"""
+
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+if __package__:
+    from .kll_sketch import DEFAULT_ERROR as DEFAULT_QUANTILE_ERROR, KLLSketch
+else:
+    from kll_sketch import DEFAULT_ERROR as DEFAULT_QUANTILE_ERROR, KLLSketch
+
+if TYPE_CHECKING:
+    import numpy as np
+
+AGGREGATIONS = ["mean", "median", "p90", "p99", "min", "max", "count"]
+DEFAULT_AGGS = ["mean"]
+_PERCENTILE = re.compile(r"p(\d{1,2}(?:\.\d+)?)")
+
+def parse_aggs(text: str) -> List[str]:
+    """'mean,p90,max' -> ['mean', 'p90', 'max'] (any pNN percentile is accepted)."""
+    aggs = []
+    for agg in filter(None, (part.strip().lower() for part in text.split(","))):
+        if agg not in AGGREGATIONS and not (_PERCENTILE.fullmatch(agg) and 0 < float(agg[1:]) < 100):
+            raise ValueError(f"Unknown aggregation {agg!r} (choose from {AGGREGATIONS} or pNN)")
+        if agg not in aggs:
+            aggs.append(agg)
+    if not aggs:
+        raise ValueError("At least one aggregation is required")
+    return aggs
+
+def quantile_of(agg: str) -> Optional[float]:
+    if agg == "median":
+        return 0.5
+    return float(agg[1:]) / 100 if _PERCENTILE.fullmatch(agg) else None
+
+def column_name(agg: str) -> str:
+    return {"mean": "avg_salary", "count": "count"}.get(agg, f"{agg}_salary")
+
+def needs_sketch(aggs: Sequence[str]) -> bool:
+    return any(quantile_of(agg) is not None for agg in aggs)
+
+# --- Exact, per engine ---
+def pandas_named_aggs(aggs: Sequence[str]) -> Dict:
+    """Keyword arguments for SeriesGroupBy.agg (pandas quantiles interpolate linearly)."""
+    named = {}
+    for agg in aggs:
+        q = quantile_of(agg)
+        named[column_name(agg)] = agg if q is None or agg == "median" else (lambda s, q=q: s.quantile(q))
+    return named
+
+def polars_exprs(aggs: Sequence[str]) -> List:
+    import polars as pl
+    salary = pl.col("salary")
+    exprs = []
+    for agg in aggs:
+        q = quantile_of(agg)
+        if agg == "count":
+            expr = pl.len()
+        elif q is not None:
+            expr = salary.quantile(q, interpolation="linear")
+        else:
+            expr = getattr(salary, agg)()
+        exprs.append(expr.alias(column_name(agg)))
+    return exprs
+
+def duckdb_select(aggs: Sequence[str]) -> str:
+    sql = []
+    for agg in aggs:
+        q = quantile_of(agg)
+        if agg == "mean":
+            expr = "avg(salary)"
+        elif agg == "count":
+            expr = "count(*)"
+        elif q is not None:
+            expr = f"quantile_cont(salary, {q!r})"
+        else:
+            expr = f"{agg}(salary)"
+        sql.append(f'{expr} AS "{column_name(agg)}"')
+    return ", ".join(sql)
+
+def numpy_value(agg: str, values: "np.ndarray", salary_sum: float):
+    """Exact metric over one role's salaries (an in-memory float64 array)."""
+    import numpy as np
+    q = quantile_of(agg)
+    if agg == "mean":
+        return salary_sum / len(values)
+    if agg == "count":
+        return len(values)
+    if q is not None:
+        return float(np.quantile(values, q))
+    return float(getattr(values, agg)())
+
+# --- Mergeable, for chunked and multi-file runs ---
+class SalaryStats:
+    """One role's running state: exact sum/count/min/max plus an optional KLL sketch."""
+
+    __slots__ = ("sum", "count", "min", "max", "sketch")
+
+    def __init__(self, quantile_error: Optional[float] = None):
+        self.sum = 0.0
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.sketch = KLLSketch(quantile_error) if quantile_error else None
+
+    def add(self, salary_sum, count, lowest, highest) -> "SalaryStats":
+        self.sum += float(salary_sum)
+        self.count += int(count)
+        self.min = float(lowest) if self.min is None else min(self.min, float(lowest))
+        self.max = float(highest) if self.max is None else max(self.max, float(highest))
+        return self
+
+    def merge(self, other: "SalaryStats") -> "SalaryStats":
+        self.add(other.sum, other.count, other.min, other.max)
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        return self
+
+    def value(self, agg: str):
+        q = quantile_of(agg)
+        if agg == "mean":
+            return self.sum / self.count  # summed in float64, divided once
+        if agg == "count":
+            return self.count
+        if q is not None:
+            if self.sketch is None:
+                raise ValueError(f"{agg} needs a quantile sketch; create SalaryStats with quantile_error")
+            return self.sketch.quantile(q)
+        return getattr(self, agg)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Day 3: ETL engine benchmark suite (`etl_cli.py bench`)
+Generates employee datasets of the requested sizes with generate_data.py,
+then runs every engine in a fresh spawned process per (engine, size): warmup
+runs first, then N timed repeats recording wall time, CPU time and peak RSS.
+Results go to a JSON file plus a summary table on stdout.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import PackageNotFoundError, version
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+if __package__:
+    from . import etl_cli
+else:
+    import etl_cli
+
+logger = logging.getLogger("etl_bench")
+
+DEFAULT_SIZES = "100k,1m"
+DEFAULT_ENGINES = etl_cli.ENGINES
+DEFAULT_DATA_DIR = Path(tempfile.gettempdir()) / "etl_bench_data"
+
+def parse_size(text: str) -> int:
+    """'100k' -> 100_000, '1m' -> 1_000_000, '2500' -> 2500."""
+    text = text.strip().lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+def library_version(lib: str) -> Optional[str]:
+    """Installed version of lib, or None for an optional engine that is not installed."""
+    try:
+        return version(lib)
+    except PackageNotFoundError:
+        return None
+
+def dataset_path(data_dir: Path, rows: int, seed: int) -> Path:
+    """Generate (once) and return the benchmark CSV for this size and seed."""
+    path = data_dir / f"employees_{rows}_{seed}.csv"
+    if not path.exists():
+        # Imported here so spawned workers don't pay for Polars/PyArrow up front.
+        if __package__:
+            from .generate_data import generate_large_employee_csv
+        else:
+            from generate_data import generate_large_employee_csv
+        data_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Generating {rows} rows into {path}...")
+        tmp_path = path.with_name(path.name + ".tmp")
+        generate_large_employee_csv(tmp_path, num_rows=rows, seed=seed)
+        os.replace(tmp_path, path)
+    return path
+
+def _peak_rss_mb() -> Optional[float]:
+    # Linux keeps ru_maxrss across exec, so a spawned worker would report the
+    # parent's peak; VmHWM belongs to the new address space.
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024  # bytes vs KiB
+
+def _run_engine(engine: str, input_csv: Path, output_csv: Path, threshold: int,
+                chunk_rows: int) -> None:
+    if engine == "pandas":
+        etl_cli.pandas_etl(input_csv, output_csv, threshold)
+    elif engine == "pandas-chunked":
+        etl_cli.pandas_chunked_etl(input_csv, output_csv, threshold, chunk_rows)
+    elif engine == "polars":
+        etl_cli.polars_etl(input_csv, output_csv, threshold)
+    elif engine == "polars-lazy":
+        etl_cli.polars_lazy_etl(input_csv, output_csv, threshold)
+    elif engine == "numpy":
+        etl_cli.numpy_etl(input_csv, output_csv, threshold)
+    elif engine == "duckdb":
+        etl_cli.duckdb_etl(input_csv, output_csv, threshold)
+    else:
+        raise ValueError(f"Unknown engine: {engine}")
+
+def _measure(engine: str, input_csv: Path, threshold: int, chunk_rows: int,
+             warmup: int, repeats: int) -> Dict:
+    """Runs inside a spawned worker, so peak RSS belongs to this engine alone."""
+    logging.getLogger().setLevel(logging.WARNING)
+    baseline_rss = _peak_rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        output_csv = Path(tmp) / "out.csv"
+        for _ in range(warmup):
+            _run_engine(engine, input_csv, output_csv, threshold, chunk_rows)
+        runs = []
+        for _ in range(repeats):
+            wall, cpu = time.perf_counter(), time.process_time()
+            _run_engine(engine, input_csv, output_csv, threshold, chunk_rows)
+            runs.append({
+                "wall_s": time.perf_counter() - wall,
+                "cpu_s": time.process_time() - cpu,
+                "peak_rss_mb": _peak_rss_mb(),  # high-water mark so far
+            })
+    return {"baseline_rss_mb": baseline_rss, "runs": runs}
+
+def run_benchmarks(sizes: List[int], engines: List[str], repeats: int = 3, warmup: int = 1,
+                   threshold: int = 100_000, chunk_rows: int = etl_cli.DEFAULT_CHUNK_ROWS,
+                   data_dir: Path = DEFAULT_DATA_DIR, seed: int = 42) -> Dict:
+    results, summary = [], []
+    for rows in sizes:
+        input_csv = dataset_path(data_dir, rows, seed)
+        for engine in engines:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                measured = pool.submit(_measure, engine, input_csv, threshold, chunk_rows,
+                                       warmup, repeats).result()
+            for repeat, run in enumerate(measured["runs"]):
+                results.append({"engine": engine, "rows": rows, "repeat": repeat, **run})
+            walls = [run["wall_s"] for run in measured["runs"]]
+            peaks = [run["peak_rss_mb"] for run in measured["runs"] if run["peak_rss_mb"] is not None]
+            summary.append({
+                "engine": engine,
+                "rows": rows,
+                "wall_median_s": statistics.median(walls),
+                "wall_min_s": min(walls),
+                "cpu_median_s": statistics.median(run["cpu_s"] for run in measured["runs"]),
+                "peak_rss_mb": max(peaks) if peaks else None,
+                "baseline_rss_mb": measured["baseline_rss_mb"],
+                "rows_per_s": rows / statistics.median(walls),
+            })
+            logger.info(f"{engine} @ {rows} rows: median {statistics.median(walls):.3f} s")
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "versions": {lib: library_version(lib) for lib in ("numpy", "pandas", "polars", "duckdb")},
+            "repeats": repeats,
+            "warmup": warmup,
+            "threshold": threshold,
+            "seed": seed,
+        },
+        "results": results,
+        "summary": summary,
+    }
+
+def format_summary(report: Dict) -> str:
+    header = f"{'engine':<16}{'rows':>12}{'median s':>11}{'min s':>9}{'cpu s':>9}{'peak MB':>10}{'rows/s':>13}"
+    lines = [header, "-" * len(header)]
+    for row in report["summary"]:
+        peak = f"{row['peak_rss_mb']:.0f}" if row["peak_rss_mb"] is not None else "n/a"
+        lines.append(f"{row['engine']:<16}{row['rows']:>12,}{row['wall_median_s']:>11.3f}"
+                     f"{row['wall_min_s']:>9.3f}{row['cpu_median_s']:>9.3f}{peak:>10}"
+                     f"{row['rows_per_s']:>13,.0f}")
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="etl_cli.py bench",
+                                     description="Benchmark the ETL engines on generated datasets.")
+    parser.add_argument("--sizes", type=str, default=DEFAULT_SIZES,
+                        help=f"Comma-separated row counts, k/m suffixes allowed (default: {DEFAULT_SIZES}).")
+    parser.add_argument("--engines", type=str, default=",".join(DEFAULT_ENGINES),
+                        help="Comma-separated engines to run (default: all).")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per engine and size (default: 3).")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs first (default: 1).")
+    parser.add_argument("-t", "--threshold", type=int, default=100_000, help="Salary threshold.")
+    parser.add_argument("--chunk-rows", type=int, default=etl_cli.DEFAULT_CHUNK_ROWS,
+                        help="Rows per chunk for pandas-chunked.")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR,
+                        help=f"Where generated datasets are kept and reused (default: {DEFAULT_DATA_DIR}).")
+    parser.add_argument("--seed", type=int, default=42, help="Dataset seed (default: 42).")
+    parser.add_argument("-o", "--output", type=Path, default=Path("bench_results.json"),
+                        help="JSON results file (default: bench_results.json).")
+    args = parser.parse_args(argv)
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    unknown = sorted(set(engines) - set(DEFAULT_ENGINES))
+    if unknown:
+        parser.error(f"unknown engine(s): {', '.join(unknown)}")
+    if args.repeats < 1 or args.warmup < 0:
+        parser.error("--repeats must be at least 1 and --warmup at least 0")
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+
+    report = run_benchmarks(sizes, engines, args.repeats, args.warmup, args.threshold,
+                            args.chunk_rows, args.data_dir, args.seed)
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(format_summary(report))
+    logger.info(f"Benchmark results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
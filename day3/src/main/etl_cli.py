@@ -1,17 +1,47 @@
 #!/usr/bin/env python3
 """
-Day 3 (Revised): Unified ETL CLI with Pandas and Polars engines
+Day 3 (Revised): Unified ETL CLI with Pandas, Polars, NumPy and DuckDB engines
 Includes internal execution time measurement (cross-platform) and Polars API fix.
+pandas and Polars are imported inside the engines that use them, so the CLI
+(and the NumPy engine) start without paying for either.
 Author: Sundarapandiyan — Week 1 Transition Plan
 """
 
 import argparse
 import logging
+import sys
+import tempfile
 import time
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Sequence, Union
 
-import pandas as pd
-import polars as pl
+if __package__:
+    from .columnar_cache import CACHE_BY_DEFAULT, DEFAULT_CACHE_DIR, ColumnarCache
+    from .etl_aggregates import (AGGREGATIONS, DEFAULT_AGGS, DEFAULT_QUANTILE_ERROR, duckdb_select,
+                                 needs_sketch, pandas_named_aggs, parse_aggs, polars_exprs)
+    from .etl_parallel import (Partials, map_reduce_etl, pandas_partials, resolve_inputs, write_averages,
+                               write_rows)
+    from .etl_schema import (QUERY_COLUMNS, apply_pandas_schema, apply_polars_schema, memory_report,
+                             pandas_memory_mb, pandas_read_kwargs, polars_memory_mb,
+                             polars_overrides, polars_read_kwargs)
+    from .numpy_etl import numpy_aggregate
+    from .partitioned_writer import (COMPRESSIONS, DEFAULT_ROW_GROUP_ROWS, FORMATS, PARTITION_COLUMNS,
+                                     write_partitioned)
+else:
+    from columnar_cache import CACHE_BY_DEFAULT, DEFAULT_CACHE_DIR, ColumnarCache
+    from etl_aggregates import (AGGREGATIONS, DEFAULT_AGGS, DEFAULT_QUANTILE_ERROR, duckdb_select,
+                                needs_sketch, pandas_named_aggs, parse_aggs, polars_exprs)
+    from etl_parallel import (Partials, map_reduce_etl, pandas_partials, resolve_inputs, write_averages,
+                              write_rows)
+    from etl_schema import (QUERY_COLUMNS, apply_pandas_schema, apply_polars_schema, memory_report,
+                            pandas_memory_mb, pandas_read_kwargs, polars_memory_mb,
+                            polars_overrides, polars_read_kwargs)
+    from numpy_etl import numpy_aggregate
+    from partitioned_writer import (COMPRESSIONS, DEFAULT_ROW_GROUP_ROWS, FORMATS, PARTITION_COLUMNS,
+                                    write_partitioned)
+
+if TYPE_CHECKING:
+    import polars as pl
 
 # --- Logging Config ---
 logging.basicConfig(
@@ -22,62 +52,301 @@ logging.basicConfig(
 logger = logging.getLogger("etl_cli")
 
 # --- ETL Implementations ---
-def pandas_etl(input_csv: Path, output_csv: Path, threshold: int):
+def pandas_etl(input_csv: Path, output_csv: Path, threshold: int,
+               cache: Optional[ColumnarCache] = None, aggs: Sequence[str] = DEFAULT_AGGS):
+    import pandas as pd
     start = time.perf_counter()
     logger.debug("Running Pandas ETL...")
-    df = pd.read_csv(input_csv)
+    if cache:
+        df = apply_pandas_schema(cache.read_pandas(input_csv, columns=QUERY_COLUMNS))
+    else:
+        df = pd.read_csv(input_csv, **pandas_read_kwargs())
+    logger.debug(f"Loaded {len(df)} rows into {pandas_memory_mb(df):.2f} MB")
     high_salary = df[df["salary"] > threshold]
-    avg_salary_by_role = (
-        high_salary.groupby("role")["salary"]
-        .mean()
+    salary_by_role = (
+        high_salary.groupby("role", observed=True)["salary"]
+        .agg(**pandas_named_aggs(aggs))
         .reset_index()
-        .rename(columns={"salary": "avg_salary"})
     )
-    avg_salary_by_role.to_csv(output_csv, index=False)
+    salary_by_role.to_csv(output_csv, index=False)
     elapsed = (time.perf_counter() - start) * 1000
     logger.info(f"Pandas ETL complete in {elapsed:.2f} ms. Output saved to {output_csv}")
 
-def polars_etl(input_csv: Path, output_csv: Path, threshold: int):
+def polars_etl(input_csv: Path, output_csv: Path, threshold: int,
+               cache: Optional[ColumnarCache] = None, aggs: Sequence[str] = DEFAULT_AGGS):
+    import polars as pl
     start = time.perf_counter()
     logger.debug("Running Polars ETL...")
-    df = pl.read_csv(input_csv)
+    if cache:
+        df = apply_polars_schema(cache.read_polars(input_csv, columns=QUERY_COLUMNS))
+    else:
+        df = pl.read_csv(input_csv, **polars_read_kwargs())
+    logger.debug(f"Loaded {df.height} rows into {polars_memory_mb(df):.2f} MB")
     result = (
         df.lazy()
         .filter(pl.col("salary") > threshold)
         .group_by("role")  # ✅ Updated API
-        .agg(pl.col("salary").mean().alias("avg_salary"))
+        .agg(polars_exprs(aggs))
         .collect()
     )
     result.write_csv(output_csv)
     elapsed = (time.perf_counter() - start) * 1000
     logger.info(f"Polars ETL complete in {elapsed:.2f} ms. Output saved to {output_csv}")
 
+def polars_lazy_plan(input_csv: Path, threshold: int, cache: Optional[ColumnarCache] = None,
+                     aggs: Sequence[str] = DEFAULT_AGGS) -> "pl.LazyFrame":
+    """Scan-based plan: only role/salary are read and the filter runs inside the scan."""
+    import polars as pl
+    return (
+        apply_polars_schema(cache.scan_polars(input_csv) if cache
+                            else pl.scan_csv(input_csv, schema_overrides=polars_overrides()))
+        .filter(pl.col("salary") > threshold)
+        .group_by("role")
+        .agg(polars_exprs(aggs))
+        .sort("role")  # same row order as the pandas engines
+    )
+
+def polars_lazy_etl(input_csv: Path, output_csv: Path, threshold: int,
+                    streaming: bool = False, explain: bool = False,
+                    cache: Optional[ColumnarCache] = None, aggs: Sequence[str] = DEFAULT_AGGS):
+    start = time.perf_counter()
+    engine = "streaming" if streaming else "auto"
+    logger.debug(f"Running lazy Polars ETL (engine={engine})...")
+    plan = polars_lazy_plan(input_csv, threshold, cache, aggs)
+    if explain:
+        print(plan.explain(engine=engine))
+    plan.collect(engine=engine).write_csv(output_csv)
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(f"Lazy Polars ETL complete in {elapsed:.2f} ms. Output saved to {output_csv}")
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+ENGINES = ["pandas", "pandas-chunked", "polars", "polars-lazy", "numpy", "duckdb"]
+
+def pandas_chunked_etl(input_csv: Path, output_csv: Path, threshold: int,
+                       chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                       cache: Optional[ColumnarCache] = None, aggs: Sequence[str] = DEFAULT_AGGS,
+                       quantile_error: float = DEFAULT_QUANTILE_ERROR):
+    """Out-of-core variant of pandas_etl: peak memory follows chunk_rows, not file size.
+
+    Keeps exact per-role salary sum/count/min/max partials across chunks and
+    divides once at the end, so those match the in-memory engine. Percentiles
+    come from per-role KLL sketches, within quantile_error in rank.
+    """
+    import pandas as pd
+    start = time.perf_counter()
+    logger.debug(f"Running chunked Pandas ETL ({chunk_rows} rows per chunk)...")
+    totals: Partials = {}
+    chunks = 0
+    sketch_error = quantile_error if needs_sketch(aggs) else None
+    if cache:
+        reader = (apply_pandas_schema(chunk)
+                  for chunk in cache.iter_pandas(input_csv, chunk_rows, columns=QUERY_COLUMNS))
+    else:
+        reader = pd.read_csv(input_csv, chunksize=chunk_rows, **pandas_read_kwargs())
+    for chunk in reader:
+        chunks += 1
+        pandas_partials([chunk], threshold, totals, sketch_error)
+    write_averages(totals, output_csv, aggs)
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(f"Chunked Pandas ETL complete in {elapsed:.2f} ms ({chunks} chunks). "
+                f"Output saved to {output_csv}")
+
+def numpy_etl(input_csv: Path, output_csv: Path, threshold: int, aggs: Sequence[str] = DEFAULT_AGGS):
+    """Dependency-light engine: np.loadtxt + np.bincount, no pandas/Polars import."""
+    start = time.perf_counter()
+    logger.debug("Running NumPy ETL...")
+    write_rows(numpy_aggregate(input_csv, threshold, aggs), output_csv, aggs)
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(f"NumPy ETL complete in {elapsed:.2f} ms. Output saved to {output_csv}")
+
+DUCKDB_QUERY = """
+    SELECT role, {select}
+    FROM read_csv(?, header = true)
+    WHERE salary > ? AND role IS NOT NULL  -- pandas drops missing group keys
+    GROUP BY role
+    ORDER BY role
+"""
+DEFAULT_SPILL_DIR = Path(tempfile.gettempdir()) / "etl_duckdb_spill"
+
+def duckdb_etl(input_csv: Union[Path, Sequence[Path]], output_csv: Path, threshold: int,
+               threads: Optional[int] = None, spill_dir: Path = DEFAULT_SPILL_DIR,
+               memory_limit: Optional[str] = None, aggs: Sequence[str] = DEFAULT_AGGS):
+    """SQL over the CSV(s) with DuckDB's parallel reader; spills to spill_dir past memory_limit."""
+    import duckdb
+    start = time.perf_counter()
+    inputs = [input_csv] if isinstance(input_csv, (str, Path)) else list(input_csv)
+    config = {"temp_directory": str(spill_dir)}
+    if threads:
+        config["threads"] = threads
+    if memory_limit:
+        config["memory_limit"] = memory_limit
+    logger.debug(f"Running DuckDB ETL over {len(inputs)} file(s) with {config}...")
+    with duckdb.connect(config=config) as con:
+        query = DUCKDB_QUERY.format(select=duckdb_select(aggs))
+        rows = con.execute(query, [[str(p) for p in inputs], threshold]).fetchall()
+    write_rows(rows, output_csv, aggs)
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(f"DuckDB ETL complete in {elapsed:.2f} ms. Output saved to {output_csv}")
+
 # --- CLI Entry Point ---
 def main():
+    if sys.argv[1:2] == ["bench"]:
+        if __package__:
+            from .etl_bench import main as bench_main
+        else:
+            from etl_bench import main as bench_main
+        return bench_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
-        description="ETL pipeline to filter employees by salary and compute average salary by role."
+        description="ETL pipeline to filter employees by salary and compute average salary by role.",
+        epilog="Run 'etl_cli.py bench --help' for the engine benchmark suite."
     )
-    parser.add_argument("-i", "--input", type=Path, required=True, help="Path to input CSV file.")
+    parser.add_argument("-i", "--input", type=str, nargs="+", required=True,
+                        help="Input CSV file(s), directories of CSVs, or glob patterns (e.g. 'data/*.csv').")
     parser.add_argument("-o", "--output", type=Path, required=True, help="Path to output CSV file.")
     parser.add_argument("-t", "--threshold", type=int, default=100_000, help="Salary threshold (default: 100000).")
-    parser.add_argument("-e", "--engine", type=str, choices=["pandas", "polars"], default="pandas",
-                        help="ETL engine to use (default: pandas).")
+    parser.add_argument("-e", "--engine", type=str, choices=ENGINES + ["auto"], default="pandas",
+                        help="ETL engine to use; auto picks one from a per-host calibration profile "
+                             "(default: pandas).")
+    parser.add_argument("--agg", type=str, default=",".join(DEFAULT_AGGS),
+                        help=f"Comma-separated salary metrics per role: {', '.join(AGGREGATIONS)} "
+                             f"or any pNN percentile (default: mean).")
+    parser.add_argument("--quantile-error", type=float, default=DEFAULT_QUANTILE_ERROR,
+                        help="Rank error bound of the percentile sketches used by pandas-chunked and "
+                             f"multi-file inputs (default: {DEFAULT_QUANTILE_ERROR}).")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f"Rows per chunk for the pandas-chunked engine (default: {DEFAULT_CHUNK_ROWS}).")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Run the polars-lazy plan on Polars' streaming engine (larger-than-RAM inputs).")
+    parser.add_argument("--explain", action="store_true",
+                        help="Print the optimized polars-lazy plan (shows projection/predicate pushdown).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes for multi-file inputs (default: CPU count).")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="DuckDB worker threads (default: all cores).")
+    parser.add_argument("--memory-limit", type=str, default=None,
+                        help="DuckDB memory limit before spilling to disk, e.g. 2GB (default: 80%% of RAM).")
+    parser.add_argument("--spill-dir", type=Path, default=DEFAULT_SPILL_DIR,
+                        help=f"Where DuckDB spills intermediate data (default: {DEFAULT_SPILL_DIR}).")
+    parser.add_argument("--cache", action=argparse.BooleanOptionalAction, default=CACHE_BY_DEFAULT,
+                        help="Reuse Arrow IPC copies of the inputs from the columnar cache (default: off unless "
+                             "$ETL_CACHE_DIR is set; numpy never uses it).")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR,
+                        help=f"Columnar cache directory (default: {DEFAULT_CACHE_DIR}, or $ETL_CACHE_DIR).")
+    parser.add_argument("--engine-profile", type=Path, default=None,
+                        help="Calibration profile used by --engine auto (default: engine_profile.json in the "
+                             "cache directory, or $ETL_ENGINE_PROFILE).")
+    parser.add_argument("--recalibrate", action="store_true",
+                        help="Re-measure the --engine auto calibration profile before choosing.")
+    parser.add_argument("--partition-by", type=str, choices=PARTITION_COLUMNS, default=None,
+                        help="Also write the filtered rows as a Hive-style dataset partitioned by this column.")
+    parser.add_argument("--partition-dir", type=Path, default=None,
+                        help="Directory of the --partition-by dataset (default: <output stem>_by_<column> "
+                             "next to the output).")
+    parser.add_argument("--format", type=str, choices=FORMATS, default=FORMATS[0],
+                        help="File format of the --partition-by dataset (default: parquet).")
+    parser.add_argument("--compression", type=str, default=None,
+                        choices=sorted({c for codecs in COMPRESSIONS.values() for c in codecs}),
+                        help="Compression of the --partition-by files (default: zstd for parquet, none for csv).")
+    parser.add_argument("--row-group-rows", type=int, default=DEFAULT_ROW_GROUP_ROWS,
+                        help=f"Rows per Parquet row group / CSV write batch (default: {DEFAULT_ROW_GROUP_ROWS}).")
+    parser.add_argument("--write-threads", type=int, default=None,
+                        help="Threads writing partitions concurrently (default: CPU count + 4, at most 32).")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="Print in-memory size of the input with inferred vs. lean dtypes, then run the ETL.")
     parser.add_argument("--log-level", type=str, choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO",
                         help="Set the logging level.")
 
     args = parser.parse_args()
+    try:
+        aggs = parse_aggs(args.agg)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if not 0 < args.quantile_error < 1:
+        parser.error("--quantile-error must be between 0 and 1")
+    if args.chunk_rows < 1:
+        parser.error("--chunk-rows must be at least 1")
+    if (args.streaming or args.explain) and args.engine not in ("polars-lazy", "auto"):
+        parser.error("--streaming and --explain require --engine polars-lazy")
+    if (args.threads is not None or args.memory_limit) and args.engine not in ("duckdb", "auto"):
+        parser.error("--threads and --memory-limit require --engine duckdb")
+    if (args.engine_profile or args.recalibrate) and args.engine != "auto":
+        parser.error("--engine-profile and --recalibrate require --engine auto")
+    if args.threads is not None and args.threads < 1:
+        parser.error("--threads must be at least 1")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.partition_by is None and (args.partition_dir or args.compression or args.write_threads
+                                      or args.format != FORMATS[0]
+                                      or args.row_group_rows != DEFAULT_ROW_GROUP_ROWS):
+        parser.error("--partition-dir, --format, --compression, --row-group-rows and --write-threads "
+                     "require --partition-by")
+    if args.compression and args.compression not in COMPRESSIONS[args.format]:
+        parser.error(f"--format {args.format} supports --compression {', '.join(COMPRESSIONS[args.format])}")
+    if args.row_group_rows < 1:
+        parser.error("--row-group-rows must be at least 1")
+    if args.write_threads is not None and args.write_threads < 1:
+        parser.error("--write-threads must be at least 1")
+    inputs = resolve_inputs(args.input)
+    if not inputs:
+        parser.error(f"no input files match {' '.join(args.input)}")
+    if args.explain and len(inputs) > 1:
+        parser.error("--explain requires a single input file")
     logging.getLogger().setLevel(args.log_level)
 
+    if args.engine == "auto":
+        if __package__:
+            from .engine_auto import DEFAULT_PROFILE_PATH, available_memory_mb, choose_engine, load_profile
+        else:
+            from engine_auto import DEFAULT_PROFILE_PATH, available_memory_mb, choose_engine, load_profile
+        profile = load_profile(args.engine_profile or DEFAULT_PROFILE_PATH, recalibrate=args.recalibrate)
+        decision = choose_engine(inputs, profile, memory_mb=available_memory_mb())
+        logger.info(f"--engine auto -> {decision.engine} ({decision.mode}): {decision.reason}")
+        args.engine = decision.engine
+        args.streaming = args.streaming or decision.streaming
+        args.workers = args.workers or decision.workers
+        if args.engine != "polars-lazy":
+            dropped = [flag for flag, on in (("--streaming", args.streaming), ("--explain", args.explain)) if on]
+            if dropped:
+                logger.warning(f"Ignoring {', '.join(dropped)}: only used by polars-lazy, auto picked {args.engine}")
+            args.streaming = args.explain = False
+        if args.engine != "duckdb":
+            args.threads, args.memory_limit = None, None
+
+    if args.memory_report:
+        for engine, sizes in memory_report(inputs[0]).items():
+            print(f"{engine}: inferred {sizes['inferred_mb']:.2f} MB -> lean {sizes['lean_mb']:.2f} MB "
+                  f"({sizes['inferred_mb'] / max(sizes['lean_mb'], 1e-9):.1f}x smaller)")
+
     total_start = time.perf_counter()
+    cache = ColumnarCache(args.cache_dir) if args.cache else None
+    input_csv = inputs[0]
 
-    if args.engine == "pandas":
-        pandas_etl(args.input, args.output, args.threshold)
+    if args.engine == "duckdb":  # DuckDB scans many files in parallel itself
+        duckdb_etl(inputs, args.output, args.threshold, args.threads, args.spill_dir, args.memory_limit, aggs)
+    elif len(inputs) > 1:
+        map_reduce_etl(inputs, args.output, args.threshold, args.engine, args.workers, args.chunk_rows,
+                       args.cache_dir if args.cache else None, args.streaming, aggs, args.quantile_error)
+    elif args.engine == "pandas":
+        pandas_etl(input_csv, args.output, args.threshold, cache, aggs)
+    elif args.engine == "pandas-chunked":
+        pandas_chunked_etl(input_csv, args.output, args.threshold, args.chunk_rows, cache, aggs,
+                           args.quantile_error)
     elif args.engine == "polars":
-        polars_etl(args.input, args.output, args.threshold)
+        polars_etl(input_csv, args.output, args.threshold, cache, aggs)
+    elif args.engine == "numpy":
+        numpy_etl(input_csv, args.output, args.threshold, aggs)
+    elif args.engine == "polars-lazy":
+        polars_lazy_etl(input_csv, args.output, args.threshold, args.streaming, args.explain, cache, aggs)
     else:
         logger.error(f"Unknown engine: {args.engine}")
         return
 
+    if args.partition_by:
+        partition_dir = args.partition_dir or args.output.with_name(f"{args.output.stem}_by_{args.partition_by}")
+        write_partitioned(inputs, partition_dir, args.threshold, args.partition_by, args.format,
+                          args.compression, args.row_group_rows, args.write_threads)
+
     total_elapsed = (time.perf_counter() - total_start) * 1000
     logger.info(f"Total script execution time: {total_elapsed:.2f} ms")
 
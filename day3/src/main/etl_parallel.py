@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Day 3: Map-reduce ETL over many CSV partitions
+Each input file is reduced, in its own worker process, to per-role
+SalaryStats partials (exact sum/count/min/max, plus a KLL sketch when
+percentiles are requested); the parent merges them and divides once at the
+end. Python ints keep the sums exact, so mean/min/max/count are the same as
+running the query over all files concatenated. Workers take one file per
+task, so none holds more than one partition in memory.
+"""
+
+import csv
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+if __package__:
+    from .columnar_cache import ColumnarCache
+    from .etl_aggregates import DEFAULT_AGGS, DEFAULT_QUANTILE_ERROR, SalaryStats, column_name, needs_sketch
+    from .etl_schema import (QUERY_COLUMNS, apply_pandas_schema, apply_polars_schema,
+                             pandas_read_kwargs, polars_overrides, polars_read_kwargs)
+    from .numpy_etl import numpy_partials
+else:
+    from columnar_cache import ColumnarCache
+    from etl_aggregates import DEFAULT_AGGS, DEFAULT_QUANTILE_ERROR, SalaryStats, column_name, needs_sketch
+    from etl_schema import (QUERY_COLUMNS, apply_pandas_schema, apply_polars_schema,
+                            pandas_read_kwargs, polars_overrides, polars_read_kwargs)
+    from numpy_etl import numpy_partials
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import polars as pl
+
+logger = logging.getLogger("etl_parallel")
+
+Partials = Dict[Optional[str], SalaryStats]
+
+def resolve_inputs(specs: Sequence) -> List[Path]:
+    """Expand files, directories (their *.csv) and glob patterns into a sorted, de-duplicated list."""
+    paths = set()
+    for spec in map(str, specs):
+        if os.path.isdir(spec):
+            paths.update(Path(spec).glob("*.csv"))
+        elif any(ch in spec for ch in "*?["):
+            paths.update(Path(p) for p in glob.glob(spec, recursive=True) if os.path.isfile(p))
+        else:
+            paths.add(Path(spec))
+    return sorted(paths)
+
+def combine_partials(totals: Partials, partials: Partials) -> Partials:
+    for role, stats in partials.items():
+        if role in totals:
+            totals[role].merge(stats)
+        else:
+            totals[role] = stats
+    return totals
+
+def pandas_partials(chunks: Iterable["pd.DataFrame"], threshold: int, totals: Optional[Partials] = None,
+                    quantile_error: Optional[float] = None) -> Partials:
+    totals = {} if totals is None else totals
+    for chunk in chunks:
+        high_salary = chunk[chunk["salary"] > threshold]
+        grouped = high_salary.groupby("role", observed=True)["salary"]
+        partial_stats = grouped.agg(["sum", "count", "min", "max"])
+        for role, salary_sum, count, lowest, highest in zip(
+                partial_stats.index, *(partial_stats[col].tolist() for col in partial_stats.columns)):
+            totals.setdefault(role, SalaryStats(quantile_error)).add(salary_sum, count, lowest, highest)
+        if quantile_error:
+            for role, salaries in grouped:
+                totals[role].sketch.update(salaries.to_numpy(dtype="float64"))
+    return totals
+
+def polars_partials(frame: "pl.LazyFrame", threshold: int, streaming: bool = False,
+                    quantile_error: Optional[float] = None) -> Partials:
+    import polars as pl
+    salary = pl.col("salary").cast(pl.Float64)  # as in etl_schema; an integer cast would truncate
+    exprs = [salary.sum().alias("sum"), pl.len().alias("count"),
+             salary.min().alias("min"), salary.max().alias("max")]
+    if quantile_error:
+        exprs.append(salary.alias("values"))  # this partition's values, as a list per role
+    result = (
+        frame.filter(pl.col("salary") > threshold)
+        .group_by("role")
+        .agg(exprs)
+        .with_columns(pl.col("role").cast(pl.String))
+        .collect(engine="streaming" if streaming else "auto")
+    )
+    totals: Partials = {}
+    for row in result.iter_rows(named=True):
+        stats = totals[row["role"]] = SalaryStats(quantile_error)
+        stats.add(row["sum"], row["count"], row["min"], row["max"])
+        if quantile_error:
+            stats.sketch.update(row["values"])
+    return totals
+
+def stats_rows(totals: Partials, aggs: Sequence[str] = DEFAULT_AGGS) -> List[tuple]:
+    """(role, *metrics) per role; a missing role sorts first, as in Polars."""
+    roles = sorted(totals, key=lambda role: (role is not None, role or ""))
+    return [(role, *(totals[role].value(agg) for agg in aggs)) for role in roles]
+
+def write_averages(totals: Partials, output_csv: Path, aggs: Sequence[str] = DEFAULT_AGGS) -> None:
+    write_rows(stats_rows(totals, aggs), output_csv, aggs)
+
+def write_rows(rows: Iterable[Sequence], output_csv: Path, aggs: Sequence[str] = DEFAULT_AGGS) -> None:
+    """Write (role, *metrics) rows with the same layout as DataFrame.to_csv(index=False)."""
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(["role", *map(column_name, aggs)])
+        writer.writerows((role, *(v if isinstance(v, int) else float(v) for v in values))
+                         for role, *values in rows)
+
+def partial_aggregate(input_csv: Path, engine: str, threshold: int, chunk_rows: int,
+                      cache_dir: Optional[Path] = None, streaming: bool = False,
+                      quantile_error: Optional[float] = None) -> Partials:
+    """Per-file (map) step, using the same reader as the chosen single-file engine."""
+    if engine == "numpy":
+        return numpy_partials(input_csv, threshold, quantile_error)
+    cache = ColumnarCache(cache_dir) if cache_dir else None
+    if engine == "pandas":
+        import pandas as pd
+        if cache:
+            df = apply_pandas_schema(cache.read_pandas(input_csv, columns=QUERY_COLUMNS))
+        else:
+            df = pd.read_csv(input_csv, **pandas_read_kwargs())
+        return pandas_partials([df], threshold, quantile_error=quantile_error)
+    if engine == "pandas-chunked":
+        import pandas as pd
+        if cache:
+            chunks = (apply_pandas_schema(chunk)
+                      for chunk in cache.iter_pandas(input_csv, chunk_rows, columns=QUERY_COLUMNS))
+            return pandas_partials(chunks, threshold, quantile_error=quantile_error)
+        with pd.read_csv(input_csv, chunksize=chunk_rows, **pandas_read_kwargs()) as reader:
+            return pandas_partials(reader, threshold, quantile_error=quantile_error)
+    if engine == "polars":
+        import polars as pl
+        if cache:
+            df = apply_polars_schema(cache.read_polars(input_csv, columns=QUERY_COLUMNS))
+        else:
+            df = pl.read_csv(input_csv, **polars_read_kwargs())
+        return polars_partials(df.lazy(), threshold, quantile_error=quantile_error)
+    if engine == "polars-lazy":
+        import polars as pl
+        if cache:
+            scan = cache.scan_polars(input_csv)
+        else:
+            scan = pl.scan_csv(input_csv, schema_overrides=polars_overrides())
+        return polars_partials(apply_polars_schema(scan), threshold, streaming, quantile_error)
+    raise ValueError(f"Unknown engine: {engine}")
+
+def map_reduce_etl(inputs: Sequence[Path], output_csv: Path, threshold: int, engine: str = "pandas",
+                   workers: Optional[int] = None, chunk_rows: int = 1_000_000,
+                   cache_dir: Optional[Path] = None, streaming: bool = False,
+                   aggs: Sequence[str] = DEFAULT_AGGS,
+                   quantile_error: float = DEFAULT_QUANTILE_ERROR) -> Partials:
+    """Aggregate every input in a spawned process pool and merge into one output CSV."""
+    start = time.perf_counter()
+    workers = min(workers or os.cpu_count() or 1, len(inputs))
+    job = partial(partial_aggregate, engine=engine, threshold=threshold, chunk_rows=chunk_rows,
+                  cache_dir=cache_dir, streaming=streaming,
+                  quantile_error=quantile_error if needs_sketch(aggs) else None)
+    totals: Partials = {}
+    if workers <= 1:
+        for input_csv in inputs:
+            combine_partials(totals, job(input_csv))
+    else:
+        # spawn, not fork: Polars' thread pool does not survive a fork.
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            for partials in pool.map(job, inputs):
+                combine_partials(totals, partials)
+    write_averages(totals, output_csv, aggs)
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(f"Map-reduce {engine} ETL over {len(inputs)} files with {workers} worker(s) "
+                f"complete in {elapsed:.2f} ms. Output saved to {output_csv}")
+    return totals
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Day 3: Ingestion schema for the employee CSV
+Declares compact dtypes per column so the engines read only what a query
+needs: dictionary-encoded (categorical) columns for low-cardinality text
+such as role and location, and a nullable 8-bit integer for experience,
+which must fit Int8. Salary stays a 64-bit float: inputs may carry
+fractional salaries, and the aggregates are float means anyway.
+pandas, Polars and PyArrow are only imported when a reader or report needs them.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import polars as pl
+
+QUERY_COLUMNS = ["role", "salary"]
+
+PANDAS_DTYPES = {
+    "name": "string",
+    "role": "category",
+    "salary": "Float64",
+    "location": "category",
+    "years_experience": "Int8",
+}
+
+POLARS_DTYPES = {  # names of polars data types
+    "name": "String",
+    "role": "Categorical",
+    "salary": "Float64",
+    "location": "Categorical",
+    "years_experience": "Int8",
+}
+
+ARROW_DTYPES = {  # names of pyarrow type factories
+    "name": "string",
+    "role": "string",
+    "salary": "float64",
+    "location": "string",
+    "years_experience": "int8",
+}
+
+def pandas_read_kwargs(columns: Sequence[str] = QUERY_COLUMNS) -> Dict:
+    """usecols/dtype arguments for pd.read_csv."""
+    return {"usecols": list(columns), "dtype": {c: PANDAS_DTYPES[c] for c in columns if c in PANDAS_DTYPES}}
+
+def polars_read_kwargs(columns: Sequence[str] = QUERY_COLUMNS) -> Dict:
+    """columns/schema_overrides arguments for pl.read_csv (scan_csv takes only schema_overrides)."""
+    return {"columns": list(columns), "schema_overrides": polars_overrides(columns)}
+
+def polars_overrides(columns: Sequence[str] = QUERY_COLUMNS) -> Dict:
+    import polars as pl
+    return {c: getattr(pl, POLARS_DTYPES[c]) for c in columns if c in POLARS_DTYPES}
+
+def arrow_column_types(columns: Sequence[str] = tuple(ARROW_DTYPES)) -> Dict:
+    """column_types for pyarrow.csv.ConvertOptions."""
+    import pyarrow as pa
+    return {c: getattr(pa, ARROW_DTYPES[c])() for c in columns if c in ARROW_DTYPES}
+
+def apply_pandas_schema(df: "pd.DataFrame", columns: Sequence[str] = QUERY_COLUMNS) -> "pd.DataFrame":
+    """Project and cast an already-loaded frame (e.g. from the columnar cache)."""
+    return df[list(columns)].astype({c: PANDAS_DTYPES[c] for c in columns if c in PANDAS_DTYPES})
+
+def apply_polars_schema(df, columns: Sequence[str] = QUERY_COLUMNS):
+    """Same as apply_pandas_schema for a Polars DataFrame or LazyFrame."""
+    return df.select(list(columns)).cast(polars_overrides(columns))
+
+def pandas_memory_mb(df: "pd.DataFrame") -> float:
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+def polars_memory_mb(df: "pl.DataFrame") -> float:
+    return df.estimated_size() / 1024 ** 2
+
+def memory_report(input_csv: Path, columns: List[str] = QUERY_COLUMNS) -> Dict[str, Dict[str, float]]:
+    """Load input_csv with inferred dtypes and with the lean schema; in-memory MB of each."""
+    import pandas as pd
+    import polars as pl
+    return {
+        "pandas": {
+            "inferred_mb": pandas_memory_mb(pd.read_csv(input_csv)),
+            "lean_mb": pandas_memory_mb(pd.read_csv(input_csv, **pandas_read_kwargs(columns))),
+        },
+        "polars": {
+            "inferred_mb": polars_memory_mb(pl.read_csv(input_csv)),
+            "lean_mb": polars_memory_mb(pl.read_csv(input_csv, **polars_read_kwargs(columns))),
+        },
+    }
@@ -1,26 +1,143 @@
-import csv
-import random
+#!/usr/bin/env python3
+"""
+Day 3: Employee test-data generator
+Columns are generated as NumPy arrays one block at a time and written with
+Polars (CSV) or PyArrow (Parquet, one row group per block). Every block has
+its own seed spawned from a single SeedSequence, so a (seed, shards,
+block_rows) triple always yields the same files, however many worker
+processes produce them.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import polars as pl
+import pyarrow.parquet as pq
 
 import os
 main_path = os.path.abspath(os.path.dirname(__file__))
 src_path = str(Path(main_path).parents[0])
 
-def generate_large_employee_csv(file_path: Path, num_rows: int = 100_000):
-    roles = ["Developer", "QA", "Manager", "Data Scientist", "DevOps", "Designer"]
-    locations = ["New York", "London", "Bangalore", "Berlin", "Toronto", "Sydney"]
-
-    with file_path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["name", "role", "salary", "location", "years_experience"])
-        for i in range(num_rows):
-            name = f"Employee_{i+1}"
-            role = random.choice(roles)
-            salary = random.randint(50_000, 200_000)
-            location = random.choice(locations)
-            years_exp = random.randint(1, 20)
-            writer.writerow([name, role, salary, location, years_exp])
+ROLES = ["Developer", "QA", "Manager", "Data Scientist", "DevOps", "Designer"]
+LOCATIONS = ["New York", "London", "Bangalore", "Berlin", "Toronto", "Sydney"]
+NULLABLE_COLUMNS = ["role", "salary", "location", "years_experience"]
+DEFAULT_BLOCK_ROWS = 1_000_000
+
+def zipf_weights(count: int, skew: float) -> np.ndarray:
+    """Probabilities for ranks 1..count proportional to 1/rank**skew (0 = uniform)."""
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    return weights / weights.sum()
+
+def generate_block(rng: np.random.Generator, first_id: int, num_rows: int,
+                   role_skew: float = 0.0, null_rates: Optional[Dict[str, float]] = None) -> pl.DataFrame:
+    """One block of employees; names continue from Employee_{first_id}."""
+    role_codes = rng.choice(len(ROLES), size=num_rows, p=zipf_weights(len(ROLES), role_skew))
+    df = pl.DataFrame({
+        "name": pl.int_range(first_id, first_id + num_rows, eager=True),
+        "role": pl.Series(role_codes, dtype=pl.UInt32).replace_strict(
+            dict(enumerate(ROLES)), return_dtype=pl.String),
+        "salary": rng.integers(50_000, 200_001, size=num_rows),
+        "location": pl.Series(rng.integers(0, len(LOCATIONS), size=num_rows), dtype=pl.UInt32)
+            .replace_strict(dict(enumerate(LOCATIONS)), return_dtype=pl.String),
+        "years_experience": rng.integers(1, 21, size=num_rows),
+    }).with_columns(pl.format("Employee_{}", "name").alias("name"))
+    nulls = []
+    for column, rate in (null_rates or {}).items():
+        if rate > 0:
+            mask = pl.Series(rng.random(num_rows) < rate)
+            nulls.append(pl.when(mask).then(None).otherwise(pl.col(column)).alias(column))
+    return df.with_columns(nulls) if nulls else df
+
+def _write_blocks(file_path: Path, first_id: int, num_rows: int, seed: np.random.SeedSequence,
+                  block_rows: int, role_skew: float, null_rates: Optional[Dict[str, float]]) -> Path:
+    block_count = max(1, -(-num_rows // block_rows))
+    block_seeds = seed.spawn(block_count)
+    parquet = file_path.suffix.lower() == ".parquet"
+    writer = None
+    with file_path.open("wb") as f:
+        for block, block_seed in enumerate(block_seeds):
+            rows = min(block_rows, num_rows - block * block_rows)
+            df = generate_block(np.random.default_rng(block_seed), first_id + block * block_rows,
+                                rows, role_skew, null_rates)
+            if parquet:
+                table = df.to_arrow()
+                writer = writer or pq.ParquetWriter(f, table.schema, compression="zstd")
+                writer.write_table(table)
+            else:
+                df.write_csv(f, include_header=block == 0)
+        if writer is not None:
+            writer.close()
+    return file_path
+
+def generate_large_employee_csv(file_path: Path, num_rows: int = 100_000, seed: Optional[int] = None,
+                                role_skew: float = 0.0, null_rates: Optional[Dict[str, float]] = None,
+                                block_rows: int = DEFAULT_BLOCK_ROWS):
+    """Write num_rows employees to file_path (.parquet suffix -> Parquet, else CSV)."""
+    _write_blocks(file_path, 1, num_rows, np.random.SeedSequence(seed), block_rows, role_skew, null_rates)
+
+def generate_sharded(output_dir: Path, num_rows: int, shards: int, workers: Optional[int] = None,
+                     seed: Optional[int] = None, fmt: str = "csv", role_skew: float = 0.0,
+                     null_rates: Optional[Dict[str, float]] = None,
+                     block_rows: int = DEFAULT_BLOCK_ROWS) -> List[Path]:
+    """Split num_rows over `shards` files (employees-00000.csv, ...) written in parallel."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    shard_seeds = np.random.SeedSequence(seed).spawn(shards)
+    base, extra = divmod(num_rows, shards)
+    jobs, first_id = [], 1
+    for shard in range(shards):
+        rows = base + (shard < extra)
+        jobs.append((output_dir / f"employees-{shard:05d}.{fmt}", first_id, rows, shard_seeds[shard]))
+        first_id += rows
+    # spawn, not fork: Polars' thread pool does not survive a fork.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        futures = [pool.submit(_write_blocks, path, first, rows, shard_seed, block_rows,
+                               role_skew, null_rates) for path, first, rows, shard_seed in jobs]
+        return [future.result() for future in futures]
+
+def parse_null_rates(text: str) -> Dict[str, float]:
+    """'salary=0.01,location=0.05' -> {'salary': 0.01, 'location': 0.05}."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        column, _, rate = item.partition("=")
+        if column not in NULLABLE_COLUMNS:
+            raise ValueError(f"Unknown nullable column {column!r} (choose from {NULLABLE_COLUMNS})")
+        rates[column] = float(rate)
+    return rates
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic employee data (CSV or Parquet).")
+    parser.add_argument("-o", "--output", type=Path, default=Path(src_path + "/resources/employees.csv"),
+                        help="Output file, or output directory with --shards.")
+    parser.add_argument("-n", "--rows", type=int, default=200_000, help="Total rows (default: 200000).")
+    parser.add_argument("--shards", type=int, default=0, help="Write this many shard files in parallel.")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for --shards (default: CPU count).")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="Shard file format.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible output.")
+    parser.add_argument("--role-skew", type=float, default=0.0,
+                        help="Zipf exponent for the role distribution (0 = uniform).")
+    parser.add_argument("--null-rate", type=str, default="",
+                        help="Per-column null rates, e.g. salary=0.01,location=0.05.")
+    parser.add_argument("--block-rows", type=int, default=DEFAULT_BLOCK_ROWS,
+                        help=f"Rows generated per block (default: {DEFAULT_BLOCK_ROWS}).")
+    args = parser.parse_args()
+    try:
+        null_rates = parse_null_rates(args.null_rate)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    if args.shards:
+        paths = generate_sharded(args.output, args.rows, args.shards, args.workers, args.seed,
+                                 args.format, args.role_skew, null_rates, args.block_rows)
+        print(f"✅ {len(paths)} shards generated in {args.output} with {args.rows:,} rows")
+    else:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        generate_large_employee_csv(args.output, args.rows, args.seed, args.role_skew,
+                                    null_rates, args.block_rows)
+        print(f"✅ {args.output.name} generated with {args.rows:,} rows")
 
 if __name__ == "__main__":
-    generate_large_employee_csv(Path(src_path + "/resources/employees.csv"), num_rows=200_000)
-    print("✅ employees.csv generated with 200,000 rows")
\ No newline at end of file
+    main()
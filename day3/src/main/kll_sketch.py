@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Day 3: KLL streaming quantile sketch
+A mergeable approximate-quantile summary (Karnin, Lang & Liberty, 2016).
+Level h holds items standing for 2**h inputs each; when a level outgrows its
+capacity it is sorted and every other item (random offset) is promoted to
+the next level. Memory stays a small multiple of k items however many values
+are added, and two sketches merge by concatenating levels, so partial
+sketches from chunks or worker processes combine into one.
+"""
+
+import math
+from typing import List
+
+import numpy as np
+
+DEFAULT_ERROR = 0.01
+CAPACITY_DECAY = 2 / 3
+
+class KLLSketch:
+    """Quantiles of a stream of numbers, rank error within about `error` * count."""
+
+    def __init__(self, error: float = DEFAULT_ERROR, seed: int = 0):
+        if not 0 < error < 1:
+            raise ValueError(f"error must be in (0, 1), got {error}")
+        self.error = error
+        self.k = max(8, math.ceil(2 / error))
+        self.count = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        """Items retained (not values seen)."""
+        return sum(len(level) for level in self.levels)
+
+    def _capacity(self, level: int) -> int:
+        return max(2, math.ceil(self.k * CAPACITY_DECAY ** (len(self.levels) - level - 1)))
+
+    def update(self, values) -> "KLLSketch":
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size:
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.count += values.size
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        self.levels.extend(np.empty(0) for _ in range(len(other.levels) - len(self.levels)))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        # Lazy KLL: while over the total budget, compact the lowest full level.
+        while len(self) > sum(self._capacity(level) for level in range(len(self.levels))):
+            level = next(h for h, items in enumerate(self.levels) if len(items) >= self._capacity(h))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            odd = len(items) % 2  # an odd item out stays behind at full weight
+            promoted = items[odd:][self._rng.integers(2)::2]
+            self.levels[level] = items[:odd]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def quantile(self, q: float) -> float:
+        """Weighted-rank quantile, interpolated linearly between neighbouring retained
+        items (numpy's 'linear' method, exact until the first compaction; NaN if empty)."""
+        if not self.count:
+            return math.nan
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level, dtype=np.int64)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, ranks = values[order], np.cumsum(weights[order])
+        target = q * (ranks[-1] - 1)  # 0-based position among the values seen
+        lower = math.floor(target)
+        below = int(np.searchsorted(ranks, lower, "right"))
+        above = min(int(np.searchsorted(ranks, lower + 1, "right")), len(values) - 1)
+        return float(values[below] + (target - lower) * (values[above] - values[below]))
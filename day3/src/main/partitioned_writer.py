@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Day 3: Partitioned output of the filtered rows
+Streams the input CSV(s) through PyArrow's multithreaded CSV reader, keeps the
+rows above the salary threshold and splits them by one column into a
+Hive-style dataset (role=QA/part-00000.parquet). Each partition buffers rows
+up to one row group; full buffers are encoded and written concurrently by a
+thread pool, as the Parquet and CSV writers release the GIL. A _manifest.json
+lists every partition with its value, path, row count, size and salary range,
+so readers can prune partitions without listing directories.
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+if __package__:
+    from .etl_schema import arrow_column_types
+else:
+    from etl_schema import arrow_column_types
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+logger = logging.getLogger("partitioned_writer")
+
+PARTITION_COLUMNS = ["role", "location"]
+FORMATS = ["parquet", "csv"]
+COMPRESSIONS = {
+    "parquet": ["zstd", "snappy", "gzip", "lz4", "brotli", "none"],
+    "csv": ["none", "gzip"],
+}
+DEFAULT_FORMAT = "parquet"
+DEFAULT_ROW_GROUP_ROWS = 250_000
+MANIFEST_NAME = "_manifest.json"
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"  # Hive's directory name for a missing key
+
+def partition_segment(column: str, value: Optional[str]) -> str:
+    """'role', 'Data Scientist' -> 'role=Data%20Scientist' (URI-encoded, as PyArrow expects)."""
+    return f"{column}={NULL_PARTITION if value is None else quote(value, safe='')}"
+
+def split_by(table: "pa.Table", column: str) -> Iterator[Tuple[Optional[str], "pa.Table"]]:
+    """(value, rows) for each distinct value of column in a single-chunk table; None for nulls."""
+    import numpy as np
+    import pyarrow.compute as pc
+    encoded = pc.dictionary_encode(table[column].combine_chunks())
+    codes = encoded.indices.fill_null(-1).to_numpy()
+    for code, value in enumerate([None] + encoded.dictionary.to_pylist(), start=-1):
+        rows = np.flatnonzero(codes == code)
+        if len(rows):
+            yield value, table.take(rows)
+
+class _PartitionWriter:
+    """One partition's file, fed whole row groups; flush/close run on the writer pool."""
+
+    def __init__(self, dataset_dir: Path, column: str, value: Optional[str], fmt: str, compression: str,
+                 row_group_rows: int):
+        self.column, self.value, self.fmt, self.compression = column, value, fmt, compression
+        self.row_group_rows = row_group_rows
+        suffix = ".csv.gz" if fmt == "csv" and compression == "gzip" else f".{fmt}"
+        self.relative_path = f"{partition_segment(column, value)}/part-00000{suffix}"
+        self.path = dataset_dir / self.relative_path
+        self.buffer: List["pa.Table"] = []
+        self.buffered = 0
+        self.rows = 0
+        self.row_groups = 0
+        self.salary_min = self.salary_max = None
+        self._schema = None
+        self._writer = None
+        self._sink = None
+
+    def append(self, rows: "pa.Table") -> None:
+        self.buffer.append(rows.drop_columns([self.column]))  # the value lives in the path
+        self.buffered += rows.num_rows
+
+    def flush(self, final: bool = False) -> None:
+        """Write whole row groups of row_group_rows; the remainder waits unless final."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        size = self.buffered if final else self.buffered // self.row_group_rows * self.row_group_rows
+        if not size:
+            return
+        buffered = pa.concat_tables(self.buffer)
+        table, rest = buffered.slice(0, size), buffered.slice(size)
+        self.buffer, self.buffered = ([rest] if rest.num_rows else []), rest.num_rows
+        if self._writer is None:
+            self._open(table.schema)
+        table = table.cast(self._schema).combine_chunks()  # one chunk per reader batch would split row groups
+        for group in table.to_batches(max_chunksize=self.row_group_rows):
+            if self.fmt == "parquet":
+                self._writer.write_batch(group, row_group_size=self.row_group_rows)
+            else:
+                self._writer.write_batch(group)
+            self.row_groups += 1
+        self.rows += table.num_rows
+        if "salary" in table.column_names:
+            bounds = pc.min_max(table["salary"]).as_py()
+            if bounds["min"] is not None:
+                self.salary_min = bounds["min"] if self.salary_min is None else min(self.salary_min, bounds["min"])
+                self.salary_max = bounds["max"] if self.salary_max is None else max(self.salary_max, bounds["max"])
+
+    def _open(self, schema: "pa.Schema") -> None:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        import pyarrow.parquet as pq
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._schema = schema
+        if self.fmt == "parquet":
+            self._writer = pq.ParquetWriter(self.path, schema,
+                                            compression=None if self.compression == "none" else self.compression)
+        else:
+            self._sink = (pa.CompressedOutputStream(str(self.path), "gzip") if self.compression == "gzip"
+                          else pa.OSFile(str(self.path), "wb"))
+            self._writer = pacsv.CSVWriter(self._sink, schema)
+
+    def close(self) -> Dict:
+        self.flush(final=True)
+        if self._writer is not None:
+            self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        return {
+            "value": self.value,
+            "path": self.relative_path,
+            "rows": self.rows,
+            "row_groups": self.row_groups,
+            "bytes": self.path.stat().st_size,
+            "salary_min": self.salary_min,
+            "salary_max": self.salary_max,
+        }
+
+def write_partitioned(inputs: Sequence[Path], dataset_dir: Path, threshold: int, partition_by: str = "role",
+                      fmt: str = DEFAULT_FORMAT, compression: Optional[str] = None,
+                      row_group_rows: int = DEFAULT_ROW_GROUP_ROWS, threads: Optional[int] = None) -> Dict:
+    """Write rows with salary > threshold as a Hive-partitioned dataset; returns its manifest.
+
+    The dataset is built in a staging directory and moved into place, so
+    readers never see half a dataset. An existing dataset_dir is replaced
+    only if it holds a manifest (i.e. was written here).
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    if partition_by not in PARTITION_COLUMNS:
+        raise ValueError(f"Cannot partition by {partition_by!r} (choose from {PARTITION_COLUMNS})")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r} (choose from {FORMATS})")
+    compression = compression or COMPRESSIONS[fmt][0]
+    if compression not in COMPRESSIONS[fmt]:
+        raise ValueError(f"{fmt} output supports compression {COMPRESSIONS[fmt]}, not {compression!r}")
+    if row_group_rows < 1:
+        raise ValueError("row_group_rows must be at least 1")
+    dataset_dir = Path(dataset_dir)
+    if dataset_dir.exists() and any(dataset_dir.iterdir()) and not (dataset_dir / MANIFEST_NAME).exists():
+        raise FileExistsError(f"{dataset_dir} exists and is not a partitioned dataset; refusing to replace it")
+
+    start = time.perf_counter()
+    staging = dataset_dir.with_name(f".{dataset_dir.name}.{os.getpid()}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    convert = pacsv.ConvertOptions(column_types=arrow_column_types(), strings_can_be_null=True)
+    writers: Dict[Optional[str], _PartitionWriter] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for input_csv in inputs:
+                with pacsv.open_csv(input_csv, convert_options=convert) as reader:
+                    for batch in reader:
+                        table = pa.Table.from_batches([batch])
+                        table = table.filter(pc.greater(table["salary"], threshold))  # null salaries drop out
+                        for value, rows in split_by(table, partition_by):
+                            writer = writers.get(value)
+                            if writer is None:
+                                writer = writers[value] = _PartitionWriter(
+                                    staging, partition_by, value, fmt, compression, row_group_rows)
+                            writer.append(rows)
+                        # A partition gets at most one flush per round, so its file is never written twice at once.
+                        full = [w for w in writers.values() if w.buffered >= row_group_rows]
+                        list(pool.map(_PartitionWriter.flush, full))
+            ordered = sorted(writers.values(), key=lambda w: (w.value is not None, w.value or ""))
+            partitions = list(pool.map(_PartitionWriter.close, ordered))
+        manifest = {
+            "format": fmt,
+            "compression": compression,
+            "partition_by": partition_by,
+            "threshold": threshold,
+            "row_group_rows": row_group_rows,
+            "inputs": [str(p) for p in inputs],
+            "total_rows": sum(p["rows"] for p in partitions),
+            "partitions": partitions,
+        }
+        (staging / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        shutil.rmtree(dataset_dir, ignore_errors=True)
+        os.replace(staging, dataset_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(f"Wrote {manifest['total_rows']} rows in {len(partitions)} {fmt} partition(s) by {partition_by} "
+                f"in {elapsed:.2f} ms. Dataset saved to {dataset_dir}")
+    return manifest
+
+def read_manifest(dataset_dir: Path) -> Dict:
+    return json.loads((Path(dataset_dir) / MANIFEST_NAME).read_text(encoding="utf-8"))
+
+def partition_files(dataset_dir: Path, values: Optional[Sequence[Optional[str]]] = None) -> List[Path]:
+    """Files holding the given partition values (all if None), from the manifest alone."""
+    manifest = read_manifest(dataset_dir)
+    return [Path(dataset_dir) / p["path"] for p in manifest["partitions"]
+            if values is None or p["value"] in values]
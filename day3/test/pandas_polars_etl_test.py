@@ -1,6 +1,10 @@
 import csv
+import json
+import subprocess
 import sys
 from pathlib import Path
+import numpy as np
+import polars as pl
 import pytest
 
 import os
@@ -10,6 +14,27 @@ sys.path.insert(0, src_path)  # noqa
 
 from src.main.pandas_etl import pandas_etl
 from src.main.polars_etl import polars_etl
+from src.main.columnar_cache import ColumnarCache
+import src.main.engine_auto as engine_auto
+import src.main.etl_cli as etl_cli
+from src.main.etl_cli import pandas_chunked_etl, polars_lazy_etl, polars_lazy_plan
+from src.main.etl_cli import pandas_etl as pandas_etl_cli, polars_etl as polars_etl_cli
+from src.main.etl_cli import main as etl_cli_main, duckdb_etl, numpy_etl
+from src.main.etl_aggregates import parse_aggs
+from src.main.engine_auto import PROFILE_VERSION, choose_engine, host_signature, load_profile
+import src.main.etl_bench as etl_bench
+from src.main.etl_bench import parse_size
+from src.main.etl_parallel import map_reduce_etl, resolve_inputs
+from src.main.etl_schema import memory_report
+from src.main.kll_sketch import KLLSketch
+from src.main.partitioned_writer import MANIFEST_NAME, partition_files, write_partitioned
+from src.main.generate_data import generate_large_employee_csv, generate_sharded, parse_null_rates
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Keep --cache runs and engine profiles out of the real ~/.cache."""
+    monkeypatch.setattr(etl_cli, "DEFAULT_CACHE_DIR", tmp_path / "default_cache")
+    monkeypatch.setattr(engine_auto, "DEFAULT_PROFILE_PATH", tmp_path / "default_cache" / "engine_profile.json")
 
 @pytest.fixture
 def sample_csv(tmp_path: Path):
@@ -40,4 +65,508 @@ def test_polars_etl(sample_csv: Path, tmp_path: Path):
     assert out_file.exists()
     with out_file.open("r", encoding="utf-8") as f:
         rows = list(csv.DictReader(f))
-    assert any(r["role"] == "Developer" and float(r["avg_salary"]) > 120000 for r in rows)
\ No newline at end of file
+    assert any(r["role"] == "Developer" and float(r["avg_salary"]) > 120000 for r in rows)
+
+def test_pandas_chunked_etl_matches_in_memory(tmp_path: Path):
+    generated = tmp_path / "generated.csv"
+    generate_large_employee_csv(generated, num_rows=5_000)
+    expected, actual = tmp_path / "expected.csv", tmp_path / "chunked.csv"
+
+    pandas_etl(generated, expected, threshold=120_000)
+    pandas_chunked_etl(generated, actual, threshold=120_000, chunk_rows=333)
+
+    assert actual.read_bytes() == expected.read_bytes()
+
+def test_pandas_chunked_etl_no_matches(sample_csv: Path, tmp_path: Path):
+    out_file = tmp_path / "empty.csv"
+    pandas_chunked_etl(sample_csv, out_file, threshold=1_000_000, chunk_rows=2)
+    assert out_file.read_text(encoding="utf-8").splitlines() == ["role,avg_salary"]
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_polars_lazy_etl_matches_pandas(tmp_path: Path, streaming: bool):
+    generated = tmp_path / "generated.csv"
+    generate_large_employee_csv(generated, num_rows=5_000)
+    expected, actual = tmp_path / "expected.csv", tmp_path / "lazy.csv"
+
+    pandas_etl(generated, expected, threshold=120_000)
+    polars_lazy_etl(generated, actual, threshold=120_000, streaming=streaming)
+
+    with expected.open(encoding="utf-8") as f:
+        want = [(r["role"], float(r["avg_salary"])) for r in csv.DictReader(f)]
+    with actual.open(encoding="utf-8") as f:
+        got = [(r["role"], float(r["avg_salary"])) for r in csv.DictReader(f)]
+    assert [role for role, _ in got] == [role for role, _ in want]
+    assert [avg for _, avg in got] == pytest.approx([avg for _, avg in want])
+
+def test_polars_lazy_plan_pushes_down_projection_and_filter(sample_csv: Path):
+    plan = polars_lazy_plan(sample_csv, threshold=100_000).explain()
+    assert "PROJECT 2/5 COLUMNS" in plan
+    assert "SELECTION" in plan
+
+@pytest.mark.parametrize("engine", ["pandas", "pandas-chunked", "polars", "polars-lazy"])
+def test_columnar_cache_matches_csv_parsing(tmp_path: Path, engine: str):
+    generated = tmp_path / "generated.csv"
+    generate_large_employee_csv(generated, num_rows=2_000)
+    cache = ColumnarCache(tmp_path / "cache")
+    run = {
+        "pandas": pandas_etl_cli,
+        "pandas-chunked": lambda i, o, t, cache=None: pandas_chunked_etl(i, o, t, 300, cache),
+        "polars": polars_etl_cli,
+        "polars-lazy": lambda i, o, t, cache=None: polars_lazy_etl(i, o, t, cache=cache),
+    }[engine]
+    expected = tmp_path / "expected.csv"
+    run(generated, expected, 120_000)
+
+    for attempt in ("miss", "hit"):
+        out = tmp_path / f"{attempt}.csv"
+        run(generated, out, 120_000, cache=cache)
+        if engine == "polars":  # eager polars group_by order is not deterministic
+            assert sorted(out.read_text().splitlines()) == sorted(expected.read_text().splitlines())
+        else:
+            assert out.read_bytes() == expected.read_bytes()
+    assert len(list((tmp_path / "cache").glob("*.arrow"))) == 1
+
+@pytest.mark.parametrize("engine", ["pandas", "pandas-chunked", "polars", "polars-lazy"])
+def test_lean_schema_matches_inferred_dtypes(tmp_path: Path, engine: str):
+    generated = tmp_path / "generated.csv"
+    generate_large_employee_csv(generated, num_rows=5_000, seed=3,
+                                null_rates={"salary": 0.05, "location": 0.05})
+    expected, actual = tmp_path / "expected.csv", tmp_path / "lean.csv"
+    pandas_etl(generated, expected, threshold=120_000)  # plain read_csv, inferred dtypes
+    {
+        "pandas": lambda: pandas_etl_cli(generated, actual, 120_000),
+        "pandas-chunked": lambda: pandas_chunked_etl(generated, actual, 120_000, chunk_rows=700),
+        "polars": lambda: polars_etl_cli(generated, actual, 120_000),
+        "polars-lazy": lambda: polars_lazy_etl(generated, actual, 120_000),
+    }[engine]()
+
+    with expected.open(encoding="utf-8") as f:
+        want = sorted((r["role"], float(r["avg_salary"])) for r in csv.DictReader(f))
+    with actual.open(encoding="utf-8") as f:
+        got = sorted((r["role"], float(r["avg_salary"])) for r in csv.DictReader(f))
+    assert [role for role, _ in got] == [role for role, _ in want]
+    assert [avg for _, avg in got] == pytest.approx([avg for _, avg in want])
+
+def test_memory_report_shows_lean_schema_is_smaller(tmp_path: Path):
+    generated = tmp_path / "generated.csv"
+    generate_large_employee_csv(generated, num_rows=20_000, seed=1)
+    report = memory_report(generated)
+    for sizes in report.values():
+        assert 0 < sizes["lean_mb"] < sizes["inferred_mb"] / 2
+
+@pytest.fixture
+def partitions(tmp_path: Path):
+    """Four generated CSV partitions plus one file holding them all concatenated."""
+    shards = generate_sharded(tmp_path / "parts", num_rows=6_000, shards=4, workers=1, seed=5,
+                              null_rates={"salary": 0.02})
+    combined = tmp_path / "combined.csv"
+    lines = [line for i, shard in enumerate(shards)
+             for line in shard.read_text(encoding="utf-8").splitlines()[(i > 0):]]
+    combined.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return shards, combined
+
+@pytest.mark.parametrize("engine", ["pandas", "pandas-chunked", "polars", "polars-lazy", "numpy"])
+def test_map_reduce_matches_concatenated_input(partitions, tmp_path: Path, engine: str):
+    shards, combined = partitions
+    expected, actual = tmp_path / "expected.csv", tmp_path / "merged.csv"
+    pandas_etl_cli(combined, expected, 120_000)
+    map_reduce_etl(shards, actual, 120_000, engine=engine, workers=1, chunk_rows=500)
+
+    if engine != "polars" and engine != "polars-lazy":
+        assert actual.read_bytes() == expected.read_bytes()
+    else:
+        with expected.open(encoding="utf-8") as f:
+            want = [(r["role"], float(r["avg_salary"])) for r in csv.DictReader(f)]
+        with actual.open(encoding="utf-8") as f:
+            got = [(r["role"], float(r["avg_salary"])) for r in csv.DictReader(f)]
+        assert [role for role, _ in got] == [role for role, _ in want]
+        assert [avg for _, avg in got] == pytest.approx([avg for _, avg in want])
+
+def test_numpy_etl_matches_pandas(tmp_path: Path):
+    generated = tmp_path / "generated.csv"
+    generate_large_employee_csv(generated, num_rows=5_000, seed=7,
+                                null_rates={"role": 0.02, "salary": 0.05})
+    with generated.open("a", encoding="utf-8") as f:
+        f.write('Employee_x,"QA, Sr",150000,"Berlin",4\n')  # quoted field with a comma
+    expected, actual = tmp_path / "expected.csv", tmp_path / "numpy.csv"
+    pandas_etl(generated, expected, threshold=120_000)
+    numpy_etl(generated, actual, threshold=120_000)
+    assert actual.read_bytes() == expected.read_bytes()
+
+def test_duckdb_etl_matches_pandas_and_spills(tmp_path: Path):
+    generated = tmp_path / "generated.csv"
+    generate_large_employee_csv(generated, num_rows=5_000, seed=7,
+                                null_rates={"role": 0.02, "salary": 0.05})
+    expected, actual = tmp_path / "expected.csv", tmp_path / "duckdb.csv"
+    pandas_etl(generated, expected, threshold=120_000)
+    duckdb_etl(generated, actual, threshold=120_000, threads=2,
+               spill_dir=tmp_path / "spill", memory_limit="64MB")
+    assert actual.read_bytes() == expected.read_bytes()
+
+def test_numpy_etl_header_only(tmp_path: Path):
+    empty, out_file = tmp_path / "empty.csv", tmp_path / "out.csv"
+    empty.write_text("name,role,salary,location,years_experience\n", encoding="utf-8")
+    numpy_etl(empty, out_file, threshold=100_000)
+    assert out_file.read_text(encoding="utf-8").splitlines() == ["role,avg_salary"]
+
+def test_etl_cli_import_does_not_load_pandas_or_polars():
+    code = ("import sys; sys.path.insert(0, sys.argv[1]); import etl_cli; "
+            "print(sorted({'pandas', 'polars', 'pyarrow'} & set(sys.modules)))")
+    out = subprocess.run([sys.executable, "-c", code, str(Path(src_path) / "src" / "main")],
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+def test_resolve_inputs_expands_directories_and_globs(partitions):
+    shards, _ = partitions
+    parts = shards[0].parent
+    assert resolve_inputs([parts]) == shards
+    assert resolve_inputs([str(parts / "*-0000[01].csv"), shards[1]]) == shards[:2]
+
+def test_cli_glob_input_runs_parallel_workers(partitions, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    shards, combined = partitions
+    expected, actual = tmp_path / "expected.csv", tmp_path / "merged.csv"
+    pandas_etl_cli(combined, expected, 100_000)
+    monkeypatch.setattr(sys, "argv", [
+        "etl_cli", "-i", str(shards[0].parent / "*.csv"), "-o", str(actual),
+        "--workers", "2", "--no-cache",
+    ])
+    etl_cli_main()
+    assert actual.read_bytes() == expected.read_bytes()
+
+def test_cli_duckdb_reads_all_partitions(partitions, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    shards, combined = partitions
+    expected, actual = tmp_path / "expected.csv", tmp_path / "duckdb.csv"
+    pandas_etl_cli(combined, expected, 100_000)
+    monkeypatch.setattr(sys, "argv", [
+        "etl_cli", "-i", str(shards[0].parent), "-o", str(actual), "-e", "duckdb", "--threads", "2",
+    ])
+    etl_cli_main()
+    assert actual.read_bytes() == expected.read_bytes()
+
+def test_columnar_cache_is_content_addressed_and_evicts_lru(tmp_path: Path):
+    cache = ColumnarCache(tmp_path / "cache")
+    first, copy, other = tmp_path / "a.csv", tmp_path / "b.csv", tmp_path / "c.csv"
+    generate_large_employee_csv(first, num_rows=100)
+    copy.write_bytes(first.read_bytes())
+    generate_large_employee_csv(other, num_rows=100)
+
+    assert cache.columnar_path(first) == cache.columnar_path(copy)
+    cache.max_bytes = cache.columnar_path(first).stat().st_size * 3 // 2  # room for one entry, not two
+    kept = cache.columnar_path(other)
+
+    # Over budget: the least recently used entry goes, the one just written stays.
+    assert list((tmp_path / "cache").glob("*.arrow")) == [kept]
+
+def test_columnar_cache_never_keeps_an_entry_over_budget(tmp_path: Path):
+    source = tmp_path / "a.csv"
+    generate_large_employee_csv(source, num_rows=100)
+    cache = ColumnarCache(tmp_path / "cache", max_bytes=source.stat().st_size + 1)  # input fits, entry does not
+
+    assert cache.columnar_path(source) is None
+    assert ColumnarCache(tmp_path / "cache", max_bytes=1).columnar_path(source.read_bytes()) is None
+    assert cache.read_polars(source, columns=["role", "salary"]).height == 100  # parsed from the CSV instead
+    assert list((tmp_path / "cache").glob("*.arrow*")) == []
+
+@pytest.mark.parametrize("engine", ["pandas", "pandas-chunked", "polars", "polars-lazy", "numpy", "duckdb"])
+@pytest.mark.parametrize("cache", [[], ["--cache"]])
+@pytest.mark.parametrize("files", [1, 2])
+def test_cli_reads_fractional_salaries(engine: str, cache, files: int, tmp_path: Path,
+                                       monkeypatch: pytest.MonkeyPatch):
+    header = "name,role,salary,location,years_experience\n"
+    rows = ["Alice,Developer,99000.25,London,3\n", "Bob,Developer,120000.5,Berlin,5\n",
+            "Carol,QA,101000.75,Paris,2\n"]  # fractions that neither cancel nor round away
+    inp, out = tmp_path / "employees", tmp_path / "out.csv"
+    inp.mkdir()
+    for i, part in enumerate((rows,) if files == 1 else (rows[:1], rows[1:])):
+        (inp / f"part-{i}.csv").write_text(header + "".join(part), encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["etl_cli", "-i", str(inp), "-o", str(out), "-e", engine, "-t", "99000",
+                                      "--agg", "mean,min,max", "--workers", "1", *cache])
+    etl_cli_main()
+    assert read_metrics(out) == {
+        "Developer": {"avg_salary": 109500.375, "min_salary": 99000.25, "max_salary": 120000.5},
+        "QA": {"avg_salary": 101000.75, "min_salary": 101000.75, "max_salary": 101000.75},
+    }
+
+def test_cli_columnar_cache_is_opt_in(sample_csv: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    cache_dir = tmp_path / "default_cache"
+    for flags, entries in (([], 0), (["--cache"], 1)):
+        monkeypatch.setattr(sys, "argv", ["etl_cli", "-i", str(sample_csv), "-o", str(tmp_path / "out.csv"),
+                                          "-e", "polars", *flags])
+        etl_cli_main()
+        assert len(list(cache_dir.glob("*.arrow"))) == entries
+
+def test_bench_subcommand_writes_json_report(tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                                             capsys: pytest.CaptureFixture):
+    report_path = tmp_path / "bench.json"
+    monkeypatch.setattr(sys, "argv", [
+        "etl_cli", "bench",
+        "--sizes", "1k",
+        "--engines", "pandas,polars-lazy",
+        "--repeats", "2",
+        "--warmup", "0",
+        "--data-dir", str(tmp_path / "data"),
+        "--output", str(report_path),
+    ])
+    installed = etl_bench.version
+
+    def version_without_duckdb(lib):
+        if lib == "duckdb":
+            raise etl_bench.PackageNotFoundError(lib)
+        return installed(lib)
+
+    monkeypatch.setattr(etl_bench, "version", version_without_duckdb)  # an optional engine not installed
+    etl_cli_main()
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["meta"]["versions"]["duckdb"] is None
+    assert [(r["engine"], r["rows"]) for r in report["summary"]] == [("pandas", 1000), ("polars-lazy", 1000)]
+    assert len(report["results"]) == 4
+    assert all(r["wall_s"] > 0 and r["cpu_s"] >= 0 for r in report["results"])
+    assert "polars-lazy" in capsys.readouterr().out
+    assert parse_size("100M") == 100_000_000
+
+def test_generator_is_seeded_and_shards_reproducibly(tmp_path: Path):
+    a, b = tmp_path / "a.csv", tmp_path / "b.csv"
+    generate_large_employee_csv(a, num_rows=2_500, seed=7, block_rows=1_000)
+    generate_large_employee_csv(b, num_rows=2_500, seed=7, block_rows=1_000)
+    assert a.read_bytes() == b.read_bytes()
+    with a.open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 2_500 and rows[-1]["name"] == "Employee_2500"
+
+    serial = generate_sharded(tmp_path / "serial", 1_001, shards=3, workers=1, seed=7)
+    parallel = generate_sharded(tmp_path / "parallel", 1_001, shards=3, workers=2, seed=7)
+    assert [p.read_bytes() for p in serial] == [p.read_bytes() for p in parallel]
+    with serial[-1].open(encoding="utf-8") as f:
+        assert list(csv.DictReader(f))[-1]["name"] == "Employee_1001"
+
+def test_generator_parquet_with_skew_and_nulls(tmp_path: Path):
+    out = tmp_path / "employees.parquet"
+    generate_large_employee_csv(out, num_rows=20_000, seed=1, role_skew=1.5,
+                                null_rates=parse_null_rates("salary=0.1"))
+    df = pl.read_parquet(out)
+    counts = df["role"].value_counts(sort=True)
+    assert df.height == 20_000
+    assert counts["role"][0] == "Developer"  # rank 1 of the Zipf distribution
+    assert 0.08 < df["salary"].null_count() / df.height < 0.12
+
+ALL_AGGS = ["mean", "median", "p90", "p99", "min", "max", "count"]
+
+def read_metrics(path: Path):
+    with path.open(encoding="utf-8") as f:
+        return {r["role"]: {k: float(v) for k, v in r.items() if k != "role"} for r in csv.DictReader(f)}
+
+@pytest.mark.parametrize("engine", ["polars", "polars-lazy", "numpy", "duckdb"])
+def test_exact_multi_aggregates_agree_across_engines(tmp_path: Path, engine: str):
+    generated = tmp_path / "generated.csv"
+    generate_large_employee_csv(generated, num_rows=5_000, seed=11, null_rates={"salary": 0.05})
+    expected, actual = tmp_path / "expected.csv", tmp_path / "actual.csv"
+    pandas_etl_cli(generated, expected, 120_000, aggs=ALL_AGGS)
+    {
+        "polars": lambda: polars_etl_cli(generated, actual, 120_000, aggs=ALL_AGGS),
+        "polars-lazy": lambda: polars_lazy_etl(generated, actual, 120_000, aggs=ALL_AGGS),
+        "numpy": lambda: numpy_etl(generated, actual, 120_000, aggs=ALL_AGGS),
+        "duckdb": lambda: duckdb_etl(generated, actual, 120_000, aggs=ALL_AGGS),
+    }[engine]()
+
+    want, got = read_metrics(expected), read_metrics(actual)
+    assert expected.read_text().splitlines()[0] == \
+        "role,avg_salary,median_salary,p90_salary,p99_salary,min_salary,max_salary,count"
+    assert got.keys() == want.keys()
+    for role in want:
+        assert got[role] == pytest.approx(want[role])
+
+def test_sketched_percentiles_in_chunked_and_parallel_modes(partitions, tmp_path: Path):
+    shards, combined = partitions
+    exact, chunked, merged = tmp_path / "exact.csv", tmp_path / "chunked.csv", tmp_path / "merged.csv"
+    pandas_etl_cli(combined, exact, 100_000, aggs=ALL_AGGS)
+    pandas_chunked_etl(combined, chunked, 100_000, chunk_rows=400, aggs=ALL_AGGS, quantile_error=0.02)
+    map_reduce_etl(shards, merged, 100_000, engine="polars", workers=1, aggs=ALL_AGGS, quantile_error=0.02)
+
+    df = pl.read_csv(combined).filter(pl.col("salary") > 100_000)
+    want = read_metrics(exact)
+    for path in (chunked, merged):
+        got = read_metrics(path)
+        assert got.keys() == want.keys()
+        for role, metrics in got.items():
+            for agg in ("avg_salary", "min_salary", "max_salary", "count"):
+                assert metrics[agg] == pytest.approx(want[role][agg])  # exact
+            salaries = np.sort(df.filter(pl.col("role") == role)["salary"].to_numpy())
+            for agg, q in (("median_salary", 0.5), ("p90_salary", 0.9), ("p99_salary", 0.99)):
+                lo = np.searchsorted(salaries, metrics[agg], "left") / len(salaries)
+                hi = np.searchsorted(salaries, metrics[agg], "right") / len(salaries)
+                assert lo - 0.02 <= q <= hi + 0.02
+
+def test_kll_sketch_merges_within_error_bound():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(11, 0.5, 200_000)
+    parts = [KLLSketch(0.01, seed=i).update(chunk) for i, chunk in enumerate(np.array_split(values, 9))]
+    sketch = parts[0]
+    for part in parts[1:]:
+        sketch.merge(part)
+    assert sketch.count == len(values)
+    assert len(sketch) < 2_000  # bounded, not proportional to the input
+    ordered = np.sort(values)
+    for q in (0.01, 0.25, 0.5, 0.9, 0.99):
+        rank = np.searchsorted(ordered, sketch.quantile(q), "right") / len(values)
+        assert rank == pytest.approx(q, abs=0.01)
+
+def test_kll_sketch_interpolates_like_numpy_before_compaction():
+    values = np.array([120_000.0, 99_001.0, 101_000.0, 101_000.0, 250_000.0])
+    sketch = KLLSketch(0.01).update(values)
+    for q in (0.0, 0.1, 0.5, 0.75, 0.9, 0.99, 1.0):
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q))
+
+@pytest.mark.parametrize("engine", ["pandas", "pandas-chunked"])
+def test_cli_chunked_median_matches_in_memory(engine: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    inp, out = tmp_path / "employees.csv", tmp_path / "out.csv"
+    inp.write_text("name,role,salary,location,years_experience\n"
+                   "Alice,Developer,99001,London,3\nBob,Developer,120000,Berlin,5\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["etl_cli", "-i", str(inp), "-o", str(out), "-e", engine,
+                                      "-t", "99000", "--agg", "median,min,max"])
+    etl_cli_main()
+    assert read_metrics(out) == {"Developer": {"median_salary": 109500.5, "min_salary": 99001.0,
+                                               "max_salary": 120000.0}}
+
+def test_parse_aggs():
+    assert parse_aggs("Mean, p90 ,max,mean,p99.9") == ["mean", "p90", "max", "p99.9"]
+    for bad in ("", "avg", "p100", "p0"):
+        with pytest.raises(ValueError):
+            parse_aggs(bad)
+
+def synthetic_profile():
+    engines = {
+        "pandas": {"import_s": 0.5, "fixed_s": 0.01, "s_per_mb": 0.03, "mem_per_mb": 3.0},
+        "polars": {"import_s": 0.2, "fixed_s": 0.01, "s_per_mb": 0.002, "mem_per_mb": 2.0},
+        "polars-lazy": {"import_s": 0.2, "fixed_s": 0.01, "s_per_mb": 0.003, "mem_per_mb": 0.5},
+        "numpy": {"import_s": 0.0, "fixed_s": 0.001, "s_per_mb": 0.02, "mem_per_mb": 1.5},
+    }
+    return {"version": PROFILE_VERSION, "host": host_signature(), "engines": engines}
+
+def test_choose_engine_from_profile(sample_csv: Path, tmp_path: Path):
+    big = tmp_path / "big.csv"
+    with big.open("wb") as f:
+        f.truncate(500 * 1024 ** 2)  # sparse: only its size matters here
+    profile = synthetic_profile()
+
+    small = choose_engine([sample_csv], profile, cores=4, memory_mb=8_000)
+    assert (small.engine, small.mode) == ("numpy", "in-memory")
+    large = choose_engine([big], profile, cores=4, memory_mb=8_000)
+    assert (large.engine, large.mode) == ("polars", "in-memory")
+    assert "polars predicted fastest" in large.reason
+    short = choose_engine([big], profile, cores=4, memory_mb=300)
+    assert (short.engine, short.mode) == ("polars-lazy", "streaming")
+    sharded = choose_engine([sample_csv] * 3, profile, cores=2, memory_mb=8_000)
+    assert sharded.workers == 2
+
+def test_engine_profile_is_calibrated_once(tmp_path: Path):
+    path = tmp_path / "profile.json"
+    kwargs = {"engines": ["numpy", "pandas"], "rows": (1_000, 5_000), "data_dir": tmp_path / "data"}
+    profile = load_profile(path, **kwargs)
+    assert set(profile["engines"]) == {"numpy", "pandas"}
+    assert json.loads(path.read_text(encoding="utf-8")) == profile
+    assert all(p["s_per_mb"] >= 0 and p["mem_per_mb"] >= 0 for p in profile["engines"].values())
+    assert load_profile(path, engines=[]) == profile  # reused, not re-measured
+
+    stale = dict(profile, host=dict(profile["host"], cpu_count=-1))
+    path.write_text(json.dumps(stale), encoding="utf-8")
+    assert load_profile(path, engines=[])["engines"] == {}
+
+def test_cli_engine_auto_uses_profile(sample_csv: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                                      caplog: pytest.LogCaptureFixture):
+    path, expected, actual = tmp_path / "profile.json", tmp_path / "expected.csv", tmp_path / "auto.csv"
+    path.write_text(json.dumps(synthetic_profile()), encoding="utf-8")
+    pandas_etl_cli(sample_csv, expected, 100_000)
+    monkeypatch.setattr(sys, "argv", [
+        "etl_cli", "-i", str(sample_csv), "-o", str(actual), "-e", "auto", "--engine-profile", str(path),
+        "--explain",
+    ])
+    with caplog.at_level("INFO"):
+        etl_cli_main()
+    assert "--engine auto -> numpy (in-memory)" in caplog.text
+    assert "Ignoring --explain: only used by polars-lazy, auto picked numpy" in caplog.text
+    assert actual.read_bytes() == expected.read_bytes()
+
+def test_partitioned_parquet_matches_filtered_rows(tmp_path: Path):
+    import pandas as pd
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    generated = tmp_path / "generated.csv"
+    generate_large_employee_csv(generated, num_rows=5_000, seed=7,
+                                null_rates={"role": 0.02, "salary": 0.05})
+    dataset_dir = tmp_path / "by_role"
+    manifest = write_partitioned([generated], dataset_dir, 120_000, "role", row_group_rows=200, threads=3)
+
+    df = pd.read_csv(generated)
+    expected = df[df["salary"] > 120_000]
+    assert manifest["total_rows"] == len(expected)
+    counts = expected["role"].value_counts(dropna=False)
+    assert {p["value"]: p["rows"] for p in manifest["partitions"]} == {
+        (None if pd.isna(role) else role): n for role, n in counts.items()}
+    for part in manifest["partitions"]:
+        assert part["row_groups"] == -(-part["rows"] // 200)
+        assert pq.ParquetFile(dataset_dir / part["path"]).metadata.num_row_groups == part["row_groups"]
+        rows = expected[expected["role"].isna()] if part["value"] is None else expected[expected["role"] == part["value"]]
+        assert (part["salary_min"], part["salary_max"]) == (rows["salary"].min(), rows["salary"].max())
+
+    table = ds.dataset(dataset_dir, format="parquet", partitioning="hive").to_table()
+    assert table.num_rows == len(expected)
+    qa = ds.dataset(partition_files(dataset_dir, ["QA"]), format="parquet").to_table()
+    assert qa.num_rows == (expected["role"] == "QA").sum()
+    assert "role" not in qa.column_names  # Hive style: the value lives in the path
+
+def test_partitioned_row_groups_span_reader_batches(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+    generated = tmp_path / "generated.csv"
+    generate_large_employee_csv(generated, num_rows=5_000, seed=7)
+    open_csv = pacsv.open_csv
+    batches = []
+
+    def small_blocks(*args, **kwargs):  # a few dozen rows per reader batch
+        reader = open_csv(*args, read_options=pacsv.ReadOptions(block_size=4096), **kwargs)
+        batches.append(reader)
+        return reader
+
+    monkeypatch.setattr(pacsv, "open_csv", small_blocks)
+    manifest = write_partitioned([generated], tmp_path / "by_role", 0, "role", row_group_rows=500)
+    assert batches
+    for part in manifest["partitions"]:
+        metadata = pq.ParquetFile(tmp_path / "by_role" / part["path"]).metadata
+        sizes = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+        assert part["row_groups"] == len(sizes) == -(-part["rows"] // 500)
+        assert all(size == 500 for size in sizes[:-1])
+
+def test_cli_partitioned_csv_from_many_inputs(partitions, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import pandas as pd
+    shards, combined = partitions
+    output = tmp_path / "avg.csv"
+    monkeypatch.setattr(sys, "argv", [
+        "etl_cli", "-i", str(shards[0].parent), "-o", str(output), "-e", "numpy", "--workers", "1",
+        "--partition-by", "location", "--format", "csv", "--compression", "gzip", "--write-threads", "2",
+    ])
+    etl_cli_main()
+    dataset_dir = tmp_path / "avg_by_location"
+    manifest = json.loads((dataset_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    df = pd.read_csv(combined)
+    expected = df[df["salary"] > 100_000]
+    assert manifest["total_rows"] == len(expected)
+    for part in manifest["partitions"]:
+        rows = pd.read_csv(dataset_dir / part["path"])
+        assert part["path"].endswith(".csv.gz") and list(rows.columns) == ["name", "role", "salary",
+                                                                            "years_experience"]
+        assert sorted(rows["name"]) == sorted(expected.loc[expected["location"] == part["value"], "name"])
+
+def test_partitioned_writer_replaces_only_its_own_datasets(sample_csv: Path, tmp_path: Path):
+    dataset_dir = tmp_path / "by_role"
+    write_partitioned([sample_csv], dataset_dir, 100_000, fmt="csv")
+    first = write_partitioned([sample_csv], dataset_dir, 125_000, fmt="csv")  # rewrite in place
+    assert [p["value"] for p in first["partitions"]] == ["Developer", "Manager"]
+    assert sorted(p.name for p in dataset_dir.iterdir()) == [MANIFEST_NAME, "role=Developer", "role=Manager"]
+
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "keep.txt").write_text("x", encoding="utf-8")
+    with pytest.raises(FileExistsError):
+        write_partitioned([sample_csv], other, 100_000)
+    assert (other / "keep.txt").exists()
@@ -5,14 +5,31 @@ Author: Sundarapandiyan — Week 1 Transition Plan
 """
 
 import argparse
+import gzip
+import json
 import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+from multiprocessing import get_context
 from pathlib import Path
+from typing import Callable, List, Optional, Union
+from urllib.parse import quote
 
 import pandas as pd
 import polars as pl
 from transformers import pipeline
 
+# The columnar input cache is day3's columnar_cache module, shared rather than copied.
+sys.path.append(str(Path(__file__).resolve().parents[3] / "day3" / "src" / "main"))  # noqa
+from columnar_cache import CACHE_BY_DEFAULT, DEFAULT_CACHE_DIR, ColumnarCache  # noqa: E402
+
 # --- Logging Config ---
 logging.basicConfig(
     level=logging.INFO,
@@ -21,23 +38,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger("etl_ai_cli")
 
+# --- Ingestion Schema ---
+# The ETL reads only role/salary, with role dictionary-encoded instead of an
+# inferred object/string column. Salary is a float: fractional values parse.
+QUERY_COLUMNS = ["role", "salary"]
+PANDAS_DTYPES = {"role": "category", "salary": "Float64"}
+POLARS_DTYPES = {"role": pl.Categorical, "salary": pl.Float64}
+
 # --- ETL Functions ---
-def pandas_etl(input_csv: Path, output_csv: Path, threshold: int):
+# Each engine returns its result frame; output_csv=None keeps it in memory only.
+def pandas_etl(input_csv: Path, output_csv: Optional[Path], threshold: int,
+               cache: Optional[ColumnarCache] = None) -> pd.DataFrame:
     start = time.perf_counter()
-    df = pd.read_csv(input_csv)
+    if cache:
+        df = cache.read_pandas(input_csv, columns=QUERY_COLUMNS, dtype=PANDAS_DTYPES)
+    else:
+        df = pd.read_csv(input_csv, usecols=QUERY_COLUMNS, dtype=PANDAS_DTYPES)
+    logger.debug(f"Loaded {len(df)} rows into {df.memory_usage(deep=True).sum() / 1024 ** 2:.2f} MB")
     high_salary = df[df["salary"] > threshold]
     avg_salary_by_role = (
-        high_salary.groupby("role")["salary"]
+        high_salary.groupby("role", observed=True)["salary"]
         .mean()
         .reset_index()
         .rename(columns={"salary": "avg_salary"})
     )
-    avg_salary_by_role.to_csv(output_csv, index=False)
+    if output_csv is not None:
+        avg_salary_by_role.to_csv(output_csv, index=False)
     logger.info(f"Pandas ETL complete in {(time.perf_counter()-start)*1000:.2f} ms")
+    return avg_salary_by_role
 
-def polars_etl(input_csv: Path, output_csv: Path, threshold: int):
+def polars_etl(input_csv: Path, output_csv: Optional[Path], threshold: int,
+               cache: Optional[ColumnarCache] = None) -> pl.DataFrame:
     start = time.perf_counter()
-    df = pl.read_csv(input_csv)
+    if cache:
+        df = cache.read_polars(input_csv, columns=QUERY_COLUMNS, schema_overrides=POLARS_DTYPES)
+    else:
+        df = pl.read_csv(input_csv, columns=QUERY_COLUMNS, schema_overrides=POLARS_DTYPES)
+    logger.debug(f"Loaded {df.height} rows into {df.estimated_size() / 1024 ** 2:.2f} MB")
     result = (
         df.lazy()
         .filter(pl.col("salary") > threshold)
@@ -45,37 +82,321 @@ def polars_etl(input_csv: Path, output_csv: Path, threshold: int):
         .agg(pl.col("salary").mean().alias("avg_salary"))
         .collect()
     )
-    result.write_csv(output_csv)
+    if output_csv is not None:
+        result.write_csv(output_csv)
     logger.info(f"Polars ETL complete in {(time.perf_counter()-start)*1000:.2f} ms")
+    return result
 
-# --- AI Step ---
-def ai_inference(input_csv: Path, output_csv: Path):
+DUCKDB_QUERY = """
+    SELECT role, avg(salary) AS avg_salary
+    FROM read_csv(?, header = true)
+    WHERE salary > ? AND role IS NOT NULL
+    GROUP BY role
+    ORDER BY role
+"""
+DUCKDB_SPILL_DIR = Path(tempfile.gettempdir()) / "etl_duckdb_spill"
+
+def duckdb_etl(input_csv: Path, output_csv: Optional[Path], threshold: int,
+               threads: Optional[int] = None) -> pd.DataFrame:
+    """Filter + group-by as SQL over the CSV; DuckDB reads it in parallel and spills to disk if needed."""
+    import duckdb
+    start = time.perf_counter()
+    config = {"temp_directory": str(DUCKDB_SPILL_DIR)}
+    if threads:
+        config["threads"] = threads
+    with duckdb.connect(config=config) as con:
+        result = con.execute(DUCKDB_QUERY, [str(input_csv), threshold]).df()
+    if output_csv is not None:
+        result.to_csv(output_csv, index=False)
+    logger.info(f"DuckDB ETL complete in {(time.perf_counter()-start)*1000:.2f} ms")
+    return result
+
+# --- Partitioned Output ---
+# With --partition-by, the rows above the threshold are also written as a
+# Hive-style dataset (role=QA/part-00000.parquet, missing values under
+# __HIVE_DEFAULT_PARTITION__), one writer thread per partition, plus a
+# _manifest.json listing each partition's path, rows and size so readers can
+# prune partitions without listing directories.
+PARTITION_COLUMNS = ["role", "location"]
+PARTITION_COMPRESSIONS = {"parquet": ["zstd", "snappy", "gzip", "lz4", "brotli", "none"], "csv": ["none", "gzip"]}
+PARTITION_MANIFEST = "_manifest.json"
+
+def write_partitioned(input_csv: Path, dataset_dir: Path, threshold: int, partition_by: str = "role",
+                      fmt: str = "parquet", compression: Optional[str] = None, row_group_rows: int = 250_000,
+                      threads: Optional[int] = None) -> dict:
     start = time.perf_counter()
-    logger.info("Loading AI model (small, CPU-friendly)...")
-    classifier = pipeline("text-classification", model="distilbert-base-uncased-finetuned-sst-2-english")
-
-    df = pd.read_csv(input_csv)
-    categories = []
-    for _, row in df.iterrows():
-        role = row["role"]
-        """ avg_salary = row["avg_salary"]
-        # Simple rule-based label for demo (replace with model output if desired)
-        if avg_salary > 150_000:
-            label = "High"
-        elif avg_salary >= 100_000:
-            label = "Medium"
+    compression = compression or PARTITION_COMPRESSIONS[fmt][0]
+    if dataset_dir.exists() and any(dataset_dir.iterdir()) and not (dataset_dir / PARTITION_MANIFEST).exists():
+        raise FileExistsError(f"{dataset_dir} exists and is not a partitioned dataset; refusing to replace it")
+    rows = pl.read_csv(input_csv, schema_overrides={"salary": pl.Float64}).filter(pl.col("salary") > threshold)
+    staging = dataset_dir.with_name(f".{dataset_dir.name}.{os.getpid()}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+
+    def write(item) -> dict:
+        (value,), part = item
+        segment = "__HIVE_DEFAULT_PARTITION__" if value is None else quote(str(value), safe="")
+        suffix = ".csv.gz" if fmt == "csv" and compression == "gzip" else f".{fmt}"
+        relative = f"{partition_by}={segment}/part-00000{suffix}"
+        path = staging / relative
+        path.parent.mkdir(parents=True)
+        part = part.drop(partition_by)
+        if fmt == "parquet":
+            part.write_parquet(path, compression="uncompressed" if compression == "none" else compression,
+                               row_group_size=row_group_rows)
         else:
-            label = "Low"
-        categories.append(label) """
+            with (gzip.open(path, "wb") if compression == "gzip" else path.open("wb")) as f:
+                part.write_csv(f, batch_size=row_group_rows)
+        return {"value": value, "path": relative, "rows": part.height, "bytes": path.stat().st_size,
+                "salary_min": part["salary"].min(), "salary_max": part["salary"].max()}
+
+    try:
+        staging.mkdir(parents=True)
+        groups = sorted(rows.partition_by(partition_by, as_dict=True, maintain_order=False).items(),
+                        key=lambda kv: (kv[0][0] is not None, kv[0][0] or ""))
+        with ThreadPoolExecutor(max_workers=threads) as pool:  # Polars writers release the GIL
+            partitions = list(pool.map(write, groups))
+        manifest = {"format": fmt, "compression": compression, "partition_by": partition_by,
+                    "threshold": threshold, "row_group_rows": row_group_rows, "inputs": [str(input_csv)],
+                    "total_rows": rows.height, "partitions": partitions}
+        (staging / PARTITION_MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        shutil.rmtree(dataset_dir, ignore_errors=True)
+        os.replace(staging, dataset_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    logger.info(f"Partitioned output ({len(partitions)} {fmt} partitions by {partition_by}) written in "
+                f"{(time.perf_counter()-start)*1000:.2f} ms to {dataset_dir}")
+    return manifest
+
+# --- Batched Inference ---
+# Rows go through the pipeline in batches instead of one call per row. Texts
+# are sorted by token length so each batch pads to similar lengths, and
+# results are scattered back to row order. Starting at batch_size, the batch
+# doubles (up to max_batch_size) while the time per padded token keeps
+# dropping by at least ADAPTIVE_MIN_GAIN, then stays at the best size seen.
+DEFAULT_BATCH_SIZE = 32
+MAX_BATCH_SIZE = 256
+ADAPTIVE_MIN_GAIN = 0.05
+
+def token_lengths(classifier, texts: List[str]) -> List[int]:
+    tokenizer = getattr(classifier, "tokenizer", None)
+    if tokenizer is None:
+        return [len(text) for text in texts]  # characters as a proxy
+    return [len(ids) for ids in tokenizer(texts, truncation=True)["input_ids"]]
+
+def classify_batched(classifier, texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                     max_batch_size: int = MAX_BATCH_SIZE) -> List[dict]:
+    """One prediction per text, in input order, from length-sorted batched pipeline calls."""
+    lengths = token_lengths(classifier, texts)
+    order = sorted(range(len(texts)), key=lengths.__getitem__)
+    predictions: List[Optional[dict]] = [None] * len(texts)
+    size, best_size, best_cost, growing = batch_size, batch_size, float("inf"), batch_size < max_batch_size
+    pos = 0
+    while pos < len(order):
+        batch = order[pos:pos + size]
+        start = time.perf_counter()
+        outputs = classifier([texts[i] for i in batch], truncation=True, batch_size=len(batch))
+        cost = (time.perf_counter() - start) / (len(batch) * max(1, max(lengths[i] for i in batch)))
+        for i, output in zip(batch, outputs):
+            predictions[i] = output
+        pos += len(batch)
+        if growing and len(batch) == size:
+            if cost < best_cost * (1 - ADAPTIVE_MIN_GAIN):
+                best_size, best_cost = size, cost
+                size = min(size * 2, max_batch_size)
+                growing = size > best_size
+            else:
+                size, growing = best_size, False
+    logger.debug(f"Classified {len(texts)} texts with batch size {size}")
+    return predictions
+
+# --- Label Memo ---
+# Only the distinct texts are classified and their predictions broadcast back
+# to every row. With a memo, predictions also persist in SQLite keyed by
+# (model id, normalized text), so known values skip the model (and its load)
+# on later runs. The memo keeps at most max_entries rows, evicting the least
+# recently used. Normalizing case is safe because the model is uncased.
+MODEL_ID = "distilbert-base-uncased-finetuned-sst-2-english"
+DEFAULT_MEMO_ENTRIES = 100_000
+
+def normalize_text(text) -> Optional[str]:
+    """Collapsed, lower-cased text; None for a missing value, which is never classified."""
+    if text is None or pd.isna(text):
+        return None
+    return " ".join(str(text).split()).lower()
+
+class LabelMemo:
+    def __init__(self, path: Path, model_id: str = MODEL_ID, max_entries: int = DEFAULT_MEMO_ENTRIES):
+        self.path = Path(path)
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as con, con:
+            con.execute("CREATE TABLE IF NOT EXISTS labels (model TEXT NOT NULL, text TEXT NOT NULL, "
+                        "label TEXT NOT NULL, score REAL NOT NULL, used REAL NOT NULL, PRIMARY KEY (model, text))")
+            con.execute("CREATE INDEX IF NOT EXISTS labels_used ON labels (used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")  # concurrent readers while one process writes
+        return con
+
+    def get_many(self, texts: List[str]) -> dict:
+        found = {}
+        with closing(self._connect()) as con, con:
+            for start in range(0, len(texts), 500):  # stay under SQLite's bound-parameter limit
+                chunk = texts[start:start + 500]
+                rows = con.execute(f"SELECT text, label, score FROM labels WHERE model = ? "
+                                   f"AND text IN ({', '.join('?' * len(chunk))})", [self.model_id, *chunk])
+                found.update({text: {"label": label, "score": score} for text, label, score in rows})
+            con.executemany("UPDATE labels SET used = ? WHERE model = ? AND text = ?",
+                            [(time.time(), self.model_id, text) for text in found])
+        return found
 
-        # Actually run the model on the role text
-        prediction = classifier(role)[0]  # returns [{'label': 'POSITIVE', 'score': 0.99}]
-        categories.append(prediction["label"])
+    def put_many(self, predictions: dict) -> None:
+        with closing(self._connect()) as con, con:
+            con.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?, ?)",
+                            [(self.model_id, text, p["label"], p["score"], time.time())
+                             for text, p in predictions.items()])
+            con.execute("DELETE FROM labels WHERE rowid IN (SELECT rowid FROM labels ORDER BY used "
+                        "LIMIT max(0, (SELECT count(*) FROM labels) - ?))", [self.max_entries])
 
+def classify_texts(load_classifier, texts: List[str], memo: Optional[LabelMemo] = None,
+                   batch_size: int = DEFAULT_BATCH_SIZE, max_batch_size: int = MAX_BATCH_SIZE,
+                   workers: int = 1, threads: Optional[int] = None) -> List[Optional[dict]]:
+    """Predictions for texts in order, None for missing texts; the model is only loaded if needed.
 
-    df["salary_category"] = categories
-    df.to_csv(output_csv, index=False)
+    workers > 1 shards the unknown texts over an InferencePool (whose
+    workers load their own models) instead of calling load_classifier().
+    """
+    normalized = [normalize_text(text) for text in texts]
+    distinct = list(dict.fromkeys(text for text in normalized if text is not None))
+    known = memo.get_many(distinct) if memo else {}
+    missing = [text for text in distinct if text not in known]
+    if missing and workers > 1:
+        with InferencePool(min(workers, len(missing)), threads) as pool:
+            known.update(zip(missing, pool.classify(missing, batch_size, max_batch_size)))
+    elif missing:
+        if threads:
+            pin_inference_threads(threads)
+        known.update(zip(missing, classify_batched(load_classifier(), missing, batch_size, max_batch_size)))
+    if missing and memo:
+        memo.put_many({text: known[text] for text in missing})
+    logger.info(f"Classified {len(texts)} rows: {len(distinct)} distinct texts, "
+                f"{len(distinct) - len(missing)} from the memo, {len(missing)} through the model")
+    return [None if text is None else known[text] for text in normalized]
+
+# --- Sharded Inference ---
+# With --inference-workers N, texts are dealt round-robin to N spawned
+# processes, each holding its own model with torch pinned to `threads`
+# intra-op threads (by default cores // N, so N x threads fits the cores).
+# Each worker length-sorts and batches its shard; results come back in order.
+# Workers wait on a barrier until every model is loaded. A worker whose load
+# raises breaks the barrier, so startup fails at once; a load that hangs holds
+# the others for up to WORKER_START_TIMEOUT_S before startup fails.
+_WORKER_CLASSIFIER = None
+WORKER_START_TIMEOUT_S = 600
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        return os.cpu_count() or 1
+
+def pin_inference_threads(threads: int) -> None:
+    """Limit this process's OpenMP/BLAS pools and torch's intra-op pool to `threads`."""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+def load_default_classifier():
+    return pipeline("text-classification", model=MODEL_ID)
+
+def _init_inference_worker(threads: int, loader: Callable, ready) -> None:
+    global _WORKER_CLASSIFIER
+    pin_inference_threads(threads)
+    try:
+        _WORKER_CLASSIFIER = loader()
+    except BaseException:
+        ready.abort()  # release the workers waiting below instead of leaving them to time out
+        raise
+    ready.wait(timeout=WORKER_START_TIMEOUT_S)  # nobody takes work until every model is loaded
+
+def _worker_pid(_) -> int:
+    return os.getpid()
+
+def _classify_shard(texts: List[str], batch_size: int, max_batch_size: int) -> List[dict]:
+    return classify_batched(_WORKER_CLASSIFIER, texts, batch_size, max_batch_size)
+
+class InferencePool:
+    """N worker processes with a model each; loader must be picklable (a module-level callable)."""
+
+    def __init__(self, workers: int, threads: Optional[int] = None, loader: Callable = load_default_classifier):
+        self.workers = workers
+        self.threads = threads or max(1, available_cores() // workers)
+        self.loader = loader
+        self._pool = None
+        if workers * self.threads > available_cores():
+            logger.warning(f"{workers} inference workers x {self.threads} threads oversubscribe "
+                           f"{available_cores()} core(s)")
+
+    def __enter__(self) -> "InferencePool":
+        start = time.perf_counter()
+        # spawn, not fork: torch and Polars thread pools do not survive a fork
+        context = get_context("spawn")
+        self._pool = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_inference_worker,
+                                         initargs=(self.threads, self.loader, context.Barrier(self.workers)))
+        try:
+            list(self._pool.map(_worker_pid, range(self.workers)))  # start the workers and load their models now
+        except BrokenProcessPool as exc:
+            self._pool.shutdown()
+            raise RuntimeError("An inference worker failed to load its model; see its traceback above") from exc
+        logger.info(f"Started {self.workers} inference workers x {self.threads} threads "
+                    f"in {(time.perf_counter()-start)*1000:.2f} ms")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._pool.shutdown()
+
+    def classify(self, texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_batch_size: int = MAX_BATCH_SIZE) -> List[dict]:
+        shards = min(self.workers, len(texts))
+        predictions: List[Optional[dict]] = [None] * len(texts)
+        results = self._pool.map(_classify_shard, [texts[i::shards] for i in range(shards)],
+                                 [batch_size] * shards, [max_batch_size] * shards)
+        for i, shard in enumerate(results):
+            predictions[i::shards] = shard
+        return predictions
+
+# --- AI Step ---
+def to_pandas(frame: Union[pd.DataFrame, pl.DataFrame]) -> pd.DataFrame:
+    """ETL results as pandas; Polars frames are handed over as Arrow-backed columns, without a copy."""
+    return frame.to_pandas(use_pyarrow_extension_array=True) if isinstance(frame, pl.DataFrame) else frame
+
+def ai_inference(etl_result: Union[Path, pd.DataFrame, pl.DataFrame], output_csv: Optional[Path] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_batch_size: int = MAX_BATCH_SIZE,
+                 memo: Optional[LabelMemo] = None, inference_workers: int = 1,
+                 inference_threads: Optional[int] = None) -> pd.DataFrame:
+    """Label each row of an ETL result (a frame in memory, or a CSV of one); writes output_csv if given."""
+    start = time.perf_counter()
+
+    def load_classifier():
+        logger.info("Loading AI model (small, CPU-friendly)...")
+        return load_default_classifier()
+
+    df = pd.read_csv(etl_result) if isinstance(etl_result, Path) else to_pandas(etl_result)
+    # Run the model on the distinct role texts, a batch at a time
+    predictions = classify_texts(load_classifier, df["role"].tolist(), memo, batch_size, max_batch_size,
+                                 inference_workers, inference_threads)
+    df = df.assign(salary_category=[prediction and prediction["label"] for prediction in predictions])
+    if output_csv is not None:
+        df.to_csv(output_csv, index=False)
     logger.info(f"AI inference complete in {(time.perf_counter()-start)*1000:.2f} ms. Output saved to {output_csv}")
+    return df
 
 # --- CLI Entry Point ---
 def main():
@@ -83,26 +404,80 @@ def main():
     parser.add_argument("-i", "--input", type=Path, required=True, help="Path to input CSV file.")
     parser.add_argument("-o", "--output", type=Path, required=True, help="Path to output CSV file.")
     parser.add_argument("-t", "--threshold", type=int, default=100_000, help="Salary threshold.")
-    parser.add_argument("-e", "--engine", choices=["pandas", "polars"], default="pandas", help="ETL engine.")
+    parser.add_argument("-e", "--engine", choices=["pandas", "polars", "duckdb"], default="pandas", help="ETL engine.")
+    parser.add_argument("--threads", type=int, default=None, help="DuckDB worker threads (default: all cores).")
     parser.add_argument("--ai", action="store_true", help="Run AI inference after ETL.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Starting inference batch size (default: {DEFAULT_BATCH_SIZE}).")
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE,
+                        help=f"Largest adaptive batch size; equal to --batch-size to fix it (default: {MAX_BATCH_SIZE}).")
+    parser.add_argument("--inference-workers", type=int, default=1,
+                        help="Processes sharing the inference, each with its own model (default: 1, in-process).")
+    parser.add_argument("--inference-threads", type=int, default=None,
+                        help="Intra-op threads per inference process (default: cores // --inference-workers); "
+                             "workers x threads may not exceed the cores.")
+    parser.add_argument("--cache", action=argparse.BooleanOptionalAction, default=CACHE_BY_DEFAULT,
+                        help="Reuse an Arrow IPC copy of the input from the columnar cache "
+                             "(default: off unless $ETL_CACHE_DIR is set).")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR, help="Columnar cache directory.")
+    parser.add_argument("--memo", type=Path, default=os.environ.get("ETL_LABEL_MEMO"),
+                        help="SQLite file memoizing predictions across runs (default: $ETL_LABEL_MEMO, else off).")
+    parser.add_argument("--memo-entries", type=int, default=DEFAULT_MEMO_ENTRIES,
+                        help=f"Most predictions kept in the memo (default: {DEFAULT_MEMO_ENTRIES}).")
+    parser.add_argument("--partition-by", choices=PARTITION_COLUMNS, default=None,
+                        help="Also write the filtered rows as a Hive-style dataset partitioned by this column.")
+    parser.add_argument("--partition-dir", type=Path, default=None,
+                        help="Dataset directory for --partition-by (default: <output stem>_by_<column>).")
+    parser.add_argument("--format", choices=list(PARTITION_COMPRESSIONS), default="parquet",
+                        help="File format of the partitioned dataset.")
+    parser.add_argument("--compression", default=None,
+                        choices=sorted({c for codecs in PARTITION_COMPRESSIONS.values() for c in codecs}),
+                        help="Compression of the partition files (default: zstd for parquet, none for csv).")
+    parser.add_argument("--row-group-rows", type=int, default=250_000, help="Rows per Parquet row group.")
+    parser.add_argument("--write-threads", type=int, default=None, help="Threads writing partitions concurrently.")
     parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO", help="Logging level.")
 
     args = parser.parse_args()
+    if not 1 <= args.batch_size <= args.max_batch_size:
+        parser.error("--batch-size must be at least 1 and at most --max-batch-size")
+    if args.inference_workers < 1 or (args.inference_threads is not None and args.inference_threads < 1):
+        parser.error("--inference-workers and --inference-threads must be at least 1")
+    if args.inference_workers > 1 or args.inference_threads:
+        cores = available_cores()
+        threads = args.inference_threads or max(1, cores // args.inference_workers)
+        if args.inference_workers * threads > cores:
+            parser.error(f"--inference-workers {args.inference_workers} x {threads} thread(s) "
+                         f"oversubscribes {cores} core(s)")
+    if args.compression and args.compression not in PARTITION_COMPRESSIONS[args.format]:
+        parser.error(f"--format {args.format} supports --compression {', '.join(PARTITION_COMPRESSIONS[args.format])}")
+    if args.row_group_rows < 1:
+        parser.error("--row-group-rows must be at least 1")
+    if args.write_threads is not None and args.write_threads < 1:
+        parser.error("--write-threads must be at least 1")
     logging.getLogger().setLevel(args.log_level)
 
     total_start = time.perf_counter()
 
-    etl_output = args.output if not args.ai else Path("etl_temp.csv")
+    # With --ai the ETL result goes to inference in memory; only the final output is written
+    etl_output = None if args.ai else args.output
+    cache = ColumnarCache(args.cache_dir) if args.cache else None
 
     if args.engine == "pandas":
-        pandas_etl(args.input, etl_output, args.threshold)
+        result = pandas_etl(args.input, etl_output, args.threshold, cache)
+    elif args.engine == "duckdb":
+        result = duckdb_etl(args.input, etl_output, args.threshold, args.threads)
     else:
-        polars_etl(args.input, etl_output, args.threshold)
+        result = polars_etl(args.input, etl_output, args.threshold, cache)
+
+    if args.partition_by:
+        partition_dir = args.partition_dir or args.output.with_name(f"{args.output.stem}_by_{args.partition_by}")
+        write_partitioned(args.input, partition_dir, args.threshold, args.partition_by, args.format,
+                          args.compression, args.row_group_rows, args.write_threads)
 
     if args.ai:
-        ai_inference(etl_output, args.output)
-        if etl_output.exists():
-            etl_output.unlink()  # cleanup temp file
+        memo = LabelMemo(args.memo, max_entries=args.memo_entries) if args.memo else None
+        ai_inference(result, args.output, args.batch_size, args.max_batch_size, memo,
+                     args.inference_workers, args.inference_threads)
 
     logger.info(f"Total pipeline time: {(time.perf_counter()-total_start)*1000:.2f} ms")
 
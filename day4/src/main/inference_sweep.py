@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Day 4: Inference layout sweep
+Measures classification throughput of etl_ai_cli's sharded inference for
+each (workers, intra-op threads) layout, so --inference-workers and
+--inference-threads can be chosen per host. Every layout gets a fresh pool;
+its startup (process spawn + model load) is timed apart from the
+steady-state runs, which classify the same texts without deduplication.
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+if __package__:
+    from .etl_ai_cli import (DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, InferencePool, available_cores,
+                             load_default_classifier)
+else:
+    from etl_ai_cli import (DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, InferencePool, available_cores,
+                            load_default_classifier)
+
+logger = logging.getLogger("inference_sweep")
+
+ROLES = ["Developer", "QA", "Manager", "Data Scientist", "DevOps", "Designer"]
+SENIORITY = ["Junior", "Senior", "Lead", "Principal", "Staff", "Associate"]
+TEAMS = ["payments", "search", "platform", "mobile apps", "internal tooling", "customer data"]
+
+def sample_texts(count: int, seed: int = 0) -> List[str]:
+    """Distinct job-title phrases of varied length, shaped like the role column."""
+    rng = random.Random(seed)
+    return [f"{rng.choice(SENIORITY)} {rng.choice(ROLES)}" + " on the " * (i % 4 > 0)
+            + " and ".join(rng.sample(TEAMS, i % 4)) + f" #{i}" for i in range(count)]
+
+def parse_counts(text: str) -> List[int]:
+    """'1,2,4' -> [1, 2, 4]."""
+    counts = [int(part) for part in text.split(",") if part.strip()]
+    if not counts or min(counts) < 1:
+        raise ValueError(f"Expected positive comma-separated counts, got {text!r}")
+    return counts
+
+def layouts(cores: int, workers: Optional[Sequence[int]] = None, threads: Optional[Sequence[int]] = None,
+            oversubscribe: bool = False) -> List[Tuple[int, int]]:
+    """(workers, threads) pairs to try, with workers x threads <= cores.
+
+    By default counts are the powers of two and the divisors of cores, and
+    every worker count also gets cores // workers threads (the CLI default),
+    so some layouts fill all cores even when cores is not a power of two.
+    """
+    counts = sorted({2 ** i for i in range(cores.bit_length())} | {d for d in range(1, cores + 1) if cores % d == 0})
+    pairs = []
+    for w in workers or counts:
+        for t in sorted(set(threads or counts) | (set() if threads else {max(1, cores // w)})):
+            if oversubscribe or w * t <= cores:
+                pairs.append((w, t))
+    return pairs
+
+def sweep(texts: List[str], candidates: Sequence[Tuple[int, int]], batch_size: int = DEFAULT_BATCH_SIZE,
+          max_batch_size: int = MAX_BATCH_SIZE, repeat: int = 2,
+          loader: Callable = load_default_classifier) -> List[dict]:
+    results = []
+    for workers, threads in candidates:
+        start = time.perf_counter()
+        with InferencePool(workers, threads, loader) as pool:
+            pool.classify(texts[:workers * batch_size], batch_size, batch_size)  # first-call warm-up
+            startup_s = time.perf_counter() - start
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                pool.classify(texts, batch_size, max_batch_size)
+                runs.append(time.perf_counter() - start)
+        results.append({"workers": workers, "threads": threads, "startup_s": startup_s,
+                        "seconds": min(runs), "rows_per_s": len(texts) / max(min(runs), 1e-9)})
+        logger.info(f"{workers} worker(s) x {threads} thread(s): {results[-1]['rows_per_s']:.1f} rows/s")
+    if results:
+        baseline = results[0]["rows_per_s"]
+        for result in results:
+            result["speedup"] = result["rows_per_s"] / baseline
+    return results
+
+def format_table(results: List[dict]) -> str:
+    lines = [f"{'workers':>7} {'threads':>7} {'startup s':>9} {'run s':>8} {'rows/s':>10} {'speedup':>7}"]
+    lines += [f"{r['workers']:>7} {r['threads']:>7} {r['startup_s']:>9.2f} {r['seconds']:>8.3f} "
+              f"{r['rows_per_s']:>10.1f} {r['speedup']:>6.2f}x" for r in results]
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Throughput of each inference worker/thread layout.")
+    parser.add_argument("--rows", type=int, default=2_000, help="Texts classified per run (default: 2000).")
+    parser.add_argument("-i", "--input", type=Path, default=None,
+                        help="Take the texts from this CSV instead of generating them.")
+    parser.add_argument("--column", default="role", help="Text column of --input (default: role).")
+    parser.add_argument("--workers", type=str, default=None,
+                        help="Comma-separated worker counts (default: powers of two up to the cores).")
+    parser.add_argument("--threads", type=str, default=None,
+                        help="Comma-separated intra-op thread counts (default: powers of two up to the cores).")
+    parser.add_argument("--oversubscribe", action="store_true", help="Also try layouts with workers x threads > cores.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Starting batch size.")
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE, help="Largest adaptive batch size.")
+    parser.add_argument("--repeat", type=int, default=2, help="Timed runs per layout; the fastest counts.")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the results as JSON here.")
+    args = parser.parse_args(argv)
+    if args.rows < 1 or args.repeat < 1:
+        parser.error("--rows and --repeat must be at least 1")
+    if not 1 <= args.batch_size <= args.max_batch_size:
+        parser.error("--batch-size must be at least 1 and at most --max-batch-size")
+    try:
+        workers = parse_counts(args.workers) if args.workers else None
+        threads = parse_counts(args.threads) if args.threads else None
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    if args.input:
+        texts = pd.read_csv(args.input, usecols=[args.column])[args.column].dropna().astype(str).tolist()[:args.rows]
+    else:
+        texts = sample_texts(args.rows)
+    cores = available_cores()
+    candidates = layouts(cores, workers, threads, args.oversubscribe)
+    if not candidates:
+        parser.error(f"no layout fits {cores} core(s); pass --oversubscribe to run them anyway")
+    results = sweep(texts, candidates, args.batch_size, args.max_batch_size, args.repeat)
+    print(format_table(results))
+    best = max(results, key=lambda r: r["rows_per_s"])
+    print(f"Best on this host ({cores} cores): --inference-workers {best['workers']} "
+          f"--inference-threads {best['threads']}")
+    if args.json:
+        args.json.write_text(json.dumps({"cores": cores, "rows": len(texts), "results": results}, indent=2),
+                             encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
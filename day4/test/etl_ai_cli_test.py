@@ -2,7 +2,9 @@ import csv
 import sys
 from pathlib import Path
 import json
+import time
 import pytest
+import pandas as pd
 
 import os
 main_path = os.path.abspath(os.path.dirname(__file__))
@@ -10,11 +12,17 @@ src_path = str(Path(main_path).parents[0])
 sys.path.insert(0, src_path)  # noqa
 
 import src.main.etl_ai_cli as etl_ai  # Import your Day 4 script
+from src.main.inference_sweep import layouts, main as sweep_main, parse_counts, sample_texts, sweep
 
 # -----------------------
 # Fixtures
 # -----------------------
 
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path: Path, monkeypatch):
+    """Keep --cache runs out of the real ~/.cache."""
+    monkeypatch.setattr(etl_ai, "DEFAULT_CACHE_DIR", tmp_path / "default_cache")
+
 @pytest.fixture
 def sample_employee_csv(tmp_path: Path):
     """Create a small CSV for testing."""
@@ -50,7 +58,7 @@ def sample_etl_output_csv(tmp_path: Path):
 # ETL Function Tests
 # -----------------------
 
-@pytest.mark.parametrize("engine_func", [etl_ai.pandas_etl, etl_ai.polars_etl])
+@pytest.mark.parametrize("engine_func", [etl_ai.pandas_etl, etl_ai.polars_etl, etl_ai.duckdb_etl])
 def test_etl_functions(engine_func, sample_employee_csv, tmp_path):
     out_file = tmp_path / "avg_salary_by_role.csv"
     engine_func(sample_employee_csv, out_file, threshold=100_000)
@@ -59,6 +67,14 @@ def test_etl_functions(engine_func, sample_employee_csv, tmp_path):
         rows = list(csv.DictReader(f))
     assert any(r["role"] == "Developer" and float(r["avg_salary"]) > 120000 for r in rows)
 
+@pytest.mark.parametrize("engine_func", [etl_ai.pandas_etl, etl_ai.polars_etl, etl_ai.duckdb_etl])
+def test_etl_functions_read_fractional_salaries(engine_func, tmp_path):
+    inp = tmp_path / "employees.csv"
+    inp.write_text("name,role,salary\nAlice,Developer,99000.5\nBob,Developer,120000.5\nCarol,QA,80000\n",
+                   encoding="utf-8")
+    result = etl_ai.to_pandas(engine_func(inp, None, threshold=99_000))
+    assert result.set_index("role")["avg_salary"].astype(float).to_dict() == {"Developer": 109500.5}
+
 # -----------------------
 # AI Inference Tests
 # -----------------------
@@ -68,7 +84,7 @@ def test_ai_inference_adds_category(sample_etl_output_csv, tmp_path, monkeypatch
 
     # Mock the Hugging Face pipeline to avoid downloading/running a model
     class DummyPipeline:
-        def __call__(self, texts):
+        def __call__(self, texts, **kwargs):
             return [{"label": "POSITIVE", "score": 0.99} for _ in texts]
 
     monkeypatch.setattr(etl_ai, "pipeline", lambda *a, **k: DummyPipeline())
@@ -108,7 +124,7 @@ def test_cli_with_ai(sample_employee_csv, tmp_path, monkeypatch):
 
     # Mock pipeline to avoid model download
     class DummyPipeline:
-        def __call__(self, texts):
+        def __call__(self, texts, **kwargs):
             return [{"label": "POSITIVE", "score": 0.99} for _ in texts]
 
     monkeypatch.setattr(etl_ai, "pipeline", lambda *a, **k: DummyPipeline())
@@ -125,4 +141,256 @@ def test_cli_with_ai(sample_employee_csv, tmp_path, monkeypatch):
     assert out_file.exists()
     with out_file.open("r", encoding="utf-8") as f:
         rows = list(csv.DictReader(f))
-    assert "salary_category" in rows[0]
\ No newline at end of file
+    assert "salary_category" in rows[0]
+
+@pytest.mark.parametrize("engine_func", [etl_ai.pandas_etl, etl_ai.polars_etl])
+def test_etl_functions_with_columnar_cache(engine_func, sample_employee_csv, tmp_path):
+    cache = etl_ai.ColumnarCache(tmp_path / "cache")
+    expected = tmp_path / "expected.csv"
+    engine_func(sample_employee_csv, expected, threshold=100_000)
+
+    for attempt in ("miss", "hit"):
+        out_file = tmp_path / f"{attempt}.csv"
+        engine_func(sample_employee_csv, out_file, threshold=100_000, cache=cache)
+        assert sorted(out_file.read_text().splitlines()) == sorted(expected.read_text().splitlines())
+    assert len(list((tmp_path / "cache").glob("*.arrow"))) == 1
+
+def test_cli_columnar_cache_is_opt_in(sample_employee_csv, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "default_cache"
+    for flags, entries in (([], 0), (["--cache"], 1)):
+        monkeypatch.setattr(sys, "argv", ["etl_ai_cli", "--input", str(sample_employee_csv),
+                                          "--output", str(tmp_path / "out.csv"), "--engine", "pandas", *flags])
+        etl_ai.main()
+        assert len(list(cache_dir.glob("*.arrow"))) == entries
+
+@pytest.mark.parametrize("fmt, compression", [("parquet", "zstd"), ("csv", "gzip")])
+def test_cli_partitioned_output(fmt, compression, sample_employee_csv, tmp_path, monkeypatch):
+    import polars as pl
+    out_file = tmp_path / "out.csv"
+    monkeypatch.setattr(sys, "argv", [
+        "etl_ai_cli", "--input", str(sample_employee_csv), "--output", str(out_file), "--threshold", "100000",
+        "--partition-by", "role", "--format", fmt, "--compression", compression, "--write-threads", "2",
+    ])
+    etl_ai.main()
+    dataset_dir = tmp_path / "out_by_role"
+    manifest = json.loads((dataset_dir / "_manifest.json").read_text(encoding="utf-8"))
+    assert manifest["total_rows"] == 3
+    assert [(p["value"], p["rows"]) for p in manifest["partitions"]] == [("Developer", 2), ("Manager", 1)]
+    developer = dataset_dir / manifest["partitions"][0]["path"]
+    rows = pl.read_parquet(developer) if fmt == "parquet" else pl.read_csv(developer)
+    assert sorted(rows["name"].to_list()) == ["Alice", "Diana"] and "role" not in rows.columns
+
+class CostModelPipeline:
+    """Stand-in classifier: label from the text, cost = call overhead + padded tokens on a fake clock."""
+
+    def __init__(self, overhead=0.05, per_token=1e-4):
+        self.now, self.overhead, self.per_token = 0.0, overhead, per_token
+        self.batches = []
+
+    def clock(self):
+        return self.now
+
+    def __call__(self, texts, truncation=True, batch_size=1):
+        self.batches.append(list(texts))
+        self.now += self.overhead + self.per_token * len(texts) * max(len(t) for t in texts)
+        return [{"label": "POSITIVE" if len(t) % 2 else "NEGATIVE", "score": len(t) / 100} for t in texts]
+
+def test_classify_batched_keeps_row_order_and_buckets_by_length(monkeypatch):
+    classifier = CostModelPipeline()
+    monkeypatch.setattr(etl_ai, "time", type("Clock", (), {"perf_counter": staticmethod(classifier.clock)}))
+    texts = [f"role {'x' * (i * 7 % 40)}" for i in range(1_000)]
+
+    predictions = etl_ai.classify_batched(classifier, texts, batch_size=16, max_batch_size=16)
+    batches = list(classifier.batches)
+    assert len(batches) == 63
+    assert [len(t) for batch in batches for t in batch] == sorted(len(t) for t in texts)
+    assert predictions == [classifier([t])[0] for t in texts]  # row for row, as per-row calls
+
+def test_classify_batched_grows_batch_until_gain_stops(monkeypatch):
+    classifier = CostModelPipeline()
+    monkeypatch.setattr(etl_ai, "time", type("Clock", (), {"perf_counter": staticmethod(classifier.clock)}))
+    texts = ["Developer!"] * 3_040
+
+    etl_ai.classify_batched(classifier, texts, batch_size=32, max_batch_size=1_024)
+    # Time per token improves by 30%, 22%, 14%, 8% and then under 5%: settle back on 512.
+    assert [len(batch) for batch in classifier.batches] == [32, 64, 128, 256, 512, 1_024, 512, 512]
+
+def test_classify_texts_runs_model_once_per_distinct_text(tmp_path):
+    classifier = CostModelPipeline()
+    texts = ["Developer", "QA", " developer ", "Data  Scientist", "QA"] * 200
+    predictions = etl_ai.classify_texts(lambda: classifier, texts)
+    assert sorted(t for batch in classifier.batches for t in batch) == ["data scientist", "developer", "qa"]
+    assert predictions == [classifier([etl_ai.normalize_text(t)])[0] for t in texts]
+
+def test_cli_ai_leaves_missing_roles_unlabelled(tmp_path, monkeypatch):
+    inp, out_file, memo_path = tmp_path / "employees.csv", tmp_path / "out_ai.csv", tmp_path / "memo.sqlite"
+    inp.write_text("name,role,salary\nAlice,Developer,120000\nBob,,130000\n", encoding="utf-8")
+    classifier = CostModelPipeline()
+    monkeypatch.setattr(etl_ai, "pipeline", lambda *a, **k: classifier)
+    monkeypatch.setattr(sys, "argv", [
+        "etl_ai_cli", "--input", str(inp), "--output", str(out_file), "--engine", "polars", "--ai",
+        "--memo", str(memo_path),
+    ])
+    etl_ai.main()
+    with out_file.open(encoding="utf-8") as f:
+        labels = {r["role"]: r["salary_category"] for r in csv.DictReader(f)}
+    assert labels == {"Developer": "POSITIVE", "": ""}  # the null-role group stays, unlabelled
+    assert [t for batch in classifier.batches for t in batch] == ["developer"]
+    assert etl_ai.LabelMemo(memo_path).get_many(["none", "nan", "<na>"]) == {}
+    assert etl_ai.classify_texts(lambda: classifier, [None, float("nan"), pd.NA]) == [None, None, None]
+
+def test_label_memo_skips_model_for_known_texts_and_evicts_lru(tmp_path):
+    memo = etl_ai.LabelMemo(tmp_path / "memo.sqlite", max_entries=3)
+    first = etl_ai.classify_texts(CostModelPipeline, ["QA", "Manager"], memo)
+
+    def no_model():
+        raise AssertionError("model loaded for memoized texts")
+
+    assert etl_ai.classify_texts(no_model, ["qa", "MANAGER"], memo) == first
+    memo.get_many(["manager"])  # now qa is the least recently used
+    etl_ai.classify_texts(CostModelPipeline, ["DevOps", "Designer"], memo)  # evicts the oldest: qa
+    assert set(memo.get_many(["qa", "manager", "devops", "designer"])) == {"manager", "devops", "designer"}
+    other_model = etl_ai.LabelMemo(tmp_path / "memo.sqlite", model_id="other-model")
+    assert other_model.get_many(["manager"]) == {}
+
+def test_cli_ai_with_memo(sample_employee_csv, tmp_path, monkeypatch):
+    memo_path = tmp_path / "memo.sqlite"
+    outputs = []
+    for factory in (lambda *a, **k: CostModelPipeline(), None):
+        if factory is None:
+            factory = lambda *a, **k: pytest.fail("model loaded although every role is memoized")
+        monkeypatch.setattr(etl_ai, "pipeline", factory)
+        out_file = tmp_path / f"out_{len(outputs)}.csv"
+        monkeypatch.setattr(sys, "argv", [
+            "etl_ai_cli", "--input", str(sample_employee_csv), "--output", str(out_file), "--ai",
+            "--memo", str(memo_path),
+        ])
+        etl_ai.main()
+        outputs.append(out_file.read_text(encoding="utf-8"))
+    assert outputs[0] == outputs[1]
+
+@pytest.mark.parametrize("engine", ["pandas", "polars", "duckdb"])
+def test_cli_ai_hands_etl_result_over_in_memory(engine, sample_employee_csv, tmp_path, monkeypatch):
+    monkeypatch.setattr(etl_ai, "pipeline", lambda *a, **k: CostModelPipeline())
+    workdir = tmp_path / "cwd"
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+    out_file = tmp_path / "out_ai.csv"
+    monkeypatch.setattr(sys, "argv", [
+        "etl_ai_cli", "--input", str(sample_employee_csv), "--output", str(out_file), "--engine", engine, "--ai",
+    ])
+    etl_ai.main()
+    assert list(workdir.iterdir()) == []  # no etl_temp.csv
+    with out_file.open(encoding="utf-8") as f:
+        rows = sorted(csv.DictReader(f), key=lambda r: r["role"])
+    assert [(r["role"], float(r["avg_salary"]), r["salary_category"]) for r in rows] == [
+        ("Developer", 125000.0, "POSITIVE"), ("Manager", 150000.0, "POSITIVE")]
+
+class StubLoader:
+    """Picklable model loader for spawned inference workers: labels by text length, tags the worker pid."""
+
+    def __call__(self):
+        def classify(texts, truncation=True, batch_size=1):
+            return [{"label": "POSITIVE" if len(t) % 2 else "NEGATIVE", "score": len(t) / 100, "pid": os.getpid()}
+                    for t in texts]
+        return classify
+
+def test_inference_pool_shards_rows_and_keeps_order():
+    texts = sample_texts(50)
+    with etl_ai.InferencePool(2, threads=1, loader=StubLoader()) as pool:
+        sharded = pool.classify(texts, batch_size=4, max_batch_size=8)
+    in_process = etl_ai.classify_batched(StubLoader()(), texts, batch_size=4, max_batch_size=8)
+    assert [(p["label"], p["score"]) for p in sharded] == [(p["label"], p["score"]) for p in in_process]
+    assert os.getpid() not in {p["pid"] for p in sharded}  # classified in the worker processes
+
+def test_cli_inference_workers_shard_through_pool(sample_employee_csv, tmp_path, monkeypatch):
+    pools = []
+
+    class InProcessPool:
+        def __init__(self, workers, threads=None):
+            pools.append((workers, threads))
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+        def classify(self, texts, batch_size, max_batch_size):
+            return etl_ai.classify_batched(StubLoader()(), texts, batch_size, max_batch_size)
+
+    monkeypatch.setattr(etl_ai, "InferencePool", InProcessPool)
+    monkeypatch.setattr(etl_ai, "available_cores", lambda: 4)
+    monkeypatch.setattr(etl_ai, "pipeline", lambda *a, **k: pytest.fail("parent process loaded the model"))
+    out_file = tmp_path / "out_ai.csv"
+    monkeypatch.setattr(sys, "argv", [
+        "etl_ai_cli", "--input", str(sample_employee_csv), "--output", str(out_file), "--ai",
+        "--inference-workers", "4", "--inference-threads", "1",
+    ])
+    etl_ai.main()
+    assert pools == [(2, 1)]  # no more workers than distinct texts
+    with out_file.open(encoding="utf-8") as f:
+        assert [r["salary_category"] for r in csv.DictReader(f)] == ["POSITIVE", "POSITIVE"]
+
+@pytest.mark.parametrize("flags", [["--inference-workers", "3"], ["--inference-workers", "2", "--inference-threads", "2"],
+                                   ["--inference-threads", "4"]])
+def test_cli_rejects_oversubscribed_inference(flags, sample_employee_csv, tmp_path, monkeypatch):
+    monkeypatch.setattr(etl_ai, "available_cores", lambda: 2)
+    monkeypatch.setattr(sys, "argv", ["etl_ai_cli", "--input", str(sample_employee_csv),
+                                      "--output", str(tmp_path / "out.csv"), "--ai", *flags])
+    with pytest.raises(SystemExit):
+        etl_ai.main()
+    assert not (tmp_path / "out.csv").exists()
+
+@pytest.mark.parametrize("flags", [["--row-group-rows", "0"], ["--write-threads", "0"]])
+def test_cli_rejects_non_positive_partition_options(flags, sample_employee_csv, tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["etl_ai_cli", "--input", str(sample_employee_csv),
+                                      "--output", str(tmp_path / "out.csv"),
+                                      "--partition-dir", str(tmp_path / "parts"), *flags])
+    with pytest.raises(SystemExit) as exc:
+        etl_ai.main()
+    assert exc.value.code == 2
+    assert not (tmp_path / "parts").exists()
+
+class FirstWorkerFailsLoader:
+    """The first worker to load raises; the others load fine and wait for it."""
+
+    def __init__(self, marker: Path):
+        self.marker = marker
+
+    def __call__(self):
+        try:
+            os.close(os.open(self.marker, os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            return StubLoader()()
+        raise RuntimeError("model weights missing")
+
+def test_inference_pool_fails_fast_when_a_model_load_fails(tmp_path):
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError, match="failed to load its model"):
+        with etl_ai.InferencePool(2, threads=1, loader=FirstWorkerFailsLoader(tmp_path / "loaded")):
+            pass
+    assert time.perf_counter() - start < etl_ai.WORKER_START_TIMEOUT_S / 10  # not held by the barrier
+
+def test_inference_sweep_reports_each_layout():
+    assert layouts(8) == [(1, 1), (1, 2), (1, 4), (1, 8), (2, 1), (2, 2), (2, 4), (4, 1), (4, 2), (8, 1)]
+    assert layouts(6) == [(1, 1), (1, 2), (1, 3), (1, 4), (1, 6), (2, 1), (2, 2), (2, 3), (3, 1), (3, 2),
+                          (4, 1), (6, 1)]
+    assert (5, 1) in layouts(6, workers=[5])  # cores // workers is always tried
+    assert layouts(2, workers=[1, 2], threads=[2], oversubscribe=True) == [(1, 2), (2, 2)]
+    assert parse_counts("1, 2,4") == [1, 2, 4]
+    with pytest.raises(ValueError):
+        parse_counts("0")
+
+    texts = sample_texts(24)
+    assert len(set(texts)) == 24
+    results = sweep(texts, [(1, 1), (2, 1)], batch_size=4, max_batch_size=8, repeat=1, loader=StubLoader())
+    assert [(r["workers"], r["threads"]) for r in results] == [(1, 1), (2, 1)]
+    assert results[0]["speedup"] == 1.0
+    assert all(r["rows_per_s"] > 0 and r["startup_s"] > 0 for r in results)
+
+@pytest.mark.parametrize("flags", [["--rows", "0"], ["--repeat", "0"], ["--batch-size", "0"]])
+def test_inference_sweep_rejects_non_positive_counts(flags):
+    with pytest.raises(SystemExit) as exc:
+        sweep_main(flags)
+    assert exc.value.code == 2
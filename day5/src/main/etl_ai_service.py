@@ -5,15 +5,29 @@ Author: Sundarapandiyan — Week 1 Transition Plan
 """
 
 import time
+import io
+import tempfile
 import logging
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager, closing
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import pandas as pd
 import polars as pl
 from fastapi import FastAPI, File, UploadFile, Query
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import Response
 from transformers import pipeline
 
+# The columnar input cache is day3's columnar_cache module, shared rather than copied.
+sys.path.append(str(Path(__file__).resolve().parents[3] / "day3" / "src" / "main"))  # noqa
+from columnar_cache import (CACHE_BY_DEFAULT, DEFAULT_CACHE_DIR, ColumnarCache, CsvSource,  # noqa: E402
+                            csv_reader_input)
+
 # --- Logging Config ---
 logging.basicConfig(
     level=logging.INFO,
@@ -22,25 +36,56 @@ logging.basicConfig(
 )
 logger = logging.getLogger("etl_ai_service")
 
-app = FastAPI(title="ETL + AI Service", version="1.1")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARM_MODELS:
+        MODEL_REGISTRY.warm_up("text-classification", MODEL_ID, device=-1)
+    yield
+
+app = FastAPI(title="ETL + AI Service", version="1.1", lifespan=lifespan)
+
+# --- Ingestion Schema ---
+# The ETL reads only role/salary, with role dictionary-encoded instead of an
+# inferred object/string column. Salary is a float: fractional values parse.
+QUERY_COLUMNS = ["role", "salary"]
+PANDAS_DTYPES = {"role": "category", "salary": "Float64"}
+POLARS_DTYPES = {"role": pl.Categorical, "salary": pl.Float64}
+
+# --- Columnar Input Cache ---
+# Repeated uploads can skip CSV parsing via the columnar cache, but only when
+# the service runs with $ETL_CACHE_DIR set; otherwise uploads never touch disk.
+UPLOAD_CACHE_DIR: Optional[Path] = DEFAULT_CACHE_DIR if CACHE_BY_DEFAULT else None
 
 # --- ETL Functions ---
-def pandas_etl(input_csv: Path, output_csv: Path, threshold: int):
+# Each engine returns its result frame; output_csv=None keeps it in memory only.
+def pandas_etl(input_csv: CsvSource, output_csv: Optional[Path], threshold: int,
+               cache: Optional[ColumnarCache] = None) -> pd.DataFrame:
     start = time.perf_counter()
-    df = pd.read_csv(input_csv)
+    if cache:
+        df = cache.read_pandas(input_csv, columns=QUERY_COLUMNS, dtype=PANDAS_DTYPES)
+    else:
+        df = pd.read_csv(csv_reader_input(input_csv), usecols=QUERY_COLUMNS, dtype=PANDAS_DTYPES)
+    logger.debug(f"Loaded {len(df)} rows into {df.memory_usage(deep=True).sum() / 1024 ** 2:.2f} MB")
     high_salary = df[df["salary"] > threshold]
     avg_salary_by_role = (
-        high_salary.groupby("role")["salary"]
+        high_salary.groupby("role", observed=True)["salary"]
         .mean()
         .reset_index()
         .rename(columns={"salary": "avg_salary"})
     )
-    avg_salary_by_role.to_csv(output_csv, index=False)
+    if output_csv is not None:
+        avg_salary_by_role.to_csv(output_csv, index=False)
     logger.info(f"Pandas ETL complete in {(time.perf_counter()-start)*1000:.2f} ms")
+    return avg_salary_by_role
 
-def polars_etl(input_csv: Path, output_csv: Path, threshold: int):
+def polars_etl(input_csv: CsvSource, output_csv: Optional[Path], threshold: int,
+               cache: Optional[ColumnarCache] = None) -> pl.DataFrame:
     start = time.perf_counter()
-    df = pl.read_csv(input_csv)
+    if cache:
+        df = cache.read_polars(input_csv, columns=QUERY_COLUMNS, schema_overrides=POLARS_DTYPES)
+    else:
+        df = pl.read_csv(input_csv, columns=QUERY_COLUMNS, schema_overrides=POLARS_DTYPES)
+    logger.debug(f"Loaded {df.height} rows into {df.estimated_size() / 1024 ** 2:.2f} MB")
     result = (
         df.lazy()
         .filter(pl.col("salary") > threshold)
@@ -48,67 +93,307 @@ def polars_etl(input_csv: Path, output_csv: Path, threshold: int):
         .agg(pl.col("salary").mean().alias("avg_salary"))
         .collect()
     )
-    result.write_csv(output_csv)
+    if output_csv is not None:
+        result.write_csv(output_csv)
     logger.info(f"Polars ETL complete in {(time.perf_counter()-start)*1000:.2f} ms")
+    return result
 
-# --- AI Step (real model usage) ---
-def ai_inference(input_csv: Path, output_csv: Path):
+DUCKDB_QUERY = """
+    SELECT role, avg(salary) AS avg_salary
+    FROM employees
+    WHERE salary > ? AND role IS NOT NULL
+    GROUP BY role
+    ORDER BY role
+"""
+DUCKDB_SPILL_DIR = Path(tempfile.gettempdir()) / "etl_duckdb_spill"
+
+def duckdb_etl(input_csv: CsvSource, output_csv: Optional[Path], threshold: int,
+               threads: Optional[int] = None) -> pd.DataFrame:
+    """Filter + group-by as SQL over the CSV; DuckDB reads it in parallel and spills to disk if needed."""
+    import duckdb
     start = time.perf_counter()
-    logger.info("Loading AI model (small, CPU-friendly)...")
-    classifier = pipeline(
-        "text-classification",
-        model="distilbert-base-uncased-finetuned-sst-2-english",
-        device=-1  # CPU; change to 0 for GPU
-    )
+    config = {"temp_directory": str(DUCKDB_SPILL_DIR)}
+    if threads:
+        config["threads"] = threads
+    source = io.BytesIO(input_csv) if isinstance(input_csv, bytes) else str(input_csv)
+    with duckdb.connect(config=config) as con:
+        employees = con.read_csv(source, header=True)  # keep the relation alive: it owns an in-memory upload
+        employees.create_view("employees")
+        result = con.execute(DUCKDB_QUERY, [threshold]).df()
+    if output_csv is not None:
+        result.to_csv(output_csv, index=False)
+    logger.info(f"DuckDB ETL complete in {(time.perf_counter()-start)*1000:.2f} ms")
+    return result
+
+# --- Batched Inference ---
+# Rows go through the pipeline in batches instead of one call per row. Texts
+# are sorted by token length so each batch pads to similar lengths, and
+# results are scattered back to row order. Starting at batch_size, the batch
+# doubles (up to max_batch_size) while the time per padded token keeps
+# dropping by at least ADAPTIVE_MIN_GAIN, then stays at the best size seen.
+DEFAULT_BATCH_SIZE = 32
+MAX_BATCH_SIZE = 256
+ADAPTIVE_MIN_GAIN = 0.05
+
+def token_lengths(classifier, texts: List[str]) -> List[int]:
+    tokenizer = getattr(classifier, "tokenizer", None)
+    if tokenizer is None:
+        return [len(text) for text in texts]  # characters as a proxy
+    return [len(ids) for ids in tokenizer(texts, truncation=True)["input_ids"]]
+
+def classify_batched(classifier, texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                     max_batch_size: int = MAX_BATCH_SIZE) -> List[dict]:
+    """One prediction per text, in input order, from length-sorted batched pipeline calls."""
+    lengths = token_lengths(classifier, texts)
+    order = sorted(range(len(texts)), key=lengths.__getitem__)
+    predictions: List[Optional[dict]] = [None] * len(texts)
+    size, best_size, best_cost, growing = batch_size, batch_size, float("inf"), batch_size < max_batch_size
+    pos = 0
+    while pos < len(order):
+        batch = order[pos:pos + size]
+        start = time.perf_counter()
+        outputs = classifier([texts[i] for i in batch], truncation=True, batch_size=len(batch))
+        cost = (time.perf_counter() - start) / (len(batch) * max(1, max(lengths[i] for i in batch)))
+        for i, output in zip(batch, outputs):
+            predictions[i] = output
+        pos += len(batch)
+        if growing and len(batch) == size:
+            if cost < best_cost * (1 - ADAPTIVE_MIN_GAIN):
+                best_size, best_cost = size, cost
+                size = min(size * 2, max_batch_size)
+                growing = size > best_size
+            else:
+                size, growing = best_size, False
+    logger.debug(f"Classified {len(texts)} texts with batch size {size}")
+    return predictions
+
+# --- Label Memo ---
+# Only the distinct texts are classified and their predictions broadcast back
+# to every row. With a memo, predictions also persist in SQLite keyed by
+# (model id, normalized text), so known values skip the model (and its load)
+# on later runs. The memo keeps at most max_entries rows, evicting the least
+# recently used. Normalizing case is safe because the model is uncased.
+MODEL_ID = "distilbert-base-uncased-finetuned-sst-2-english"
+DEFAULT_MEMO_ENTRIES = 100_000
+
+def normalize_text(text) -> Optional[str]:
+    """Collapsed, lower-cased text; None for a missing value, which is never classified."""
+    if text is None or pd.isna(text):
+        return None
+    return " ".join(str(text).split()).lower()
+
+class LabelMemo:
+    def __init__(self, path: Path, model_id: str = MODEL_ID, max_entries: int = DEFAULT_MEMO_ENTRIES):
+        self.path = Path(path)
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as con, con:
+            con.execute("CREATE TABLE IF NOT EXISTS labels (model TEXT NOT NULL, text TEXT NOT NULL, "
+                        "label TEXT NOT NULL, score REAL NOT NULL, used REAL NOT NULL, PRIMARY KEY (model, text))")
+            con.execute("CREATE INDEX IF NOT EXISTS labels_used ON labels (used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")  # concurrent readers while one process writes
+        return con
+
+    def get_many(self, texts: List[str]) -> dict:
+        found = {}
+        with closing(self._connect()) as con, con:
+            for start in range(0, len(texts), 500):  # stay under SQLite's bound-parameter limit
+                chunk = texts[start:start + 500]
+                rows = con.execute(f"SELECT text, label, score FROM labels WHERE model = ? "
+                                   f"AND text IN ({', '.join('?' * len(chunk))})", [self.model_id, *chunk])
+                found.update({text: {"label": label, "score": score} for text, label, score in rows})
+            con.executemany("UPDATE labels SET used = ? WHERE model = ? AND text = ?",
+                            [(time.time(), self.model_id, text) for text in found])
+        return found
+
+    def put_many(self, predictions: dict) -> None:
+        with closing(self._connect()) as con, con:
+            con.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?, ?)",
+                            [(self.model_id, text, p["label"], p["score"], time.time())
+                             for text, p in predictions.items()])
+            con.execute("DELETE FROM labels WHERE rowid IN (SELECT rowid FROM labels ORDER BY used "
+                        "LIMIT max(0, (SELECT count(*) FROM labels) - ?))", [self.max_entries])
 
-    df = pd.read_csv(input_csv)
-    predicted_labels = []
-    prediction_scores = []
+def classify_texts(load_classifier, texts: List[str], memo: Optional[LabelMemo] = None,
+                   batch_size: int = DEFAULT_BATCH_SIZE,
+                   max_batch_size: int = MAX_BATCH_SIZE) -> List[Optional[dict]]:
+    """Predictions for texts in order, None for missing texts (null/NA, left unlabelled).
 
-    for _, row in df.iterrows():
-        role_text = row["role"]
-        prediction = classifier(role_text, truncation=True)[0]
-        predicted_labels.append(prediction["label"])
-        prediction_scores.append(prediction["score"])
+    load_classifier() is only called if some text is not memoized.
+    """
+    normalized = [normalize_text(text) for text in texts]
+    distinct = list(dict.fromkeys(text for text in normalized if text is not None))
+    known = memo.get_many(distinct) if memo else {}
+    missing = [text for text in distinct if text not in known]
+    if missing:
+        known.update(zip(missing, classify_batched(load_classifier(), missing, batch_size, max_batch_size)))
+        if memo:
+            memo.put_many({text: known[text] for text in missing})
+    logger.info(f"Classified {len(texts)} rows: {len(distinct)} distinct texts, "
+                f"{len(distinct) - len(missing)} from the memo, {len(missing)} through the model")
+    return [None if text is None else known[text] for text in normalized]
 
-    df["predicted_label"] = predicted_labels
-    df["prediction_score"] = prediction_scores
+# --- Model Registry ---
+# Pipelines are loaded once per process and reused by later requests, keyed
+# by (task, model, device, options). At most max_models stay loaded; the least
+# recently used is dropped first. Each load records its wall time and the
+# process RSS growth. Set ETL_WARM_MODELS=1 to load and warm up the default
+# model at startup instead of on the first request.
+WARM_MODELS = os.environ.get("ETL_WARM_MODELS", "").lower() in ("1", "true", "yes")
+DEFAULT_MAX_MODELS = int(os.environ.get("ETL_MAX_MODELS", "2"))
+ModelKey = Tuple[str, str, int, Tuple]
 
-    df.to_csv(output_csv, index=False)
+def current_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+class ModelRegistry:
+    def __init__(self, max_models: int = DEFAULT_MAX_MODELS, loader: Optional[Callable] = None):
+        self.max_models = max_models
+        self._loader = loader
+        self._models: "OrderedDict[ModelKey, object]" = OrderedDict()
+        self._overrides: Dict[ModelKey, object] = {}
+        self._stats: Dict[ModelKey, dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(task: str, model: str, device: int = -1, **options) -> ModelKey:
+        return task, model, device, tuple(sorted(options.items()))
+
+    def get(self, task: str = "text-classification", model: str = MODEL_ID, device: int = -1, **options):
+        key = self.key(task, model, device, **options)
+        with self._lock:  # one load per key, even for concurrent requests
+            if key in self._overrides:
+                return self._overrides[key]
+            if key in self._models:
+                self._models.move_to_end(key)
+                self._stats[key]["hits"] += 1
+                return self._models[key]
+            logger.info(f"Loading AI model {model} ({task}, device {device})...")
+            rss_before, start = current_rss_mb(), time.perf_counter()
+            loaded = (self._loader or pipeline)(task, model=model, device=device, **options)
+            rss_after = current_rss_mb()
+            self._stats[key] = {
+                "task": task, "model": model, "device": device, "options": dict(options),
+                "load_s": time.perf_counter() - start, "warm_up_s": None, "hits": 0,
+                "rss_mb": None if rss_before is None else rss_after - rss_before,
+            }
+            logger.info(f"Loaded {model} in {self._stats[key]['load_s']:.2f} s"
+                        + ("" if rss_before is None else f", +{rss_after - rss_before:.1f} MB RSS"))
+            self._models[key] = loaded
+            while len(self._models) > self.max_models:
+                evicted, _ = self._models.popitem(last=False)
+                self._stats.pop(evicted, None)
+                logger.info(f"Unloaded AI model {evicted[1]} ({evicted[0]}, device {evicted[2]})")
+            return loaded
+
+    def warm_up(self, task: str = "text-classification", model: str = MODEL_ID, device: int = -1,
+                texts: Tuple[str, ...] = ("warm-up",), **options):
+        """Load the model and run one tiny batch, so the first request pays neither."""
+        loaded = self.get(task, model, device, **options)
+        start = time.perf_counter()
+        loaded(list(texts))
+        stats = self._stats.get(self.key(task, model, device, **options))
+        if stats is not None:
+            stats["warm_up_s"] = time.perf_counter() - start
+        return loaded
+
+    def override(self, stub, task: str = "text-classification", model: str = MODEL_ID, device: int = -1,
+                 **options) -> None:
+        """Serve stub for this key instead of loading a model (offline tests)."""
+        self._overrides[self.key(task, model, device, **options)] = stub
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._overrides.clear()
+            self._stats.clear()
+
+    def stats(self) -> List[dict]:
+        with self._lock:
+            return [dict(self._stats[key]) for key in self._models]
+
+MODEL_REGISTRY = ModelRegistry()
+
+# --- AI Step (real model usage) ---
+def to_pandas(frame: Union[pd.DataFrame, pl.DataFrame]) -> pd.DataFrame:
+    """ETL results as pandas; Polars frames are handed over as Arrow-backed columns, without a copy."""
+    return frame.to_pandas(use_pyarrow_extension_array=True) if isinstance(frame, pl.DataFrame) else frame
+
+def ai_inference(etl_result: Union[Path, pd.DataFrame, pl.DataFrame], output_csv: Optional[Path] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_batch_size: int = MAX_BATCH_SIZE,
+                 memo: Optional[LabelMemo] = None) -> pd.DataFrame:
+    """Label each row of an ETL result (a frame in memory, or a CSV of one); writes output_csv if given."""
+    start = time.perf_counter()
+
+    def load_classifier():
+        # Loaded once per process by the registry; device=-1 is CPU, 0 the first GPU
+        return MODEL_REGISTRY.get("text-classification", MODEL_ID, device=-1)
+
+    df = pd.read_csv(etl_result) if isinstance(etl_result, Path) else to_pandas(etl_result)
+    predictions = classify_texts(load_classifier, df["role"].tolist(), memo, batch_size, max_batch_size)
+    labelled = [prediction or {"label": None, "score": None} for prediction in predictions]  # None: missing role
+    df = df.assign(predicted_label=[prediction["label"] for prediction in labelled],
+                   prediction_score=[prediction["score"] for prediction in labelled])
+
+    if output_csv is not None:
+        df.to_csv(output_csv, index=False)
     logger.info(f"AI inference complete in {(time.perf_counter()-start)*1000:.2f} ms")
+    return df
 
 # --- API Endpoint ---
+# Set ETL_LABEL_MEMO to a SQLite path to share memoized predictions across requests.
+LABEL_MEMO_PATH = os.environ.get("ETL_LABEL_MEMO")
+
+@app.get("/models")
+def loaded_models():
+    """Models loaded in this process, with load/warm-up time, RSS growth and reuse count."""
+    return MODEL_REGISTRY.stats()
+
 @app.post("/process")
 async def process_file(
     file: UploadFile = File(...),
     threshold: int = Query(100_000, description="Salary threshold"),
-    engine: str = Query("pandas", enum=["pandas", "polars"]),
+    engine: str = Query("pandas", enum=["pandas", "polars", "duckdb"]),
+    threads: Optional[int] = Query(None, ge=1, description="DuckDB worker threads (default: all cores)"),
     ai: bool = Query(False, description="Run AI inference after ETL"),
-    return_format: str = Query("csv", enum=["csv", "json"])
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, description="Starting inference batch size"),
+    max_batch_size: int = Query(MAX_BATCH_SIZE, ge=1, description="Largest adaptive inference batch size"),
+    return_format: str = Query("csv", enum=["csv", "json"]),
+    cache: bool = Query(True, description="Reuse the columnar cache for repeated uploads (if ETL_CACHE_DIR is set)")
 ):
-    temp_input = Path(f"temp_input_{time.time()}.csv")
-    temp_etl_output = Path(f"temp_etl_{time.time()}.csv")
-    final_output = Path(f"output_{time.time()}.csv")
-
-    # Save uploaded file
-    with temp_input.open("wb") as f:
-        f.write(await file.read())
+    # The upload, the ETL result and the labelled frame all stay in memory
+    data = await file.read()
 
     # Run ETL
+    input_cache = ColumnarCache(UPLOAD_CACHE_DIR) if cache and UPLOAD_CACHE_DIR else None
     if engine == "pandas":
-        pandas_etl(temp_input, temp_etl_output, threshold)
+        result = pandas_etl(data, None, threshold, input_cache)
+    elif engine == "duckdb":
+        result = duckdb_etl(data, None, threshold, threads)
     else:
-        polars_etl(temp_input, temp_etl_output, threshold)
+        result = polars_etl(data, None, threshold, input_cache)
 
     # Optional AI step
     if ai:
-        ai_inference(temp_etl_output, final_output)
-    else:
-        final_output = temp_etl_output
+        memo = LabelMemo(LABEL_MEMO_PATH) if LABEL_MEMO_PATH else None
+        result = ai_inference(result, None, batch_size, max(batch_size, max_batch_size), memo)
 
     # Return result
+    df = to_pandas(result)
     if return_format == "csv":
-        return FileResponse(final_output, filename="result.csv")
+        return Response(df.to_csv(index=False), media_type="text/csv",
+                        headers={"Content-Disposition": 'attachment; filename="result.csv"'})
     else:
-        df = pd.read_csv(final_output)
-        return JSONResponse(content=df.to_dict(orient="records"))
\ No newline at end of file
+        # to_json writes missing values (a null role and its label) as null; NaN would break JSONResponse
+        return Response(df.to_json(orient="records", double_precision=15), media_type="application/json")
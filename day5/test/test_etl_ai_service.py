@@ -9,6 +9,18 @@ sys.path.insert(0, src_path)  # noqa
 
 import src.main.etl_ai_service as service
 
+@pytest.fixture(autouse=True)
+def fresh_model_registry():
+    service.MODEL_REGISTRY.clear()
+    yield
+    service.MODEL_REGISTRY.clear()
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep cached uploads out of the real ~/.cache; the upload cache stays off unless a test turns it on."""
+    monkeypatch.setattr(service, "DEFAULT_CACHE_DIR", tmp_path / "default_cache")
+    monkeypatch.setattr(service, "UPLOAD_CACHE_DIR", None)
+
 @pytest.fixture
 def client():
     return TestClient(service.app)
@@ -26,7 +38,7 @@ def sample_employee_csv(tmp_path):
         csv.writer(f).writerows(rows)
     return file_path
 
-@pytest.mark.parametrize("engine_func", [service.pandas_etl, service.polars_etl])
+@pytest.mark.parametrize("engine_func", [service.pandas_etl, service.polars_etl, service.duckdb_etl])
 def test_etl_functions(engine_func, sample_employee_csv, tmp_path):
     out_file = tmp_path / "avg_salary_by_role.csv"
     engine_func(sample_employee_csv, out_file, threshold=100_000)
@@ -49,10 +61,44 @@ def test_process_endpoint_etl_only(client, sample_employee_csv):
     assert isinstance(data, list)
     assert "avg_salary" in data[0]
    
+@pytest.mark.parametrize("engine", ["pandas", "polars", "duckdb"])
+def test_process_endpoint_reads_fractional_salaries(engine, client):
+    upload = b"name,role,salary\nAlice,Developer,99000.5\nBob,Developer,120000.5\nCarol,QA,80000\n"
+    response = client.post(f"/process?threshold=99000&engine={engine}&return_format=json",
+                           files={"file": ("employees.csv", upload, "text/csv")})
+    assert response.status_code == 200
+    assert response.json() == [{"role": "Developer", "avg_salary": 109500.5}]
+
+def test_process_endpoint_duckdb_engine(client, sample_employee_csv):
+    with sample_employee_csv.open("rb") as f:
+        response = client.post(
+            "/process?threshold=100000&engine=duckdb&threads=1&return_format=json",
+            files={"file": ("employees.csv", f, "text/csv")}
+        )
+    assert response.status_code == 200
+    assert response.json() == [
+        {"role": "Developer", "avg_salary": 125000.0},
+        {"role": "Manager", "avg_salary": 155000.0},
+    ]
+
+def test_process_endpoint_reuses_columnar_cache(client, sample_employee_csv, tmp_path, monkeypatch):
+    monkeypatch.setattr(service, "UPLOAD_CACHE_DIR", tmp_path / "cache")
+    results = []
+    for _ in range(2):
+        with sample_employee_csv.open("rb") as f:
+            response = client.post(
+                "/process?threshold=100000&engine=pandas&return_format=json",
+                files={"file": ("employees.csv", f, "text/csv")}
+            )
+        assert response.status_code == 200
+        results.append(response.json())
+    assert results[0] == results[1]
+    assert len(list((tmp_path / "cache").glob("*.arrow"))) == 1
+
 def test_process_endpoint_with_ai(client, sample_employee_csv, monkeypatch):
     class DummyPipeline:
-        def __call__(self, text, truncation=True):
-            return [{"label": "POSITIVE", "score": 0.99}]
+        def __call__(self, texts, truncation=True, batch_size=1):
+            return [{"label": "POSITIVE", "score": 0.99} for _ in texts]
 
     monkeypatch.setattr(service, "pipeline", lambda *a, **k: DummyPipeline())
 
@@ -65,4 +111,137 @@ def test_process_endpoint_with_ai(client, sample_employee_csv, monkeypatch):
     data = response.json()
     assert "predicted_label" in data[0]
     assert data[0]["predicted_label"] == "POSITIVE"
-    
\ No newline at end of file
+    
+def test_ai_inference_batches_rows_in_order(tmp_path, monkeypatch):
+    calls = []
+
+    class EchoPipeline:
+        def __call__(self, texts, truncation=True, batch_size=1):
+            calls.append(len(texts))
+            return [{"label": text.upper(), "score": len(text) / 100} for text in texts]
+
+    monkeypatch.setattr(service, "pipeline", lambda *a, **k: EchoPipeline())
+    roles = ["QA", "Data Scientist", "Manager", "Dev", "Designer", "DevOps", "Developer"]
+    etl_output, ai_output = tmp_path / "etl.csv", tmp_path / "ai.csv"
+    etl_output.write_text("role,avg_salary\n" + "".join(f"{r},1\n" for r in roles), encoding="utf-8")
+
+    service.ai_inference(etl_output, ai_output, batch_size=3, max_batch_size=3)
+    with ai_output.open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["predicted_label"] for r in rows] == [r.upper() for r in roles]
+    assert calls == [3, 3, 1]
+
+def test_process_endpoint_memoizes_predictions(client, sample_employee_csv, tmp_path, monkeypatch):
+    class DummyPipeline:
+        def __call__(self, texts, truncation=True, batch_size=1):
+            return [{"label": "POSITIVE", "score": 0.99} for _ in texts]
+
+    monkeypatch.setattr(service, "LABEL_MEMO_PATH", str(tmp_path / "memo.sqlite"))
+    results = []
+    for factory in (lambda *a, **k: DummyPipeline(), lambda *a, **k: pytest.fail("model loaded again")):
+        service.MODEL_REGISTRY.clear()  # only the memo may spare the second load
+        monkeypatch.setattr(service, "pipeline", factory)
+        with sample_employee_csv.open("rb") as f:
+            response = client.post(
+                "/process?threshold=100000&engine=pandas&ai=true&return_format=json",
+                files={"file": ("employees.csv", f, "text/csv")}
+            )
+        assert response.status_code == 200
+        results.append(response.json())
+    assert results[0] == results[1]
+    assert results[0][0]["predicted_label"] == "POSITIVE"
+
+def test_process_endpoint_leaves_missing_roles_unlabelled(client, tmp_path, monkeypatch):
+    texts = []
+
+    def classify(batch, **kwargs):
+        texts.extend(batch)
+        return [{"label": "POSITIVE", "score": 0.5} for _ in batch]
+
+    service.MODEL_REGISTRY.override(classify, device=-1)
+    monkeypatch.setattr(service, "LABEL_MEMO_PATH", str(tmp_path / "memo.sqlite"))
+    upload = b"name,role,salary\nAlice,Developer,120000\nBob,,130000\n"
+    response = client.post("/process?threshold=100000&engine=polars&ai=true&return_format=json",
+                           files={"file": ("employees.csv", upload, "text/csv")})
+    assert response.status_code == 200
+    labels = {row["role"]: (row["predicted_label"], row["prediction_score"]) for row in response.json()}
+    assert labels == {"Developer": ("POSITIVE", 0.5), None: (None, None)}
+    assert texts == ["developer"]
+    assert service.LabelMemo(tmp_path / "memo.sqlite").get_many(["none", "nan", "<na>"]) == {}
+
+class CountingLoader:
+    def __init__(self):
+        self.loads, self.calls = [], []
+
+    def __call__(self, task, model, device=-1, **options):
+        self.loads.append((model, device))
+
+        def classify(texts, truncation=True, batch_size=1):
+            self.calls.append(list(texts))
+            return [{"label": "POSITIVE", "score": 0.99} for _ in texts]
+        return classify
+
+def test_model_registry_loads_once_and_evicts_lru():
+    loader = CountingLoader()
+    registry = service.ModelRegistry(max_models=2, loader=loader)
+    first = registry.get(model="a")
+    assert registry.get(model="a") is first
+    registry.get(model="b")
+    registry.get(model="a")  # b is now least recently used
+    registry.get(model="a", device=0)  # a different key: evicts b
+    assert loader.loads == [("a", -1), ("b", -1), ("a", 0)]
+    stats = registry.stats()
+    assert [(s["model"], s["device"], s["hits"]) for s in stats] == [("a", -1, 2), ("a", 0, 0)]
+    assert all(s["load_s"] >= 0 and s["rss_mb"] is not None for s in stats)
+    registry.get(model="b")
+    assert loader.loads[-1] == ("b", -1)
+
+def test_model_registry_override_serves_stub_without_loading(client, sample_employee_csv, monkeypatch):
+    monkeypatch.setattr(service, "pipeline", lambda *a, **k: pytest.fail("model loaded despite override"))
+    service.MODEL_REGISTRY.override(lambda texts, **k: [{"label": "STUB", "score": 1.0} for _ in texts],
+                                    device=-1)
+    with sample_employee_csv.open("rb") as f:
+        response = client.post(
+            "/process?threshold=100000&ai=true&return_format=json",
+            files={"file": ("employees.csv", f, "text/csv")}
+        )
+    assert response.status_code == 200
+    assert {row["predicted_label"] for row in response.json()} == {"STUB"}
+
+def test_startup_warm_up_preloads_model_for_requests(sample_employee_csv, monkeypatch):
+    loader = CountingLoader()
+    monkeypatch.setattr(service, "pipeline", loader)
+    monkeypatch.setattr(service, "WARM_MODELS", True)
+    with TestClient(service.app) as warm_client:
+        assert loader.loads == [(service.MODEL_ID, -1)] and loader.calls == [["warm-up"]]
+        for _ in range(2):
+            with sample_employee_csv.open("rb") as f:
+                response = warm_client.post(
+                    "/process?threshold=100000&ai=true&return_format=json",
+                    files={"file": ("employees.csv", f, "text/csv")}
+                )
+            assert response.status_code == 200
+        models = warm_client.get("/models").json()
+    assert len(loader.loads) == 1
+    assert len(models) == 1 and models[0]["hits"] == 2 and models[0]["warm_up_s"] is not None
+
+@pytest.mark.parametrize("engine", ["pandas", "polars", "duckdb"])
+def test_process_endpoint_keeps_intermediates_in_memory(engine, client, sample_employee_csv, tmp_path,
+                                                        monkeypatch):
+    service.MODEL_REGISTRY.override(lambda texts, **k: [{"label": "POSITIVE", "score": 0.5} for _ in texts],
+                                    device=-1)
+    workdir = tmp_path / "cwd"
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+    with sample_employee_csv.open("rb") as f:
+        response = client.post(
+            f"/process?threshold=100000&engine={engine}&ai=true&return_format=csv",  # default cache setting
+            files={"file": ("employees.csv", f, "text/csv")}
+        )
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="result.csv"'
+    rows = sorted(csv.DictReader(response.text.splitlines()), key=lambda r: r["role"])
+    assert [(r["role"], float(r["avg_salary"]), r["predicted_label"]) for r in rows] == [
+        ("Developer", 125000.0, "POSITIVE"), ("Manager", 155000.0, "POSITIVE")]
+    assert list(workdir.iterdir()) == []  # no temp_*.csv / output_*.csv left behind
+    assert not (tmp_path / "default_cache").exists()  # nor a columnar copy of the upload